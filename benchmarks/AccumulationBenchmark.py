@@ -0,0 +1,66 @@
+"""
+Compares the previous copying merge of paginated results ({**output, **page}) with the in place merge now used by
+TwitterAPI._collectPages and TwitterUser.saveFollowers/saveFriends on synthetic pages of 1000 users each.
+
+run from the repository root:
+python benchmarks/AccumulationBenchmark.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from twitter.TwitterAPI import TwitterAPI
+from twitter.TwitterEntities import TwitterUser
+
+
+def createPages(numPages, usersPerPage=1000):
+    pages = []
+    for pageNumber in range(numPages):
+        page = {}
+        for i in range(usersPerPage):
+            userId = str(pageNumber * usersPerPage + i)
+            page[userId] = TwitterUser(id=userId)
+        pages.append(page)
+    return pages
+
+
+def copyingMerge(pages):
+    output = {}
+    for page in pages:
+        output = {**output, **page}
+    return output
+
+
+def copyingSave(user, pages):
+    for page in pages:
+        user.followers = {**user.followers, **page}
+
+
+def inPlaceSave(user, pages):
+    for page in pages:
+        user.saveFollowers(page)
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())  # APIRateLimit keeps its tweetCapLog.jsonl in the working directory
+    api = TwitterAPI('xxx')
+    repetitions = 20
+    print(f"{'pages':>6} {'copying merge':>15} {'_collectPages':>15} {'copying save':>15} {'saveFollowers':>15}")
+    for numPages in (1, 5, 15, 60):
+        pages = createPages(numPages)
+        copying = timeit.timeit(lambda: copyingMerge(pages), number=repetitions) / repetitions
+        inPlace = timeit.timeit(lambda: api._collectPages(iter(pages)), number=repetitions) / repetitions
+        copyingUser = timeit.timeit(lambda: copyingSave(TwitterUser(id='0'), pages),
+                                    number=repetitions) / repetitions
+        inPlaceUser = timeit.timeit(lambda: inPlaceSave(TwitterUser(id='0'), pages),
+                                    number=repetitions) / repetitions
+        print(f"{numPages:>6} {copying * 1000:>12.2f} ms {inPlace * 1000:>12.2f} ms "
+              f"{copyingUser * 1000:>12.2f} ms {inPlaceUser * 1000:>12.2f} ms")
+        assert copyingMerge(pages) == api._collectPages(iter(pages))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Measures the memory held by Tweet and TwitterUser instances created from the testdata of the user timeline and the
+followers endpoints, i.e. the payload of the entities including their attributes.
+
+run from the repository root:
+python benchmarks/EntityMemoryBenchmark.py
+"""
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from twitter.TwitterEntities import TwitterUser, Tweet
+
+TESTDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'testdata')
+
+
+def loadData(fileName):
+    with open(os.path.join(TESTDATA, fileName), 'r') as f:
+        return json.load(f)['data']
+
+
+def measure(createEntity, data, copies=100):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [createEntity(entityDict) for _ in range(copies) for entityDict in data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(entities)
+
+
+def main():
+    tweets = loadData('user_time_line_without_expansion_1page.json')
+    users = loadData('followers_1page_w1000_without_expansion.json')
+    print(f"Tweet        {measure(Tweet.createFromDict, tweets):8.0f} bytes per instance")
+    print(f"TwitterUser  {measure(TwitterUser.createFromDict, users, copies=10):8.0f} bytes per instance")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the previous encodeDecodeTwitterText (four encode/decode passes) with the current one and its batch
+variant on all tweet texts, user descriptions and poll option labels of the testdata fixtures.
+
+run from the repository root:
+python benchmarks/TextNormalisationBenchmark.py
+"""
+import glob
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import twitter.utils as utils
+
+TESTDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'testdata')
+
+
+def previousEncodeDecodeTwitterText(twitterText):
+    return twitterText.encode('utf-16', 'surrogatepass').decode('utf-16').encode('utf-8').decode('utf-8')
+
+
+def collectTexts(value, texts):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in ['text', 'description', 'label'] and isinstance(item, str):
+                texts.append(item)
+            else:
+                collectTexts(item, texts)
+    elif isinstance(value, list):
+        for item in value:
+            collectTexts(item, texts)
+
+
+def loadTexts():
+    texts = []
+    for fileName in sorted(glob.glob(os.path.join(TESTDATA, '*.json'))):
+        with open(fileName, 'r') as f:
+            try:
+                collectTexts(json.load(f), texts)
+            except json.JSONDecodeError:  # the stream fixtures contain one json object per line
+                f.seek(0)
+                for line in f:
+                    if line.strip():
+                        collectTexts(json.loads(line), texts)
+    return texts
+
+
+def main():
+    texts = loadTexts()
+    # in the fixtures the emojis are already joined by the json decoder, texts with surrogate pairs are added
+    surrogateTexts = [text + '\ud83d\ude00' for text in texts[:1000]]
+    for name, sample in [('testdata', texts), ('surrogate pairs', surrogateTexts)]:
+        assert [previousEncodeDecodeTwitterText(t) for t in sample] == [utils.encodeDecodeTwitterText(t) for t in sample]
+        assert [previousEncodeDecodeTwitterText(t) for t in sample] == utils.encodeDecodeTwitterTexts(sample)
+        repetitions = 20
+        previous = timeit.timeit(lambda: [previousEncodeDecodeTwitterText(t) for t in sample],
+                                 number=repetitions) / repetitions
+        current = timeit.timeit(lambda: [utils.encodeDecodeTwitterText(t) for t in sample],
+                                number=repetitions) / repetitions
+        batch = timeit.timeit(lambda: utils.encodeDecodeTwitterTexts(sample), number=repetitions) / repetitions
+        print(f"{name:16} {len(sample):6} texts   previous {previous * 1000:7.2f} ms   "
+              f"current {current * 1000:7.2f} ms   batch {batch * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
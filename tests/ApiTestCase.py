@@ -0,0 +1,31 @@
+import os
+import re
+import tempfile
+import unittest
+
+URL = re.compile(r"https://api.twitter.com/2*")
+TESTDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'testdata')
+HEADERS = {'x-rate-limit-remaining': '10', 'x-rate-limit-reset': '0'}
+
+
+def readTestData(fileName):
+    with open(os.path.join(TESTDATA, fileName), 'r') as f:
+        data = f.read()
+        f.close()
+    return data
+
+
+class ApiTestCase(unittest.TestCase):
+    """
+    base of the suites that create TwitterAPI instances, every test runs in a temporary working directory since
+    APIRateLimit keeps its tweetCapLog.jsonl in the working directory
+    """
+
+    def setUp(self):
+        tmpDir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpDir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmpDir.name)
+        self.tmpDir = tmpDir.name
+        # the api of a test is released before its working directory is removed
+        self.addCleanup(self.__dict__.pop, 'api', None)
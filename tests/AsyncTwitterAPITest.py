@@ -0,0 +1,94 @@
+import twitter
+
+import asyncio
+import time
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, readTestData
+
+HEADERS = {'x-rate-limit-remaining': '299', 'x-rate-limit-reset': '0'}
+
+
+class AsyncTwitterAPITest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.responses = responses.RequestsMock()
+        self.responses.start()
+        self.addCleanup(self.responses.stop)
+        self.addCleanup(self.responses.reset)
+
+    def testConcurrentUserLookups(self):
+        data = readTestData('user_without_expansion.json')
+        for _ in range(10):
+            self.responses.add(GET, url=URL, body=data, headers=HEADERS)
+
+        async def lookup():
+            async with twitter.AsyncTwitterAPI('xxx', maxConcurrency=5) as api:
+                return await asyncio.gather(*[api.getUserById(userId=30436279, withExpansion=False)
+                                              for _ in range(10)])
+
+        users = asyncio.run(lookup())
+        self.assertEqual(10, len(users))
+        self.assertEqual("Ali Abdaal", users[0].name)
+        self.assertIsInstance(users[9], twitter.TwitterUser)
+
+    def testSharesRateLimitWithBlockingClient(self):
+        data = readTestData('LikingUsersOfTweet.json')
+        self.responses.add(GET, url=URL, body=data, headers={'x-rate-limit-remaining': '42',
+                                                             'x-rate-limit-reset': '0'})
+        blockingApi = twitter.TwitterAPI('xxx')
+
+        async def lookup():
+            api = twitter.AsyncTwitterAPI(api=blockingApi)
+            users = await api.getLikingUsersOfTweet(tweetId='1430819811362328576')
+            await api.close()
+            return users
+
+        users = asyncio.run(lookup())
+        self.assertEqual(52, len(users))
+        self.assertIsInstance(users[0], twitter.TwitterUser)
+        self.assertEqual(42, blockingApi.apiRateLimit.RequestsLeft_GET_Users_LikingUsers)
+
+    def testRateLimitIsAwaitedWithoutOccupyingAWorker(self):
+        # served in the order of the requests
+        self.responses.add(GET, url=URL, body=readTestData('LikingUsersOfTweet.json'), headers=HEADERS)
+        self.responses.add(GET, url=URL, body=readTestData('tweet_withoutExpansion.json'), headers=HEADERS)
+        blockingApi = twitter.TwitterAPI('xxx')
+        blockingApi.tokenPool.primary.limiter.update("GET_Tweet_byId", {'x-rate-limit-remaining': '0',
+                                                                        'x-rate-limit-reset': str(time.time() + 0.5)})
+        finished = []
+
+        async def request(coroutine, name):
+            await coroutine
+            finished.append(name)
+
+        async def lookup():
+            async with twitter.AsyncTwitterAPI(api=blockingApi, maxConcurrency=1) as api:
+                tweet = asyncio.ensure_future(request(api.getTweet(tweetId='1', withExpansion=False), "tweet"))
+                await asyncio.sleep(0.1)  # the Tweet look-up waits for the reset
+                await request(api.getLikingUsersOfTweet(tweetId='1430819811362328576'), "likingUsers")
+                await tweet
+
+        asyncio.run(lookup())
+        self.assertEqual(["likingUsers", "tweet"], finished)
+        self.assertEqual(0, blockingApi.tokenPool.primary.limiter.bucket("GET_Tweet_byId").inFlight)
+
+    def testPaginationIsClosedWhenTheIterationIsLeftEarly(self):
+        data = readTestData('user_time_line_with_expansion_morePages_1_2.json')
+        self.responses.add(GET, url=URL, body=data, headers=HEADERS)
+        blockingApi = twitter.TwitterAPI('xxx')
+
+        async def firstPage():
+            async with twitter.AsyncTwitterAPI(api=blockingApi) as api:
+                pages = api.iterUserTweetTimeline(userId='30436279')
+                async for page in pages:
+                    break
+                self.assertGreater(blockingApi.apiRateLimit.reservedTweets, 0)
+                await pages.aclose()
+                return page
+
+        self.assertEqual(100, len(asyncio.run(firstPage())))
+        self.assertEqual(0, blockingApi.apiRateLimit.reservedTweets)
+        self.assertEqual(0, blockingApi.tokenPool.primary.reservedTweets)
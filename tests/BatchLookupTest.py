@@ -0,0 +1,163 @@
+import twitter
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, HEADERS, readTestData
+
+
+class BatchLookupTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        userDict = json.loads(readTestData('user_without_expansion.json'))['data']
+        self.users = {str(i): dict(userDict, id=str(i), username=f"user{i}") for i in range(1000, 1300)}
+        tweetDict = json.loads(readTestData('tweets_withoutExpansions.json'))['data'][0]
+        self.tweets = {str(i): dict(tweetDict, id=str(i)) for i in range(5000, 5250)}
+        self.requestedBatches = []
+        self.lock = threading.Lock()
+
+    def _lookup(self, entities, key):
+        def callback(request):
+            requested = parse_qs(urlparse(request.url).query)[key][0].split(',')
+            with self.lock:
+                self.requestedBatches.append(requested)
+            data = [entities[value] for value in requested if value in entities]
+            errors = [{'value': value, 'detail': f"Could not find {value}.", 'title': 'Not Found Error'}
+                      for value in requested if value not in entities]
+            body = {'data': data} if data else {}
+            if errors:
+                body['errors'] = errors
+            return 200, HEADERS, json.dumps(body)
+        return callback
+
+    def testUsersAreBatchedDedupedAndInInputOrder(self):
+        api = twitter.TwitterAPI('xxx')
+        userIds = list(reversed(list(self.users))) + ['1000', 1001, '42']
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(self.users, 'ids'))
+            users, errors = api.getUsersByIds(userIds=userIds, withExpansion=False, returnErrors=True)
+        self.assertEqual(4, len(self.requestedBatches))  # 301 unique ids
+        self.assertTrue(all(len(batch) <= 100 for batch in self.requestedBatches))
+        self.assertEqual(list(reversed(list(self.users))), [user.id for user in users])
+        self.assertEqual(['42'], list(errors))
+        self.assertEqual('Not Found Error', errors['42']['title'])
+        self.assertEqual(10, api.apiRateLimit.RequestsLeft_GET_Users_byIds)
+
+    def testUsernamesAreMatchedCaseInsensitive(self):
+        api = twitter.TwitterAPI('xxx')
+        users = {user['username']: user for user in self.users.values()}
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(users, 'usernames'))
+            found = api.getUsersByNames(userNames=['user1005', 'USER1005', 'user1001', 'unknown'],
+                                        withExpansion=False)
+        self.assertEqual(['user1005', 'user1001'], [user.username for user in found])
+
+    def testTweetsAreBatched(self):
+        api = twitter.TwitterAPI('xxx')
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(self.tweets, 'ids'))
+            tweets = api.getTweets(tweetIds=list(self.tweets), withExpansion=False)
+        self.assertEqual(3, len(self.requestedBatches))
+        self.assertEqual(list(self.tweets), list(tweets))
+        self.assertIsInstance(tweets['5000'], twitter.Tweet)
+
+    def testBatchesBeyondRateLimit(self):
+        api = twitter.TwitterAPI('xxx')
+        api.apiRateLimit.RequestsLeft_GET_Tweets_byIds = 2
+        with self.assertRaises(twitter.Error.LimitExceedError):
+            api.getTweets(tweetIds=list(self.tweets), withExpansion=False)
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(self.tweets, 'ids'))
+            tweets, errors = api.getTweets(tweetIds=list(self.tweets), withExpansion=False, returnErrors=True)
+        self.assertEqual(200, len(tweets))
+        self.assertEqual(50, len(errors))
+        self.assertIsInstance(errors['5249'], twitter.Error.LimitExceedError)
+
+    def testLookupAfterTheResetOfTheWindow(self):
+        api = twitter.TwitterAPI('xxx')
+        api.apiRateLimit.RequestsLeft_GET_Users_byIds = 0
+        api.apiRateLimit.ResetTime_GET_Users_byIds = time.time() - 5  # reset already passed
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(self.users, 'ids'))
+            users = api.getUsersByIds(userIds=['1000', '1001'], withExpansion=False)
+        self.assertEqual(['1000', '1001'], [user.id for user in users])
+
+        api.apiRateLimit.RequestsLeft_GET_Users_byIds = 0
+        api.apiRateLimit.ResetTime_GET_Users_byIds = time.time() + 0.2
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(self.users, 'ids'))
+            users = api.getUsersByIds(userIds=['1002'], withExpansion=False)  # waits for the reset
+        self.assertEqual(['1002'], [user.id for user in users])
+
+        api = twitter.TwitterAPI('xxx', maxRateLimitWait=10)
+        api.apiRateLimit.RequestsLeft_GET_Users_byIds = 0
+        api.apiRateLimit.ResetTime_GET_Users_byIds = time.time() + 30
+        self.assertRaises(twitter.Error.LimitExceedError, api.getUsersByIds, userIds=['1000'], withExpansion=False)
+
+    def testLookupsShareOnePoolAndKeepTheirConcurrency(self):
+        api = twitter.TwitterAPI('xxx')
+        lookup = self._lookup(self.users, 'ids')
+        inFlight = []
+        maxInFlight = []
+
+        def callback(request):
+            with self.lock:
+                inFlight.append(request)
+                maxInFlight.append(len(inFlight))
+            time.sleep(0.01)
+            with self.lock:
+                inFlight.remove(request)
+            return lookup(request)
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=callback)
+            api.getUsersByIds(userIds=list(self.users), withExpansion=False, maxConcurrency=2)
+            pool = api._lookupExecutor
+            api.getUsersByIds(userIds=list(self.users)[::-1], withExpansion=False, maxConcurrency=2)
+        self.assertIs(pool, api._lookupExecutor)
+        self.assertEqual(6, len(self.requestedBatches))
+        self.assertLessEqual(max(maxInFlight), 2)
+        api.close()
+        self.assertIsNone(api._lookupExecutor)
+
+    def testConcurrentSingleLookupsAreCoalesced(self):
+        api = twitter.TwitterAPI('xxx', batchLookups=True, batchWindow=0.05)
+        userIds = list(self.users)[:150] + ['1000', '42']
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(self.users, 'ids'))
+            with ThreadPoolExecutor(max_workers=152) as executor:
+                futures = [executor.submit(api.getUserById, userId=userId, withExpansion=False) for userId in userIds]
+            users = [future.result() for future in futures[:-1]]
+            with self.assertRaises(twitter.APIError):
+                futures[-1].result()
+        self.assertEqual(userIds[:-1], [user.id for user in users])
+        self.assertLessEqual(len(self.requestedBatches), 3)  # instead of 152 requests
+
+    def testAsyncLookupsAreCoalesced(self):
+        async def lookup():
+            # the window never passes, the last batch is sent by flush() once every look-up is submitted
+            async with twitter.AsyncTwitterAPI('xxx', maxConcurrency=2, batchLookups=True, batchWindow=60) as api:
+                lookups = asyncio.gather(*[api.getTweet(tweetId=tweetId, withExpansion=False)
+                                           for tweetId in self.tweets])
+                await asyncio.sleep(0)  # every look-up runs until it awaits its batch
+                for batcher in api.api._batchers.values():
+                    batcher.flush()
+                return await lookups
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._lookup(self.tweets, 'ids'))
+            tweets = asyncio.run(lookup())
+        self.assertEqual(list(self.tweets), [tweet.id for tweet in tweets])
+        self.assertEqual(3, len(self.requestedBatches))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import twitter
+from twitter.CheckpointStore import StreamCheckpoint
+from twitter.Error import APIError, UnsavedDataLimitExceedError
+from twitter.Page import Page
+
+import json
+import os
+import time
+import unittest
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, HEADERS, readTestData
+
+
+class CheckpointTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.store = twitter.CheckpointStore(os.path.join(self.tmpDir, 'checkpoints.sqlite'))
+        self.api = twitter.TwitterAPI('xxx', checkpointStore=self.store)
+        self.user = twitter.TwitterUser(id='30436279', followers_count=96936, following_count=1150)
+
+    def testAbortedCrawlContinuesWithTheNextPage(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_without_expansion.json'),
+                     headers={'x-rate-limit-remaining': '0', 'x-rate-limit-reset': f'{time.time() + 1800}'})
+            self.assertRaises(UnsavedDataLimitExceedError, self.api.getFollowers, user=self.user, numPages=2,
+                              withExpansion=False, resume="followers")
+        self.assertEqual(1000, len(self.api.NotReturnedData.rescue()))
+        checkpoint = self.store.load("followers")
+        self.assertEqual(('1UTL3VM82APHEZZZ', 1, 1000),
+                         (checkpoint['nextToken'], checkpoint['pagesDone'], checkpoint['entitiesReceived']))
+
+        self.api.apiRateLimit.RequestsLeft_GET_Users_Followers = 15  # the window was reset
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('followers_2pages2_2_w1000_without_expansion.json'),
+                     headers=HEADERS)
+            followers = self.api.getFollowers(user=self.user, numPages=2, withExpansion=False, resume="followers")
+            query = parse_qs(urlparse(rsps.calls[0].request.url).query)
+        self.assertEqual(['1UTL3VM82APHEZZZ'], query['pagination_token'])
+        self.assertEqual(1000, len(followers))  # only the second page is requested
+        self.assertIsNone(self.store.load("followers"))
+        self.assertEqual([], self.store.names())
+
+    def testCheckpointIsStoredOnceThePageIsHandled(self):
+        stored = []
+
+        def secondPage(request):
+            stored.append(self.store.load("followers"))
+            return 200, HEADERS, readTestData('followers_2pages2_2_w1000_without_expansion.json')
+
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_without_expansion.json'),
+                     headers=HEADERS)
+            rsps.add_callback(GET, url=URL, callback=secondPage)
+            pages = self.api.iterFollowers(user=self.user, numPages=2, withExpansion=False, resume="followers")
+            next(pages)
+            self.assertIsNone(self.store.load("followers"))  # handed to the caller, but not handled yet
+            next(pages)
+            self.assertRaises(StopIteration, next, pages)
+        self.assertEqual('1UTL3VM82APHEZZZ', stored[0]['nextToken'])
+        self.assertIsNone(self.store.load("followers"))
+
+    def testCheckpointOfAnotherRequestIsNotResumed(self):
+        self.store.save("followers", {'endpoint': "users/2244994945/followers", 'params': {}, 'nextToken': 'n',
+                                      'pagesDone': 1, 'entitiesReceived': 1000})
+        self.assertRaises(APIError, self.api.iterFollowers, user=self.user, numPages=2, withExpansion=False,
+                          resume="followers")
+
+    def testResumedStreamDropsTweetsReturnedBefore(self):
+        endpoint = "https://api.twitter.com/2/tweets/sample/stream"
+        self.store.save("sample", {'endpoint': endpoint, 'tweetIds': [20]})
+        checkpoint = StreamCheckpoint(self.store, "sample", endpoint)
+        self.assertEqual(1, checkpoint.params({})['backfill_minutes'])
+        self.assertFalse(checkpoint.isNew(Page(body={'data': {'id': '20'}})))
+        self.assertTrue(checkpoint.isNew(Page(body={'data': {'id': '19'}})))  # not returned, although older
+        self.assertTrue(checkpoint.isNew(Page(body={'data': {'id': '21'}})))
+        self.assertEqual([20], self.store.load("sample")['tweetIds'])  # nothing is written before the return
+        checkpoint.delivered(['19', '21'])
+        self.assertEqual([19, 20, 21], self.store.load("sample")['tweetIds'])
+        self.assertNotIn('backfill_minutes', StreamCheckpoint(self.store, "sample", "other").params({}))
+
+    def testAbortedStreamReturnsItsTweetsAgain(self):
+        lines = "\r\n".join(json.dumps({'data': {'id': tweetId, 'text': 'hello'}}) for tweetId in ['101', '100'])
+
+        def stream(**kwargs):
+            with responses.RequestsMock() as rsps:
+                rsps.add(GET, url=URL, body=lines, headers=HEADERS)
+                return self.api.getTweetsFromSampleStream(withExpansion=False, resume="sample", **kwargs)
+
+        with mock.patch.object(self.api, '_handleTweetResponse', side_effect=RuntimeError("crash")):
+            self.assertRaises(RuntimeError, stream, secondsActive=60)
+        self.assertIsNone(self.store.load("sample"))  # the Tweet was received, but never returned
+        self.assertEqual(['101'], list(stream(secondsActive=-1)))
+        self.assertEqual([101], self.store.load("sample")['tweetIds'])
+        self.assertEqual(['100'], list(stream(secondsActive=-1)))  # 101 is dropped, the older 100 is not
+
+
+if __name__ == '__main__':
+    unittest.main()
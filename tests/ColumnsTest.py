@@ -0,0 +1,72 @@
+import twitter
+from twitter.Columns import Categorical, TextColumn, RaggedColumn
+
+import json
+import numpy as np
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, HEADERS, readTestData
+
+
+class ColumnsTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = twitter.TwitterAPI('xxx')
+        self.responses = responses.RequestsMock()
+        self.responses.start()
+        self.addCleanup(self.responses.stop)
+        self.addCleanup(self.responses.reset)
+
+    def testTweetColumnsMatchTweets(self):
+        data = json.loads(readTestData('user_time_line_mentions_with_expansions.json'))['data']
+        columns = twitter.TweetColumns.fromDicts(data)
+        self.assertEqual(len(data), len(columns))
+        for i, tweetDict in enumerate(data):
+            tweet = twitter.Tweet.createFromDict(tweetDict)
+            self.assertEqual(int(tweet.id), columns.id[i])
+            self.assertEqual(int(tweet.author_id), columns.author_id[i])
+            self.assertEqual(tweet.like_count, columns.like_count[i])
+            self.assertEqual(tweet.lang, columns.lang[i])
+            self.assertEqual(tweet.text, columns.text[i])
+            self.assertEqual([h['tag'] for h in tweet.hashtags], columns.hashtags[i])
+            self.assertEqual([m.username for m in tweet.mentions], columns.mentions[i])
+            self.assertEqual(np.datetime64(tweet.created_at.rstrip('Z'), 'ms'), columns.created_at[i])
+        self.assertEqual(sum(t['public_metrics']['retweet_count'] for t in data), columns.retweet_count.sum())
+
+    def testConcatenateMergesCategories(self):
+        first = Categorical.fromValues(['en', 'de', None])
+        second = Categorical.fromValues(['fr', 'en'])
+        merged = Categorical.concatenate([first, second])
+        self.assertEqual(['en', 'de', None, 'fr', 'en'], [merged[i] for i in range(len(merged))])
+        self.assertEqual({'en': 2, 'de': 1, 'fr': 1}, merged.counts())
+        texts = TextColumn.concatenate([TextColumn.fromValues(['a', 'äö']), TextColumn.fromValues(['', '🐍'])])
+        self.assertEqual(['a', 'äö', '', '🐍'], [texts[i] for i in range(len(texts))])
+        rows = RaggedColumn.concatenate([RaggedColumn.fromValues([['x'], []]), RaggedColumn.fromValues([['y', 'x']])])
+        self.assertEqual([['x'], [], ['y', 'x']], [rows[i] for i in range(len(rows))])
+        self.assertEqual(0, len(twitter.TweetColumns.concatenate([])))
+
+    def testTimelineAsColumns(self):
+        self.responses.add(GET, url=URL, body=readTestData('user_time_line_with_expansion_morePages_1_2.json'),
+                           headers=HEADERS)
+        self.responses.add(GET, url=URL, body=readTestData('user_time_line_with_expansion_morePages_2_2.json'),
+                           headers=HEADERS)
+        tweetCount = self.api.apiRateLimit.tweetCount
+        tweets = self.api.getUserTweetTimeline(userId='30436279', withExpansion=True, asColumns=True)
+        self.assertIsInstance(tweets, twitter.TweetColumns)
+        self.assertEqual(200, len(tweets))
+        self.assertEqual(np.int64, tweets.id.dtype)
+        self.assertEqual(tweetCount + 200, self.api.apiRateLimit.tweetCount)
+
+    def testFollowersAsColumns(self):
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_with_expansion.json'),
+                           headers=HEADERS)
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages2_2_w1000_with_expansion.json'),
+                           headers=HEADERS)
+        user = twitter.TwitterUser(id='30436279', followers_count=96936, following_count=1150)
+        followers = self.api.getFollowers(user=user, numPages=2, asColumns=True)
+        self.assertIsInstance(followers, twitter.UserColumns)
+        self.assertEqual(2000, len(followers))
+        self.assertEqual(2000, len(followers.username))
+        self.assertTrue((followers.followers_count >= 0).all())
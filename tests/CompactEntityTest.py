@@ -0,0 +1,69 @@
+import twitter
+from twitter.RealWorldEntity import RealWorldEntity
+
+import pickle
+import unittest
+
+
+class CompactEntityTest(unittest.TestCase):
+
+    def testKnownFieldsAreStoredInSlots(self):
+        tweet = twitter.Tweet.createFromDict({'id': '1', 'text': 'hello', 'author_id': '2', 'lang': 'en'})
+        user = twitter.TwitterUser(id='2', username='jack')
+        self.assertEqual('hello', tweet.text)
+        self.assertEqual('jack', user.username)
+        self.assertEqual({}, tweet.__dict__)
+        self.assertEqual({}, user.__dict__)
+
+    def testContainersAreCreatedOnFirstAccess(self):
+        tweet = twitter.Tweet(id='1')
+        self.assertIsNone(tweet._media)
+        self.assertEqual([], tweet.media)
+        tweet.media.append('media')
+        self.assertEqual(['media'], tweet._media)
+        user = twitter.TwitterUser(id='2')
+        follower = twitter.TwitterUser(id='3')
+        user.saveSingleFollower(follower)
+        self.assertIs(follower, user.followers['3'])
+        self.assertIsNone(user._friends)
+
+    def testUnknownFieldsAreAccepted(self):
+        tweet = twitter.Tweet.createFromDict({'id': '1', 'text': 'hi', 'edit_history_tweet_ids': ['1']})
+        self.assertEqual(['1'], tweet.edit_history_tweet_ids)
+        place = twitter.Place.createFromDict({'id': '01a9a39529b27f36', 'full_name': 'Manhattan, NY'})
+        self.assertEqual('01a9a39529b27f36', place.linkWithTweet())
+        rwEntity = RealWorldEntity().createFromDictContextAnnotations(
+            {'domain': {'id': '10', 'name': 'Person'}, 'entity': {'id': '20', 'name': 'Jack'}})
+        self.assertEqual('Person', rwEntity.domainName)
+
+    def testPickle(self):
+        tweet = twitter.TwitterEntities.Retweet(id='1', text='hi', lang='en', polls=['poll'])
+        tweet.hashtags.append({'tag': 'python'})
+        copy = pickle.loads(pickle.dumps(tweet))
+        self.assertIsInstance(copy, twitter.TwitterEntities.Retweet)
+        self.assertEqual('hi', copy.text)
+        self.assertEqual(['poll'], copy.polls)
+        self.assertEqual([{'tag': 'python'}], copy.hashtags)
+
+    def testRegisteredTweetType(self):
+        class CompactRetweet(twitter.TwitterEntities.Retweet):
+            __slots__ = ()
+
+        twitter.registerTweetType("retweeted", CompactRetweet)
+        self.addCleanup(twitter.registerTweetType, "retweeted", twitter.TwitterEntities.Retweet)
+        data = {'id': '1', 'text': 'RT', 'referenced_tweets': [{'type': 'retweeted', 'id': '2'}]}
+        self.assertIsInstance(twitter.Tweet.createFromDict(data), CompactRetweet)
+        self.assertIsInstance(twitter.Tweet.createFromDict(data, lazy=True), CompactRetweet)
+        data['referenced_tweets'][0]['type'] = 'quoted'
+        self.assertIsInstance(twitter.Tweet.createFromDict(data), twitter.TwitterEntities.QuotedRetweet)
+
+    def testRegisteredExpansionType(self):
+        class Annotation(twitter.Place):
+            __slots__ = ()
+
+        twitter.registerExpansionType('places', Annotation)
+        self.addCleanup(twitter.registerExpansionType, 'places', twitter.Place)
+        page = twitter.Page(body={'includes': {'places': [{'id': 'p1'}], 'polls': [{'id': 'o1', 'options': []}]}})
+        expansions = twitter.ExpansionIndex.fromPage(page)
+        self.assertIsInstance(expansions.places['p1'], Annotation)
+        self.assertIsInstance(expansions.polls['o1'], twitter.Poll)
@@ -0,0 +1,81 @@
+import twitter
+
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, HEADERS, readTestData
+
+
+class EntityCacheTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        userDict = json.loads(readTestData('user_without_expansion.json'))['data']
+        self.users = {str(i): dict(userDict, id=str(i), username=f"User{i}") for i in range(1000, 1200)}
+
+    def _usersCallback(self, request):
+        requested = parse_qs(urlparse(request.url).query)['ids'][0].split(',')
+        return 200, HEADERS, json.dumps({'data': [self.users[userId] for userId in requested]})
+
+    def testSingleLookupsAreCached(self):
+        api = twitter.TwitterAPI('xxx', entityCache=True)
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_without_expansion.json'), headers=HEADERS)
+            user = api.getUserById(userId='30436279', withExpansion=False)
+            self.assertIs(user, api.getUserById(userId=30436279, withExpansion=False))
+            self.assertIs(user, api.getUserByUsername(userName=user.username.upper(), withExpansion=False))
+            self.assertEqual(1, len(rsps.calls))
+        self.assertEqual(2, api.entityCache.hits)
+        self.assertEqual(1, api.entityCache.misses)
+
+    def testOnlyMissesAreRequested(self):
+        api = twitter.TwitterAPI('xxx', entityCache=twitter.EntityCache())
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._usersCallback)
+            first = api.getUsersByIds(userIds=list(self.users)[:50], withExpansion=False)
+            users = api.getUsersByIds(userIds=list(self.users), withExpansion=False)
+            self.assertEqual(3, len(rsps.calls))  # 50, then 150 in batches of 100 and 50
+            requested = [parse_qs(urlparse(call.request.url).query)['ids'][0].split(',') for call in rsps.calls[1:]]
+            self.assertEqual(set(list(self.users)[50:]), set(requested[0] + requested[1]))
+        self.assertEqual(list(self.users), [user.id for user in users])
+        self.assertIs(first[0], users[0])
+
+    def testExpiryAndSize(self):
+        cache = twitter.EntityCache(maxSize=10, ttl=0.05)
+        users = [twitter.TwitterUser.createFromDict(userDict) for userDict in self.users.values()]
+        for user in users[:20]:
+            cache.put(user)
+        self.assertEqual(10, len(cache))
+        self.assertIsNone(cache.get(twitter.TwitterUser, users[0].id))
+        self.assertIsNone(cache.getByUsername(users[0].username))
+        self.assertIs(users[19], cache.getByUsername(users[19].username.lower()))
+        self.assertIsNone(cache.get(twitter.Tweet, users[19].id))  # ids of different types don't collide
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(twitter.TwitterUser, users[19].id))
+
+    def testConcurrentAccess(self):
+        cache = twitter.EntityCache(maxSize=50)
+        users = [twitter.TwitterUser.createFromDict(userDict) for userDict in self.users.values()]
+        barrier = threading.Barrier(8)
+
+        def work(offset):
+            barrier.wait()
+            for user in users[offset::8]:
+                cache.put(user)
+                cache.get(twitter.TwitterUser, user.id)
+                cache.getByUsername(user.username)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(8)))
+        self.assertEqual(50, len(cache))
+        self.assertEqual(400, cache.hits + cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
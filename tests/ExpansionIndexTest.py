@@ -0,0 +1,72 @@
+import twitter
+
+import json
+import unittest
+
+from ApiTestCase import readTestData
+
+
+class ExpansionIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.page = twitter.Page(body={
+            'data': [
+                {'id': '10', 'text': 'two photos', 'author_id': '1',
+                 'attachments': {'media_keys': ['3_1', '3_2'], 'poll_ids': ['7']}, 'geo': {'place_id': 'p'}},
+                {'id': '11', 'text': '@second', 'author_id': '1', 'in_reply_to_user_id': '2',
+                 'entities': {'mentions': [{'start': 0, 'end': 7, 'username': 'second'}]},
+                 'referenced_tweets': [{'type': 'replied_to', 'id': '10'}, {'type': 'quoted', 'id': '2'}]},
+            ],
+            'includes': {
+                'users': [{'id': '1', 'username': 'first'}, {'id': '2', 'username': 'second'}],
+                'tweets': [{'id': '2', 'text': 'same id as a user', 'author_id': '2'}],
+                'media': [{'media_key': '3_1', 'type': 'photo'}, {'media_key': '3_2', 'type': 'photo'}],
+                'polls': [{'id': '7', 'options': [{'position': 1, 'label': 'yes', 'votes': 1}]}],
+                'places': [{'id': 'p', 'full_name': 'Zürich'}],
+            }})
+
+    def linkPage(self):
+        expansions = twitter.ExpansionIndex.fromPage(self.page)
+        return [expansions.link(twitter.Tweet.createFromDict(tweetDict)) for tweetDict in self.page.data]
+
+    def testAllReferencesAreLinked(self):
+        photos, reply = self.linkPage()
+        self.assertEqual(['3_1', '3_2'], [media.media_key for media in photos.media])
+        self.assertEqual('7', photos.polls[0].id)
+        self.assertEqual('Zürich', photos.places[0].full_name)
+        self.assertEqual(['first'], [user.username for user in photos.users])
+        self.assertEqual(['first', 'second'], [user.username for user in reply.users])  # mentioned and replied to
+
+    def testIdsOfDifferentTypesDoNotCollide(self):
+        photos, reply = self.linkPage()
+        quoted = reply.tweets[0]
+        self.assertIsInstance(quoted, twitter.Tweet)
+        self.assertEqual('same id as a user', quoted.text)
+        self.assertEqual('second', quoted.users[0].username)  # included tweets are linked as well
+
+    def testInstancesAreSharedWithinAPage(self):
+        photos, reply = self.linkPage()
+        self.assertIs(photos.users[0], reply.users[0])
+
+    def testTweetsWithExpansions(self):
+        page = twitter.Page(body=json.loads(readTestData('tweets_withExpansions.json')))
+        expansions = twitter.ExpansionIndex.fromPage(page)
+        tweets = {t['id']: expansions.link(twitter.Tweet.createFromDict(t)) for t in page.data}
+        self.assertEqual("m_ashcroft", tweets["1216144745619165184"].users[0].username)
+        self.assertEqual(0, len(tweets["1216144745619165184"].media))
+        self.assertEqual(1, len(tweets["1267631648910139392"].media))
+        self.assertEqual('1182383506602647552', tweets["1216144745619165184"].tweets[0].id)
+
+    def testUnknownIncludesAreKeptAsTheyAre(self):
+        self.page.body['includes']['topics'] = [{'id': 't1', 'name': 'news'}]
+        expansions = twitter.ExpansionIndex.fromPage(self.page)
+        self.assertEqual({'t1': {'id': 't1', 'name': 'news'}}, expansions.other['topics'])
+        self.assertEqual('7', expansions.link(twitter.Tweet.createFromDict(self.page.data[0])).polls[0].id)
+
+    def testMergeAccumulatesPollsAndPlaces(self):
+        photos, _ = self.linkPage()
+        resighted = twitter.Tweet.createFromDict({'id': '10', 'text': 'two photos'})
+        resighted.polls.append(twitter.Poll(id='8'))
+        photos.merge(resighted)
+        self.assertEqual(['7', '8'], [poll.id for poll in photos.polls])
+        self.assertEqual('Zürich', photos.places[0].full_name)
@@ -0,0 +1,75 @@
+import twitter
+
+import gc
+import json
+import unittest
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, HEADERS, readTestData
+
+
+class IdentityMapTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = json.loads(readTestData('followers_1page_w1000_with_expansion.json'))['data']
+
+    def testSameUserAcrossCallsIsOneInstance(self):
+        api = twitter.TwitterAPI('xxx', identityMap=True)
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_with_expansion.json'), headers=HEADERS)
+            rsps.add(GET, url=URL, body=readTestData('user_with_expansion.json'), headers=HEADERS)
+            first = api.getUserById(userId='2244994945')
+            second = api.getUserById(userId='2244994945')
+        self.assertIs(first, second)
+        self.assertEqual(1, len(first.tweets))
+        pinnedTweet = next(iter(first.tweets.values()))
+        self.assertIs(pinnedTweet, api.identityMap.get(twitter.Tweet, pinnedTweet.id))
+        self.assertEqual(2, api.identityMap.hits)
+
+    def testWithoutIdentityMapInstancesAreDistinct(self):
+        api = twitter.TwitterAPI('xxx')
+        self.assertIsNone(api.identityMap)
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_with_expansion.json'), headers=HEADERS)
+            rsps.add(GET, url=URL, body=readTestData('user_with_expansion.json'), headers=HEADERS)
+            first = api.getUserById(userId='2244994945')
+            second = api.getUserById(userId='2244994945')
+        self.assertIsNot(first, second)
+
+    def testFieldsOfLaterSightingAreMerged(self):
+        identityMap = twitter.IdentityMap()
+        userDict = next(dict(u) for u in self.users if 'location' in u)
+        user = identityMap.resolve(twitter.TwitterUser.createFromDict(userDict))
+        user.followers['1'] = 'follower'
+        updated = dict(userDict, description='updated', public_metrics=dict(userDict['public_metrics'],
+                                                                              followers_count=12345))
+        del updated['location']
+        later = twitter.TwitterUser.createFromDict(updated, lazy=True)
+        later.followers['2'] = 'follower'
+        self.assertIs(user, identityMap.resolve(later))
+        self.assertEqual('updated', user.description)
+        self.assertEqual(12345, user.followers_count)
+        self.assertEqual(userDict.get('location'), user.location)  # not part of the later response, hence kept
+        self.assertEqual({'1', '2'}, set(user.followers))
+
+    def testPinnedTweetStaysPinned(self):
+        identityMap = twitter.IdentityMap()
+        tweetDict = json.loads(readTestData('user_with_expansion.json'))['includes']['tweets'][0]
+        pinned = identityMap.resolve(twitter.Tweet.createFromDict(tweetDict, pinned=True))
+        self.assertIs(pinned, identityMap.resolve(twitter.Tweet.createFromDict(tweetDict)))
+        self.assertTrue(pinned.pinned)
+
+    def testMapIsBoundedAndWeak(self):
+        identityMap = twitter.IdentityMap(maxSize=10)
+        for userDict in self.users[:50]:
+            identityMap.resolve(twitter.TwitterUser.createFromDict(userDict))
+        gc.collect()
+        self.assertEqual(10, len(identityMap))  # only the most recent ones are kept alive
+        self.assertIsNotNone(identityMap.get(twitter.TwitterUser, self.users[49]['id']))
+        self.assertIsNone(identityMap.get(twitter.TwitterUser, self.users[0]['id']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import twitter
+
+import json
+from unittest import mock
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, HEADERS, readTestData
+
+
+class LazyEntityTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tweets = json.loads(readTestData('user_time_line_mentions_with_expansions.json'))['data']
+        self.users = json.loads(readTestData('followers_1page_w1000_with_expansion.json'))['data']
+
+    def testNestedFieldsAreDecodedOnFirstAccess(self):
+        tweetDict = next(t for t in self.tweets if 'mentions' in t.get('entities', {}))
+        with mock.patch('twitter.utils.encodeDecodeTwitterText', wraps=twitter.utils.encodeDecodeTwitterText) as decode:
+            tweet = twitter.Tweet.createFromDict(tweetDict, lazy=True)
+            self.assertEqual(tweetDict['id'], tweet.id)
+            self.assertEqual(tweetDict['author_id'], tweet.author_id)
+            self.assertEqual(0, decode.call_count)
+            self.assertFalse(tweet._isSet('text'))
+            self.assertEqual(tweetDict['text'], tweet.text)
+            self.assertEqual(1, decode.call_count)
+            tweet.text
+            self.assertEqual(1, decode.call_count)  # cached
+        self.assertEqual(tweetDict['entities']['mentions'][0]['username'], tweet.mentions[0].username)
+        self.assertEqual(tweetDict['public_metrics']['like_count'], tweet.like_count)
+        self.assertEqual([], tweet.media)
+        self.assertFalse(tweet.pinned)
+        self.assertFalse(tweet._isSet('polls'))  # allocated on first access
+
+    def testLazyEntitiesEqualEagerEntities(self):
+        for tweetDict in self.tweets:
+            eager = twitter.Tweet.createFromDict(tweetDict)
+            lazy = twitter.Tweet.createFromDict(tweetDict, lazy=True)
+            self.assertIs(type(eager), type(lazy))
+            for field in ['id', 'text', 'author_id', 'created_at', 'lang', 'retweet_count', 'referenced_tweets',
+                          'geo', 'urls', 'hashtags', 'users']:
+                self.assertEqual(getattr(eager, field), getattr(lazy, field), field)
+            self.assertEqual([u.id for u in eager.mentions], [u.id for u in lazy.mentions])
+        for userDict in self.users[:50]:
+            eager = twitter.TwitterUser.createFromDict(userDict)
+            lazy = twitter.TwitterUser.createFromDict(userDict, lazy=True).materialise()
+            self.assertIsNone(lazy._getRaw())
+            for field in ['id', 'username', 'description', 'followers_count', 'tweet_count', 'entities', 'location',
+                          'pinned_tweet_id', 'tweets']:
+                self.assertEqual(getattr(eager, field), getattr(lazy, field), field)
+
+    def testMaterialiseKeepsChangedAttributes(self):
+        tweet = twitter.Tweet.createFromDict(self.tweets[0], lazy=True)
+        tweet.lang = 'de'
+        tweet.users.append('user')
+        tweet.materialise()
+        self.assertEqual('de', tweet.lang)
+        self.assertEqual(['user'], tweet.users)
+        self.assertEqual(self.tweets[0]['id'], tweet.id)
+
+    def testApiCreatesLazyEntities(self):
+        api = twitter.TwitterAPI('xxx', lazyEntities=True)
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_time_line_mentions_with_expansions.json'), headers=HEADERS)
+            tweets = api.getUserMentionTimeline(userId='30436279', withExpansion=True, entriesPerPage=100)
+        del api
+        tweet = next(iter(tweets.values()))
+        self.assertIsNotNone(tweet._getRaw())
+        self.assertEqual(tweet.id, next(iter(tweets)))
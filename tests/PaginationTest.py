@@ -0,0 +1,109 @@
+import twitter
+from twitter.Error import UnsavedDataLimitExceedError
+
+import time
+from unittest import mock
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, HEADERS, readTestData
+
+
+class PaginationTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = twitter.TwitterAPI('xxx')
+        self.user = twitter.TwitterUser(id='30436279', followers_count=96936, following_count=1150)
+        self.responses = responses.RequestsMock()
+        self.responses.start()
+        self.addCleanup(self.responses.stop)
+        self.addCleanup(self.responses.reset)
+
+    def testIterFollowersYieldsEachPage(self):
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_with_expansion.json'),
+                           headers=HEADERS)
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages2_2_w1000_with_expansion.json'),
+                           headers=HEADERS)
+        pages = self.api.iterFollowers(user=self.user, numPages=2, withExpansion=True)
+        firstPage = next(pages)
+        self.assertEqual(1, len(self.responses.calls))  # second page is not requested yet
+        self.assertEqual(1000, len(firstPage))
+        self.assertIsInstance(next(iter(firstPage.values())), twitter.TwitterUser)
+        secondPage = next(pages)
+        self.assertEqual(1000, len(secondPage))
+        self.assertRaises(StopIteration, next, pages)
+
+    def testIterUserTweetTimelineStopsWithoutNextToken(self):
+        self.responses.add(GET, url=URL, body=readTestData('user_time_line_with_expansion_morePages_1_2.json'),
+                           headers=HEADERS)
+        self.responses.add(GET, url=URL, body=readTestData('user_time_line_with_expansion_morePages_2_2.json'),
+                           headers=HEADERS)
+        tweetCount = self.api.apiRateLimit.tweetCount
+        pages = list(self.api.iterUserTweetTimeline(userId='30436279', withExpansion=True))
+        self.assertEqual(2, len(pages))
+        self.assertEqual(100, len(pages[0]))
+        self.assertIsInstance(next(iter(pages[1].values())), twitter.Tweet)
+        self.assertEqual(tweetCount + 200, self.api.apiRateLimit.tweetCount)
+
+    def testGetFollowersStoresPartialResultWhenRateLimitIsFarAway(self):
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_without_expansion.json'),
+                           headers={'x-rate-limit-remaining': '0', 'x-rate-limit-reset': f'{time.time() + 1800}'})
+        self.assertRaises(UnsavedDataLimitExceedError, self.api.getFollowers, user=self.user, numPages=2,
+                          withExpansion=False)
+        self.assertEqual(1000, len(self.api.NotReturnedData.rescue()))
+
+    def testPaginatorSleepsUntilReset(self):
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_without_expansion.json'),
+                           headers={'x-rate-limit-remaining': '0', 'x-rate-limit-reset': f'{time.time() + 10}'})
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages2_2_w1000_without_expansion.json'),
+                           headers=HEADERS)
+        with mock.patch('time.sleep') as sleep:
+            followers = self.api.getFollowers(user=self.user, numPages=2, withExpansion=False)
+        self.assertEqual(2000, len(followers))
+        self.assertAlmostEqual(10, sleep.call_args[0][0], delta=1)
+
+    def testPaginatorWaitsAsLongAsMaxRateLimitWait(self):
+        for maxRateLimitWait, resetIn in ((120, 60), (5, 10)):
+            api = twitter.TwitterAPI('xxx', maxRateLimitWait=maxRateLimitWait)
+            exhausted = {'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(time.time() + resetIn)}
+            self.responses.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_without_expansion.json'),
+                               headers=exhausted)
+            self.responses.add(GET, url=URL, body=readTestData('followers_2pages2_2_w1000_without_expansion.json'),
+                               headers=HEADERS)
+            with mock.patch('time.sleep') as sleep:
+                pages = api.iterFollowers(user=self.user, numPages=2, withExpansion=False)
+                next(pages)
+                if resetIn < maxRateLimitWait:
+                    self.assertEqual(1000, len(next(pages)))
+                    self.assertAlmostEqual(resetIn, sleep.call_args[0][0], delta=1)
+                else:
+                    self.assertRaises(UnsavedDataLimitExceedError, next, pages)
+                    sleep.assert_not_called()
+            self.responses.reset()
+
+    def testPaginatorHooksAndMetrics(self):
+        self.responses.add(GET, url=URL, body=readTestData('user_time_line_mentions_with_expansions_morePages_1_2.json'),
+                           headers=HEADERS)
+        self.responses.add(GET, url=URL, body=readTestData('user_time_line_mentions_with_expansions_morePages_2_2.json'),
+                           headers=HEADERS)
+        seenTokens = []
+        paginator = self.api.iterUserMentionTimeline(userId='30436279', entriesPerPage=100)
+        paginator.addHook(lambda pages, response, page: seenTokens.append(pages.nextToken))
+        paginator.maxPages = 2
+        for page in paginator:
+            pass
+        self.assertEqual(2, paginator.pagesDone)
+        self.assertEqual(200, paginator.entitiesReceived)
+        self.assertEqual('7140dibdnow9c7btw3z21an5n3b3d6p9dcerlvzhsxd87', seenTokens[0])
+        self.assertEqual(10, self.api.apiRateLimit.RequestsLeft_GET_Users_mentions)
+
+    def testEachPageIsDecodedOnce(self):
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages1_2_w1000_with_expansion.json'),
+                           headers=HEADERS)
+        self.responses.add(GET, url=URL, body=readTestData('followers_2pages2_2_w1000_with_expansion.json'),
+                           headers=HEADERS)
+        with mock.patch('twitter.utils.loadJson', wraps=twitter.utils.loadJson) as loadJson:
+            followers = self.api.getFollowers(user=self.user, numPages=2, withExpansion=True)
+        self.assertEqual(2000, len(followers))
+        self.assertEqual(2, loadJson.call_count)
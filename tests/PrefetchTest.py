@@ -0,0 +1,76 @@
+import twitter
+
+import itertools
+import json
+import re
+import threading
+import time
+import unittest
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, readTestData
+
+TIMELINE = re.compile(r"https://api.twitter.com/2/users/\d+/tweets.*")
+
+
+class PrefetchTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = twitter.TwitterAPI('xxx', prefetchPages=True)
+        self.tweet = json.loads(readTestData('tweets_withoutExpansions.json'))['data'][0]
+        self.ids = itertools.count(1)
+        self.requests = 0
+        self.requested = threading.Event()
+        self.remaining = 100
+
+    def _pages(self, request):
+        # every page has 10 tweets and a next_token
+        self.requests += 1
+        self.requested.set()
+        tweets = [dict(self.tweet, id=str(next(self.ids))) for _ in range(10)]
+        headers = {'x-rate-limit-remaining': str(self.remaining), 'x-rate-limit-reset': str(time.time() + 900)}
+        return 200, headers, json.dumps({'data': tweets, 'meta': {'result_count': 10, 'next_token': 'n'}})
+
+    def _timeline(self, maxTweets=None):
+        return self.api.iterUserTweetTimeline(userId='30436279', withExpansion=False, entriesPerPage=10,
+                                              maxTweets=maxTweets)
+
+    def testNextPageIsRequestedWhileThePageIsHandled(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=TIMELINE, callback=self._pages)
+            pages = self._timeline(maxTweets=40)
+            for _ in range(3):
+                self.requested.clear()
+                next(pages)
+                self.assertTrue(self.requested.wait(timeout=5))  # without waiting for the caller
+            next(pages)
+            self.assertRaises(StopIteration, next, pages)
+        self.assertEqual(4, self.requests)  # nothing is prefetched beyond maxTweets
+        self.assertEqual(40, self.api.apiRateLimit.tweetCount)
+        self.assertEqual(0, self.api.apiRateLimit.reservedTweets)
+
+    def testNoPrefetchWithoutRequestsLeft(self):
+        self.remaining = 0
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=TIMELINE, callback=self._pages)
+            pages = self._timeline()
+            next(pages)
+            time.sleep(0.1)
+            self.assertEqual(1, self.requests)
+            pages.close()
+
+    def testPrefetchedPageIsCountedWhenThePaginationIsClosed(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=TIMELINE, callback=self._pages)
+            pages = self._timeline()
+            next(pages)
+            pages.close()
+        self.assertEqual(2, self.requests)
+        self.assertEqual(20, self.api.apiRateLimit.tweetCount)
+        self.assertEqual(0, self.api.apiRateLimit.reservedTweets)
+
+
+if __name__ == '__main__':
+    unittest.main()
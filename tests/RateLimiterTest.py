@@ -0,0 +1,121 @@
+import twitter
+from twitter.Error import LimitExceedError
+from twitter.RateLimiter import RateLimiter
+
+import asyncio
+import json
+import time
+import unittest
+from unittest import mock
+import responses
+from responses import GET, POST
+
+from ApiTestCase import ApiTestCase, URL, readTestData
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def testDefaultsDependOnAuthContext(self):
+        self.assertEqual(300, RateLimiter().requestsLeft("GET_User_byId"))
+        self.assertEqual(900, RateLimiter(authContext="user").requestsLeft("GET_User_byId"))
+        self.assertRaises(ValueError, RateLimiter, authContext="bot")
+
+    def testHeadersUpdateTheBucket(self):
+        limiter = RateLimiter()
+        reset = time.time() + 600
+        limiter.acquire("GET_Users_Followers")
+        limiter.acquire("GET_Users_Followers")  # two requests in flight
+        limiter.update("GET_Users_Followers", {'x-rate-limit-limit': '15', 'x-rate-limit-remaining': '13',
+                                               'x-rate-limit-reset': str(reset)}, acquired=True)
+        bucket = limiter.bucket("GET_Users_Followers")
+        self.assertEqual(12, bucket.remaining)  # the second request is not counted by the server yet
+        self.assertEqual(reset, bucket.reset)
+        limiter.update("GET_Users_Followers", {'x-rate-limit-remaining': '12', 'x-rate-limit-reset': str(reset)},
+                       acquired=True)
+        self.assertEqual(12, bucket.remaining)
+        self.assertEqual(0, bucket.inFlight)
+
+    def testAcquireWaitsUntilReset(self):
+        limiter = RateLimiter()
+        limiter.update("GET_Users_Followers", {'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(time.time() + 20)})
+        with mock.patch('time.sleep') as sleep:
+            waited = limiter.acquire("GET_Users_Followers", maxWait=60)
+        self.assertAlmostEqual(20, sleep.call_args[0][0], delta=1)
+        self.assertAlmostEqual(20, waited, delta=1)
+        self.assertEqual(14, limiter.requestsLeft("GET_Users_Followers"))  # new window
+        limiter.update("GET_Users_Followers", {'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(time.time() + 20)})
+        self.assertRaises(LimitExceedError, limiter.acquire, "GET_Users_Followers", maxWait=10)
+
+    def testAcquireAsync(self):
+        limiter = RateLimiter()
+        limiter.update("GET_Tweet_byId", {'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(time.time() + 0.05)})
+        waited = asyncio.run(limiter.acquireAsync("GET_Tweet_byId"))
+        self.assertGreater(waited, 0)
+        self.assertEqual(299, limiter.requestsLeft("GET_Tweet_byId"))
+
+    def testReleaseGivesTheRequestBack(self):
+        limiter = RateLimiter()
+        limiter.acquire("GET_Tweet_byId")
+        limiter.release("GET_Tweet_byId")
+        self.assertEqual(300, limiter.requestsLeft("GET_Tweet_byId"))
+        self.assertEqual(0, limiter.bucket("GET_Tweet_byId").inFlight)
+
+
+class RateLimitedRequestTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+    def testRequestWaitsForResetInsteadOfFailing(self):
+        api = twitter.TwitterAPI('xxx')
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_without_expansion.json'),
+                     headers={'x-rate-limit-limit': '300', 'x-rate-limit-remaining': '0',
+                              'x-rate-limit-reset': str(time.time() + 30)})
+            rsps.add(GET, url=URL, body=readTestData('user_without_expansion.json'),
+                     headers={'x-rate-limit-limit': '300', 'x-rate-limit-remaining': '299',
+                              'x-rate-limit-reset': str(time.time() + 930)})
+            api.getUserById(userId='30436279', withExpansion=False)
+            self.assertEqual(0, api.apiRateLimit.RequestsLeft_GET_User_byId)
+            with mock.patch('time.sleep') as sleep:
+                api.getUserById(userId='30436279', withExpansion=False)
+        self.assertAlmostEqual(30, sleep.call_args[0][0], delta=1)
+        self.assertEqual(299, api.apiRateLimit.RequestsLeft_GET_User_byId)
+
+    def testRequestFailsIfResetIsTooFarAway(self):
+        api = twitter.TwitterAPI('xxx', maxRateLimitWait=0)
+        api.apiRateLimit.RequestsLeft_GET_User_byId = 0
+        api.apiRateLimit.ResetTime_GET_User_byId = time.time() + 30
+        with responses.RequestsMock(assert_all_requests_are_fired=False):
+            self.assertRaises(LimitExceedError, api.getUserById, userId='30436279')
+
+    def testStreamConnectionsAreTakenFromTheBucketOfTheStream(self):
+        api = twitter.TwitterAPI('xxx')
+        tweet = json.dumps({'data': {'id': '1', 'text': 'hello'}})
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=tweet + "\r\n",
+                     headers={'x-rate-limit-remaining': '7', 'x-rate-limit-reset': str(time.time() + 900)})
+            tweets = api.getTweetsFromSampleStream(withExpansion=False, secondsActive=-1)
+        self.assertEqual(['1'], list(tweets))
+        self.assertEqual(7, api.apiRateLimit.RequestsLeft_GET_Tweets_SampleStream)
+        self.assertEqual(50, api.apiRateLimit.RequestsLeft_GET_Tweets_SearchStream)
+
+        api.apiRateLimit.RequestsLeft_GET_Tweets_SampleStream = 0
+        api.apiRateLimit.ResetTime_GET_Tweets_SampleStream = time.time() + 30
+        with responses.RequestsMock(assert_all_requests_are_fired=False):
+            self.assertRaises(LimitExceedError, api.getTweetsFromSampleStream, secondsActive=10)
+
+    def testDeletedRulesUpdateTheBucketOfDeleteRules(self):
+        api = twitter.TwitterAPI('xxx')
+        reset = time.time() + 300
+        with responses.RequestsMock() as rsps:
+            rsps.add(POST, url=URL, json={'meta': {'summary': {'deleted': 1}}},
+                     headers={'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(reset)})
+            api.deleteRulesForFilteredStream(['1'])
+        self.assertEqual(0, api.apiRateLimit.RequestsLeft_Post_Delete_Rules)
+        self.assertAlmostEqual(reset, api.apiRateLimit.ResetTime_Post_Delete_Rules, delta=1)
+        self.assertEqual(450, api.apiRateLimit.RequestsLeft_Post_Add_Rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import twitter
+from twitter.ResponseCache import endpointOf
+
+import json
+import os
+import time
+import unittest
+from urllib.parse import urlparse, parse_qs
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, readTestData
+
+
+class ResponseCacheTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = twitter.ResponseCache(os.path.join(self.tmpDir, 'cache.sqlite'))
+        self.addCleanup(self.cache.close)
+        self.api = twitter.TwitterAPI('xxx', responseCache=self.cache)
+
+    def testRepeatedRequestIsServedFromCache(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_with_expansion.json'),
+                     headers={'x-rate-limit-remaining': '41', 'x-rate-limit-reset': '0'})
+            first = self.api.getUserById(userId='30436279')
+            second = self.api.getUserById(userId='30436279')
+            self.assertEqual(1, len(rsps.calls))
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(len(first.tweets), len(second.tweets))
+        self.assertEqual(41, self.api.apiRateLimit.RequestsLeft_GET_User_byId)  # not touched by the cached response
+        self.assertEqual(1, self.cache.hits)
+
+    def testRefreshAndBypass(self):
+        with responses.RequestsMock() as rsps:
+            for _ in range(3):
+                rsps.add(GET, url=URL, body=readTestData('user_without_expansion.json'),
+                         headers={'x-rate-limit-remaining': '41', 'x-rate-limit-reset': '0'})
+            with self.cache.bypass():
+                self.api.getUserById(userId='30436279', withExpansion=False)
+            self.assertEqual(0, len(self.cache))
+            self.api.getUserById(userId='30436279', withExpansion=False)
+            with self.cache.refresh():
+                self.api.getUserById(userId='30436279', withExpansion=False)
+            self.api.getUserById(userId='30436279', withExpansion=False)
+            self.assertEqual(3, len(rsps.calls))
+        self.assertEqual(1, len(self.cache))
+
+    def testRefreshReachesEveryBatchOfBulkLookups(self):
+        user = json.loads(readTestData('user_without_expansion.json'))['data']
+        tweet = json.loads(readTestData('tweets_withoutExpansions.json'))['data'][0]
+        userIds = [str(i) for i in range(1000, 1150)]  # two requests of at most 100 ids
+        tweetIds = [str(i) for i in range(5000, 5150)]
+        names = {}
+
+        def lookup(request):
+            ids = parse_qs(urlparse(request.url).query)['ids'][0].split(',')
+            entity = user if 'users' in request.url else tweet
+            data = [dict(entity, id=id, **({'name': names[id]} if id in names else {})) for id in ids]
+            return 200, {'x-rate-limit-remaining': '41', 'x-rate-limit-reset': '0'}, json.dumps({'data': data})
+
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=lookup)
+            self.api.getUsersByIds(userIds=userIds, withExpansion=False)
+            self.api.getTweets(tweetIds=tweetIds, withExpansion=False)
+            self.assertEqual(4, len(rsps.calls))
+            names.update({id: "renamed" for id in userIds})
+            with self.cache.refresh():
+                users = self.api.getUsersByIds(userIds=userIds, withExpansion=False)
+                self.api.getTweets(tweetIds=tweetIds, withExpansion=False)
+            self.assertEqual(8, len(rsps.calls))
+            self.assertEqual({"renamed"}, {user.name for user in users})
+            self.assertEqual({"renamed"}, {user.name for user in self.api.getUsersByIds(userIds=userIds,
+                                                                                        withExpansion=False)})
+            self.assertEqual(8, len(rsps.calls))  # the refreshed responses are cached
+
+    def testCachedPagesDontCountTowardsTweetCap(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_time_line_with_expansion_1page.json'),
+                     headers={'x-rate-limit-remaining': '41', 'x-rate-limit-reset': '0'})
+            tweets = self.api.getUserTweetTimeline(userId='30436279')
+            tweetCount = self.api.apiRateLimit.tweetCount
+            self.assertEqual(tweets.keys(), self.api.getUserTweetTimeline(userId='30436279').keys())
+        self.assertEqual(tweetCount, self.api.apiRateLimit.tweetCount)
+
+    def testTtlAndEndpoints(self):
+        self.assertEqual('users/:id/followers', endpointOf('users/30436279/followers'))
+        self.assertEqual('users/by/username/:username', endpointOf('users/by/username/TwitterDev'))
+        cache = twitter.ResponseCache(':memory:', ttls={'users/:id': 0.05})
+        cache.put('users/1', {'user.fields': 'id'}, b'{"data": {"id": "1"}}', {'x-rate-limit-remaining': '3'})
+        cache.put('tweets/search/stream/rules', None, b'{}')  # not cached
+        page = cache.get('users/1', {'user.fields': 'id'})
+        self.assertTrue(page.fromCache)
+        self.assertEqual({}, page.headers)
+        self.assertEqual(1, len(cache))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('users/1', {'user.fields': 'id'}))
+
+    def testLeastRecentlyUsedResponsesAreEvicted(self):
+        cache = twitter.ResponseCache(':memory:', maxSize=1000)
+        body = b'{"data": "' + b'x' * 180 + b'"}'
+        for i in range(10):
+            cache.put(f"users/{i}", None, body)
+            cache.get('users/0')  # keeps users/0 recently used
+        self.assertLessEqual(cache.size, 1000)
+        self.assertIsNotNone(cache.get('users/0'))
+        self.assertIsNone(cache.get('users/1'))
+        self.assertIsNotNone(cache.get('users/9'))
+
+
+if __name__ == '__main__':
+    unittest.main()
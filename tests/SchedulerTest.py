@@ -0,0 +1,83 @@
+import twitter
+from twitter.Error import DeadlineExceededError
+from twitter.Paginator import Paginator
+
+import json
+import re
+import time
+import unittest
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, readTestData
+
+URL = re.compile(r"https://api.twitter.com/2/users/\d+\?.*")  # user by id, not its timelines
+MENTIONS = re.compile(r"https://api.twitter.com/2/users/\d+/mentions.*")
+HEADERS = {'x-rate-limit-remaining': '100', 'x-rate-limit-reset': str(time.time() + 900)}
+
+
+class SchedulerTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = twitter.TwitterAPI('xxx')
+        self.user = readTestData('user_without_expansion.json')
+        self.page = json.dumps({'data': [json.loads(self.user)['data']], 'meta': {'result_count': 1, 'next_token': 'n'}})
+        self.requested = []
+
+    def _mentions(self, onFirstPage=None):
+        def callback(request):
+            self.requested.append('mentions')
+            if len(self.requested) == 1 and onFirstPage is not None:
+                onFirstPage()
+            return 200, HEADERS, self.page
+        return callback
+
+    def _user(self, request):
+        self.requested.append('user')
+        return 200, HEADERS, self.user
+
+    def _paginator(self, maxPages):
+        return Paginator(self.api, "users/30436279/mentions", {}, "GET_Users_mentions", lambda page: page.data,
+                         maxPages=maxPages)
+
+    def testUrgentJobRunsBetweenPages(self):
+        futures = []
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=MENTIONS, callback=self._mentions(
+                lambda: futures.append(scheduler.submit(self.api.getUserById, userId='30436279', withExpansion=False,
+                                                        rateLimitName="GET_User_byId"))))
+            rsps.add_callback(GET, url=URL, callback=self._user)
+            with twitter.Scheduler(self.api, maxConcurrency=1) as scheduler:
+                backfill = scheduler.submitPages(self._paginator(maxPages=4))
+                self.assertEqual(4, len(backfill.result(timeout=5)))
+        self.assertEqual('30436279', futures[0].result().id)
+        self.assertEqual(['mentions', 'user', 'mentions', 'mentions', 'mentions'], self.requested)
+
+    def testExhaustedEndpointDoesNotBlockOthers(self):
+        self.api.apiRateLimit.updateFromHeaders("GET_Users_mentions", {'x-rate-limit-remaining': '0',
+                                                                       'x-rate-limit-reset': str(time.time() + 600)})
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._user)
+            with twitter.Scheduler(self.api, maxConcurrency=1) as scheduler:
+                blocked = scheduler.submitPages(self._paginator(maxPages=2), priority=twitter.Scheduler.INTERACTIVE,
+                                                deadline=0.2)
+                user = scheduler.submit(self.api.getUserById, userId='30436279', withExpansion=False,
+                                        rateLimitName="GET_User_byId", priority=twitter.Scheduler.BACKGROUND)
+                self.assertEqual('30436279', user.result(timeout=5).id)
+                self.assertRaises(DeadlineExceededError, blocked.result, timeout=5)
+        self.assertEqual(['user'], self.requested)
+
+
+    def testPagesWaitForTheEndpointOfThePaginator(self):
+        self.api.apiRateLimit.updateFromHeaders("GET_Users_mentions", {'x-rate-limit-remaining': '0',
+                                                                       'x-rate-limit-reset': str(time.time() + 600)})
+        with twitter.Scheduler(self.api, maxConcurrency=1) as scheduler:
+            mentions = scheduler.submitPages(self.api.iterUserMentionTimeline(userId='30436279', maxTweets=10),
+                                             rateLimitName="GET_User_byId", deadline=0.2)
+            self.assertRaisesRegex(DeadlineExceededError, "GET_Users_mentions", mentions.result, timeout=5)
+        self.assertEqual([], self.requested)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import twitter
+from twitter.Error import LimitExceedError
+from twitter.SharedState import SharedRateLimiter
+
+import multiprocessing
+import os
+import time
+import unittest
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, readTestData
+
+def acquireAll(path):
+    # worker process: takes requests until the shared bucket is empty
+    limiter = SharedRateLimiter(twitter.SharedState(path), scope="token")
+    acquired = 0
+    try:
+        while True:
+            limiter.acquire("GET_Users_Followers", maxWait=0)
+            acquired += 1
+    except LimitExceedError:
+        return acquired
+
+
+def countTweets(path):
+    state = twitter.SharedState(path)
+    for _ in range(50):
+        state.addTweets("tweetCap", 2)
+
+
+class SharedStateTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmpDir, 'state.sqlite')
+
+    def testClientsShareTheBucketsOfAToken(self):
+        first = twitter.TwitterAPI('xxx', sharedState=twitter.SharedState(self.path))
+        second = twitter.TwitterAPI('xxx', sharedState=twitter.SharedState(self.path))
+        other = twitter.TwitterAPI('yyy', sharedState=twitter.SharedState(self.path))
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=URL, body=readTestData('user_without_expansion.json'),
+                     headers={'x-rate-limit-remaining': '41', 'x-rate-limit-reset': str(time.time() + 900)})
+            first.getUserById(userId='30436279', withExpansion=False)
+        self.assertEqual(41, second.apiRateLimit.RequestsLeft_GET_User_byId)
+        self.assertEqual(300, other.apiRateLimit.RequestsLeft_GET_User_byId)  # buckets are per token
+        second.apiRateLimit.RequestsLeft_GET_User_byId = 0
+        self.assertEqual(0, first.apiRateLimit.getRequestsLeft("GET_User_byId"))
+
+    def testProcessesDontExceedTheBudget(self):
+        twitter.SharedState(self.path)  # create the database before the workers race for it
+        with multiprocessing.Pool(4) as pool:
+            acquired = pool.map(acquireAll, [self.path] * 4)
+        self.assertEqual(15, sum(acquired))
+        self.assertEqual(0, SharedRateLimiter(twitter.SharedState(self.path), scope="token")
+                         .requestsLeft("GET_Users_Followers"))
+
+    def testTweetCountIsShared(self):
+        state = twitter.SharedState(self.path)
+        rateLimit = twitter.TwitterAPI('xxx', sharedState=state).apiRateLimit
+        with multiprocessing.Pool(4) as pool:
+            pool.map(countTweets, [self.path] * 4)
+        self.assertEqual(400, state.tweetCount("tweetCap", 0, rateLimit.tweetCapResetDate)[0])
+        rateLimit.countTowardsTweetCap(5)
+        self.assertEqual(405, rateLimit.tweetCount)
+        self.assertEqual(405, twitter.TwitterAPI('zzz', sharedState=state).apiRateLimit.tweetCount)
+
+    def testReservationsAreShared(self):
+        first = twitter.TwitterAPI('xxx', tweetCap=1000, sharedState=twitter.SharedState(self.path)).apiRateLimit
+        second = twitter.TwitterAPI('xxx', tweetCap=1000, sharedState=twitter.SharedState(self.path)).apiRateLimit
+        self.assertEqual(900, first.reserve(900))
+        self.assertEqual(100, second.reserve(900))  # the reservation of the other instance is taken into account
+        self.assertEqual(0, second.remainingTweets)
+        first.countTowardsTweetCap(900, reserved=900)
+        second.release(100)
+        self.assertEqual(900, second.tweetCount)  # counted by the other instance
+        self.assertEqual(100, second.remainingTweets)
+        self.assertEqual(100, second.reserve(900))
+        self.assertRaises(twitter.Error.TweetCapExceedingError, first.reserve, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import twitter
+from twitter.Error import LimitExceedError, TweetCapExceedingError
+from twitter.Paginator import Paginator
+
+import json
+import os
+import time
+import unittest
+from unittest import mock
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, readTestData
+
+
+class TokenPoolTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.requestsLeft = {'tokenA': 3, 'tokenB': 10, 'tokenC': 5}
+        self.usedTokens = []
+
+    def _callback(self, body):
+        def callback(request):
+            token = request.headers['Authorization'][len("Bearer "):]
+            self.usedTokens.append(token)
+            self.requestsLeft[token] -= 1
+            return 200, {'x-rate-limit-remaining': str(self.requestsLeft[token]),
+                         'x-rate-limit-reset': str(time.time() + 900)}, body
+        return callback
+
+    def _pool(self, rateLimitName):
+        pool = twitter.TokenPool(['tokenA', 'tokenB', 'tokenC'])
+        for credential in pool.credentials:
+            credential.limiter.setRequestsLeft(rateLimitName, self.requestsLeft[credential.bearerToken])
+        return pool
+
+    def testRequestsGoToTheTokenWithMostHeadroom(self):
+        api = twitter.TwitterAPI(self._pool("GET_User_byId"))
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._callback(readTestData('user_without_expansion.json')))
+            for _ in range(8):
+                api.getUserById(userId='30436279', withExpansion=False)
+        self.assertEqual(['tokenB'] * 5, self.usedTokens[:5])  # until B has no more left than C
+        self.assertEqual(3, self.requestsLeft['tokenA'])  # then B and C take turns
+        self.assertLessEqual(abs(self.requestsLeft['tokenB'] - self.requestsLeft['tokenC']), 1)
+        self.assertEqual(10, api.tokenPool.requestsLeft("GET_User_byId"))
+
+    def testWaitsForTheFirstResetIfAllTokensAreExhausted(self):
+        pool = twitter.TokenPool(['tokenA', 'tokenB'])
+        for offset, credential in zip((60, 20), pool.credentials):
+            credential.limiter.update("GET_Users_Followers", {'x-rate-limit-remaining': '0',
+                                                              'x-rate-limit-reset': str(time.time() + offset)})
+        with mock.patch('time.sleep') as sleep:
+            credential, waited = pool.acquire("GET_Users_Followers", maxWait=30)
+        self.assertIs(pool.credentials[1], credential)
+        self.assertAlmostEqual(20, sleep.call_args[0][0], delta=1)
+        pool.credentials[1].limiter.update("GET_Users_Followers", {'x-rate-limit-remaining': '0',
+                                                                   'x-rate-limit-reset': str(time.time() + 40)})
+        self.assertRaises(LimitExceedError, pool.acquire, "GET_Users_Followers", maxWait=30)
+
+    def testPaginationStaysOnTheTokenOfTheFirstPage(self):
+        api = twitter.TwitterAPI(self._pool("GET_Tweets_byUser"))
+        page = json.loads(readTestData('user_without_expansion.json'))
+        body = json.dumps({'data': [page['data']], 'meta': {'result_count': 1, 'next_token': 'next'}})
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._callback(body))
+            paginator = Paginator(api, "users/30436279/tweets", {}, "GET_Tweets_byUser", lambda page: page.data,
+                                  maxPages=8, countsTowardsTweetCap=True)
+            self.assertEqual(8, len(list(paginator)))
+        self.assertEqual(['tokenB'] * 8, self.usedTokens)  # although C has more left after the 6th page
+        self.assertEqual(8, api.tokenPool.credentials[1].tweetCount)
+        self.assertEqual(0, api.tokenPool.credentials[2].tweetCount)
+        self.assertEqual(3 * 500_000, api.apiRateLimit.tweetCap)
+
+    def testPaginationSkipsTokensWithoutTweetCapLeft(self):
+        pool = self._pool("GET_Tweets_byUser")
+        pool.credentials[0].tweetCount = 500_000
+        pool.credentials[1].tweetCount = 500_000  # B has the most requests left but no tweets
+        pool.credentials[2].tweetCount = 500_000 - 3
+        api = twitter.TwitterAPI(pool)
+        page = json.loads(readTestData('user_without_expansion.json'))
+        body = json.dumps({'data': [page['data']], 'meta': {'result_count': 1, 'next_token': 'next'}})
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=URL, callback=self._callback(body))
+            paginator = Paginator(api, "users/30436279/tweets", {}, "GET_Tweets_byUser", lambda page: page.data,
+                                  maxPages=3, countsTowardsTweetCap=True)
+            self.assertEqual(3, len(list(paginator)))  # the cap of C is used up by the third page
+        self.assertEqual(['tokenC'] * 3, self.usedTokens)
+        self.assertEqual(0, pool.credentials[2].remainingTweets)
+        self.assertEqual(0, pool.credentials[2].reservedTweets)
+        self.assertRaises(TweetCapExceedingError, pool.choose, "GET_Tweets_byUser")
+
+    def testTweetCountOfEachTokenIsKept(self):
+        pool = twitter.TokenPool(['tokenA', 'tokenB'], tweetCapLog='tweetCapLog.jsonl')
+        pool.credentials[0].countTowardsTweetCap(12)
+        pool.credentials[1].countTowardsTweetCap(5)
+        pool = twitter.TokenPool(['tokenA', 'tokenB'], tweetCapLog='tweetCapLog.jsonl')
+        self.assertEqual([12, 5], [credential.tweetCount for credential in pool.credentials])
+
+        state = twitter.SharedState(os.path.join(os.getcwd(), 'state.sqlite'))
+        self.addCleanup(state.close)
+        twitter.TokenPool(['tokenA', 'tokenB'], sharedState=state).credentials[1].countTowardsTweetCap(7)
+        pool = twitter.TokenPool(['tokenA', 'tokenB'], sharedState=state)
+        self.assertEqual([0, 7], [credential.tweetCount for credential in pool.credentials])
+
+    def testSingleTokenIsAPoolOfOne(self):
+        api = twitter.TwitterAPI('xxx')
+        self.assertEqual(1, len(api.tokenPool))
+        self.assertIs(api.apiRateLimit.limiter, api.tokenPool.primary.limiter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import twitter
+
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, URL, readTestData
+
+HEADERS = {'x-rate-limit-remaining': '299', 'x-rate-limit-reset': '0'}
+
+
+class TransportTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.transport = twitter.Transport(poolSize=4, connectTimeout=1, readTimeout=2)
+        self.api = twitter.TwitterAPI('xxx', transport=self.transport)
+        self.responses = responses.RequestsMock()
+        self.responses.start()
+        self.addCleanup(self.responses.stop)
+        self.addCleanup(self.responses.reset)
+
+    def testDefaultTransportIsCreated(self):
+        api = twitter.TwitterAPI('xxx')
+        self.assertIsInstance(api._transport, twitter.Transport)
+
+    def testSessionIsReused(self):
+        data = readTestData('user_without_expansion.json')
+        self.responses.add(GET, url=URL, body=data, headers=HEADERS)
+        self.responses.add(GET, url=URL, body=data, headers=HEADERS)
+        session = self.transport.session
+        self.api.getUserById(userId=30436279, withExpansion=False)
+        self.api.getUserByUsername(userName="AliAbdaal", withExpansion=False)
+        self.assertIs(session, self.api._transport.session)
+        self.assertEqual(2, len(self.responses.calls))
+
+    def testGzipIsNegotiated(self):
+        data = readTestData('user_without_expansion.json')
+        self.responses.add(GET, url=URL, body=data, headers=HEADERS)
+        self.api.getUserById(userId=30436279, withExpansion=False)
+        self.assertIn('gzip', self.responses.calls[0].request.headers['Accept-Encoding'])
+        self.assertEqual('Bearer xxx', self.responses.calls[0].request.headers['Authorization'])
+
+    def testPoolSizeAndTimeout(self):
+        adapter = self.transport.session.get_adapter("https://api.twitter.com/2/")
+        self.assertEqual(4, adapter._pool_maxsize)
+        self.assertEqual((1, 2), self.transport.timeout)
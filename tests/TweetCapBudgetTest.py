@@ -0,0 +1,103 @@
+import twitter
+from twitter.Error import TweetCapExceedingError
+
+import itertools
+import json
+import re
+import unittest
+from urllib.parse import urlparse, parse_qs
+import responses
+from responses import GET
+
+from ApiTestCase import ApiTestCase, readTestData
+
+TIMELINE = re.compile(r"https://api.twitter.com/2/users/\d+/tweets.*")
+SEARCH = re.compile(r"https://api.twitter.com/2/tweets/search/recent.*")
+COUNTS = re.compile(r"https://api.twitter.com/2/tweets/counts/recent.*")
+HEADERS = {'x-rate-limit-remaining': '100', 'x-rate-limit-reset': '0'}
+
+
+class TweetCapBudgetTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.api = twitter.TwitterAPI('xxx')
+        self.tweet = json.loads(readTestData('tweets_withoutExpansions.json'))['data'][0]
+        self.ids = itertools.count(1)
+        self.maxResults = []
+        self.reservedDuringRequest = []
+
+    def _pages(self, request):
+        # every page is full and has a next_token
+        maxResults = int(parse_qs(urlparse(request.url).query)['max_results'][0])
+        self.maxResults.append(maxResults)
+        self.reservedDuringRequest.append(self.api.apiRateLimit.reservedTweets)
+        tweets = [dict(self.tweet, id=str(next(self.ids))) for _ in range(maxResults)]
+        return 200, HEADERS, json.dumps({'data': tweets, 'meta': {'result_count': maxResults, 'next_token': 'n'}})
+
+    def testRemainingTweetsIsUpToDate(self):
+        rateLimit = self.api.apiRateLimit
+        rateLimit.countTowardsTweetCap(rateLimit.tweetCap - rateLimit.tweetCount - 5)
+        self.assertEqual(5, rateLimit.remainingTweets)
+        self.assertEqual(5, rateLimit.reserve(100))
+        self.assertEqual(0, rateLimit.remainingTweets)
+        self.assertRaises(TweetCapExceedingError, self.api.iterUserTweetTimeline, userId='30436279')
+        rateLimit.release(5)
+        self.assertEqual(5, rateLimit.remainingTweets)
+
+    def testMaxTweetsStopsThePagination(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=TIMELINE, callback=self._pages)
+            tweets = self.api.getUserTweetTimeline(userId='30436279', withExpansion=False, maxTweets=150)
+        self.assertEqual(150, len(tweets))
+        self.assertEqual([100, 50], self.maxResults)  # the last page only asks for what is left
+        self.assertEqual([150, 50], self.reservedDuringRequest)
+        self.assertEqual(0, self.api.apiRateLimit.reservedTweets)
+        self.assertEqual(150, self.api.apiRateLimit.tweetCount)
+
+    def testPageBeyondMaxTweetsIsTrimmed(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=TIMELINE, callback=self._pages)
+            pages = list(self.api.iterUserTweetTimeline(userId='30436279', withExpansion=False, maxTweets=105))
+        self.assertEqual([100, 10], self.maxResults)  # 10 is the minimum of max_results
+        self.assertEqual([100, 5], [len(page) for page in pages])
+        self.assertEqual(105, self.api.apiRateLimit.tweetCount)
+        self.assertEqual(105, self.api.tokenPool.primary.tweetCount)
+        self.assertEqual(0, self.api.apiRateLimit.reservedTweets)
+
+    def testUnusedReservationIsReleased(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=TIMELINE, callback=self._pages)
+            pages = self.api.iterUserTweetTimeline(userId='30436279', withExpansion=False)
+            self.assertEqual(3200, pages.estimatedTweets)
+            next(pages)
+            self.assertEqual(3100, self.api.apiRateLimit.reservedTweets)
+            pages.close()
+        self.assertEqual(0, self.api.apiRateLimit.reservedTweets)
+        self.assertEqual(self.api.apiRateLimit.tweetCap - 100, self.api.apiRateLimit.remainingTweets)
+
+    def testTweetCapStopsThePaginationMidFlight(self):
+        rateLimit = self.api.apiRateLimit
+        rateLimit.countTowardsTweetCap(rateLimit.tweetCap - rateLimit.tweetCount - 150)
+        with responses.RequestsMock() as rsps:
+            rsps.add_callback(GET, url=TIMELINE, callback=self._pages)
+            self.assertRaises(TweetCapExceedingError, self.api.getUserTweetTimeline, userId='30436279',
+                              withExpansion=False)
+        self.assertEqual([100, 50], self.maxResults)
+        self.assertEqual(150, len(self.api.NotReturnedData.rescue()))
+        self.assertEqual(0, rateLimit.remainingTweets)
+
+    def testSearchReservesTheCountedTweets(self):
+        with responses.RequestsMock() as rsps:
+            rsps.add(GET, url=COUNTS, body=json.dumps({'data': [], 'meta': {'total_tweet_count': 42}}), headers=HEADERS)
+            rsps.add_callback(GET, url=SEARCH, callback=self._pages)
+            pages = self.api.iterRecentTweetsFromSearch(searchQuery="#python", withExpansion=False,
+                                                        entriesPerPage=10, countFirst=True)
+            self.assertEqual(42, pages.estimatedTweets)
+            self.assertEqual(10, len(next(pages)))
+            self.assertEqual(32, self.api.apiRateLimit.reservedTweets)
+            pages.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
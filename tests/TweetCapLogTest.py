@@ -0,0 +1,59 @@
+import twitter
+
+import datetime
+import json
+import os
+import unittest
+
+from ApiTestCase import ApiTestCase
+
+
+class TweetCapLogTest(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.resetDate = datetime.datetime.today().replace(hour=0, minute=0, second=0, microsecond=0) \
+            + datetime.timedelta(days=10)
+
+    def testLoadReturnsTheLastRecord(self):
+        log = twitter.TweetCapLog()
+        self.assertIsNone(log.load())
+        log.append(10, self.resetDate)
+        log.append(25, self.resetDate)
+        self.assertEqual((25, self.resetDate), log.load())
+        with open(log.path, 'a') as f:
+            f.write('{"logDate":"2021-')  # a process was killed while writing
+        self.assertEqual((25, self.resetDate), log.load())
+
+    def testLogIsCompacted(self):
+        log = twitter.TweetCapLog(maxSize=500)
+        for tweetCount in range(100):
+            log.append(tweetCount, self.resetDate)
+        self.assertLessEqual(os.path.getsize(log.path), 500)
+        self.assertEqual((99, self.resetDate), log.load())
+
+    def testLegacyLogIsMigrated(self):
+        with open('tweetCapLog.json', 'w') as f:
+            json.dump({"data": [{"logDate": "2021-01-01", "tweetCount": 7,
+                                 "ResetDate": self.resetDate.strftime('%Y-%m-%d')}]}, f)
+        rateLimit = twitter.TwitterAPI('xxx').apiRateLimit
+        self.assertEqual(7, rateLimit.tweetCount)
+        self.assertEqual((7, self.resetDate), twitter.TweetCapLog().load())
+
+        with open('tweetCapLog.json', 'w') as f:
+            f.write('{"data": [{"logDate"')  # rewritten at exit and cut off
+        os.remove('tweetCapLog.jsonl')
+        self.assertEqual(0, twitter.TwitterAPI('xxx').apiRateLimit.tweetCount)
+
+    def testCountIsKeptWithoutExitHook(self):
+        rateLimit = twitter.TwitterAPI('xxx', tweetCount=100).apiRateLimit
+        rateLimit.countTowardsTweetCap(50)
+        self.assertEqual(150, twitter.TwitterAPI('xxx', tweetCount=0).apiRateLimit.tweetCount)
+        self.assertEqual(0, twitter.TwitterAPI('xxx', tweetCapLog=None).apiRateLimit.tweetCount)
+
+    def testProgressBarIsOptional(self):
+        self.assertIsNone(twitter.TwitterAPI('xxx', showProgress=False).apiRateLimit.progress)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import twitter.utils as utils
+
+import unittest
+
+
+class EncodeDecodeTwitterTextTest(unittest.TestCase):
+
+    def testTextWithoutSurrogatesIsReturnedAsIs(self):
+        for text in ['plain ascii', 'Zürich 🐍', '']:
+            self.assertIs(text, utils.encodeDecodeTwitterText(text))
+
+    def testSurrogatePairsAreJoined(self):
+        self.assertEqual('hi \U0001f600!', utils.encodeDecodeTwitterText('hi \ud83d\ude00!'))
+        self.assertEqual('é \U0001f600', utils.encodeDecodeTwitterText('é \ud83d\ude00'))
+
+    def testLoneSurrogateRaises(self):
+        self.assertRaises(UnicodeDecodeError, utils.encodeDecodeTwitterText, 'broken \ud83d')
+
+    def testBatch(self):
+        texts = ['a', None, 'hi \ud83d\ude00', 'Zürich']
+        self.assertEqual(['a', None, 'hi \U0001f600', 'Zürich'], utils.encodeDecodeTwitterTexts(texts))
+        self.assertRaises(UnicodeDecodeError, utils.encodeDecodeTwitterTexts, ['broken \ud83d'])
@@ -1,8 +1,12 @@
-import time
+import sys
+import threading
+import uuid
 import datetime
 from dateutil.relativedelta import relativedelta
-import json
-from tqdm import tqdm
+
+from twitter.Error import TweetCapExceedingError
+from twitter.RateLimiter import RateLimiter
+from twitter.TweetCapLog import TweetCapLog
 
 
 # function that evals the function and updates the correct field below?
@@ -13,130 +17,193 @@ class APIRateLimit(object):
     This class is used to have stored data on the standings of the request towards the different limits
     such that the different functions that interact with the different endpoints don't have to return additional data
     """
-    def __init__(self, tweetCap, tweetCount, tweetCapResetDate):
+    def __init__(self, tweetCap, tweetCount, tweetCapResetDate, authContext="app", limiter=None, sharedState=None,
+                 tweetCapLog='tweetCapLog.jsonl', showProgress=None):
+        """
+        please specify tweetCapResetDate according to the format "%Y-%m-%d", so e.g. '2021-01-30'
+        :param tweetCount: tweets already retrieved in the current month, only used if the log has no record yet
+        :param tweetCapResetDate: next reset of the Tweet cap, only used if the log has no record yet
+        :param authContext: "app" or "user", see RateLimiter
+        :param limiter: RateLimiter to use instead of a new one, e.g. the one of the first token of a TokenPool
+        :param sharedState: SharedState that holds the Tweet count of all processes, the log only provides the initial
+                            count and is not written
+        :param tweetCapLog: TweetCapLog (or the path of its file) in which every change of the Tweet count is recorded,
+                            None keeps the count in memory only
+        :param showProgress: if True, the Tweet count is shown as a progress bar (tqdm), by default only if stderr is
+                             a terminal
+        """
+        self.sharedState = sharedState
+        # RequestsLeft_<endpoint> and ResetTime_<endpoint> are read from and written to the buckets of the limiter
+        self.limiter = limiter if limiter is not None else RateLimiter(authContext=authContext)
         self.today = datetime.datetime.today()
         self.tweetCap = tweetCap
-        self.progress = tqdm(total=self.tweetCap)
-
-        try:
+        self._lock = threading.Lock()  # the counters are shared by the worker threads of AsyncTwitterAPI
+        self.reservedTweets = 0  # reserved by running paginations of this instance but not received yet
+        self._owner = uuid.uuid4().hex  # key of the reservations of this instance in the sharedState
+        if isinstance(tweetCapLog, str):
+            tweetCapLog = TweetCapLog(tweetCapLog)
+        self.tweetCapLog = tweetCapLog
+
+        record = self.tweetCapLog.load() if self.tweetCapLog is not None else None
+        if record is not None:
             # continue with the tweetCount at which the program last terminated
-            with open('tweetCapLog.json', 'r') as f:
-                self.tweetCapData = json.load(fp=f)
-                mostRecentLog = self.tweetCapData['data'][-1]
-                self.tweetCount = mostRecentLog['tweetCount']
-                self.progress.update(self.tweetCount)
-                self.tweetCapResetDate = datetime.datetime.strptime(mostRecentLog['ResetDate'], '%Y-%m-%d')
-                if self.tweetCapResetDate < self.today:
-                    self.progress = tqdm(total=self.tweetCap)  # reset progress bar
-                    self.tweetCount = 0  # reset counter
-                    self.tweetCapResetDate = self.tweetCapResetDate + relativedelta(months=1)  # new reset date
-                f.close()
-        except FileNotFoundError:
-            if tweetCount is None and tweetCapResetDate is None:
-                # write new tweetCap file with no user defined input,
-                # just 30 days from now is the reset date and 0 tweets have been made with the dev account is assumed
+            self.tweetCount, self.tweetCapResetDate = record
+        else:
+            # no user defined input: 0 tweets have been retrieved with the dev account and the reset is in a month
+            self.tweetCount = tweetCount if tweetCount is not None else 0
+            if tweetCapResetDate is None:
                 self.tweetCapResetDate = self.today + relativedelta(months=1)
-                self.tweetCount = 0
-                self.tweetCapData = {"data": [{"logDate": self.today.strftime('%Y-%m-%d'), "tweetCount": self.tweetCount,
-                                     "ResetDate": self.tweetCapResetDate.strftime('%Y-%m-%d')}]}
             else:
-                # write new tweetCap file with user specified reset date and tweet count
-                # if the user already used the API and his account before using this application
-
-                try:  # check for formatting
-                    datetime.datetime.strptime(self.tweetCapResetDate, '%Y-%m-%d')
-                except ValueError:
-                    # don't accept any other format atm
-                    print("Please specify tweetCapResetDate according to the format '%Y-%m-%d', so for example: '2021.01.30' ")
-                if tweetCount is None:
-                    self.tweetCount = 0
-                else:
-                    self.tweetCount = tweetCount
-                if tweetCapResetDate is None:
-                    self.tweetCapResetDate = self.today + relativedelta(months=1)
-                else:
-                    self.tweetCapResetDate = tweetCapResetDate
-                    if self.tweetCapResetDate < self.today:
-                        self.progress = tqdm(total=self.tweetCap)
-                        self.tweetCount = 0
-                        self.tweetCapResetDate = self.tweetCapResetDate + relativedelta(months=1)
-                self.tweetCapData = {"data": [{"date": self.today.strftime('%Y-%m-%d'), "tweetCount": self.tweetCount,
-                                     "ResetDate": self.tweetCapResetDate}]}
-
-            f = open('tweetCapLog.json', 'w')
-            json.dump(obj=self.tweetCapData, fp=f)
-            f.close()
-
-        self.remainingTweets = self.tweetCap - self.tweetCount
-
-        self.RequestsLeft_GET_Tweets_SearchStream = 50  # number of connections to stream
-        self.RequestsLeft_GET_Rules_RulesSearchStream = 450
-        self.RequestsLeft_GET_Users_LikingUsers = 75  # 100 users per request (if so many exists)
-        self.RequestsLeft_GET_Tweets_LikedTweets = 75  # 100 users per request (if so many exists)
-        self.RequestsLeft_GET_Users_RetweetedBy = 75
-        self.RequestsLeft_GET_Tweets_SampleStream = 50  # number of connections to stream
-        self.RequestsLeft_GET_Tweets_SearchRecent = 450
-        self.RequestsLeft_GET_Users_mentions = 450
-        self.RequestsLeft_GET_Tweets_byUser = 1500
-        self.RequestsLeft_GET_TweetCounts_recent = 300
-        self.RequestsLeft_GET_Tweet_byId = 300
-        self.RequestsLeft_GET_Tweets_byIds = 300
-        self.RequestsLeft_GET_Users_Followers = 15  # get max 15 pages of 1000
-        self.RequestsLeft_GET_Users_Friends = 15  # get max 15 pages of 1000
-        self.RequestsLeft_GET_User_byId = 300
-        self.RequestsLeft_GET_Users_byIds = 300
-        self.RequestsLeft_GET_User_byName = 300
-        self.RequestsLeft_GET_Users_byNames = 300
-        self.RequestsLeft_Post_Add_Rules = 450
-        self.RequestsLeft_Post_Delete_Rules = 450
-        self.RequestsLeft_Get_Rules = 450
-
-        self._startTime = time.time()
-        self.ResetTime_GET_Tweets_SearchStream = self._startTime
-        self.ResetTime_GET_Rules_RulesSearchStream = self._startTime
-        self.ResetTime_GET_Users_LikingUsers = self._startTime
-        self.ResetTime_GET_Tweets_LikedTweets = self._startTime
-        self.ResetTime_GET_Users_RetweetedBy = self._startTime
-        self.ResetTime_GET_Tweets_SampleStream = self._startTime
-        self.ResetTime_GET_Tweets_SearchRecent = self._startTime
-        self.ResetTime_GET_Users_mentions = self._startTime
-        self.ResetTime_GET_Tweets_byUser = self._startTime
-        self.ResetTime_GET_TweetCounts_recent = self._startTime
-        self.ResetTime_GET_Tweet_byId = self._startTime
-        self.ResetTime_GET_Tweets_byIds = self._startTime
-        self.ResetTime_GET_Users_Followers = self._startTime
-        self.ResetTime_GET_Users_Friends = self._startTime
-        self.ResetTime_GET_User_byId = self._startTime
-        self.ResetTime_GET_Users_byIds = self._startTime
-        self.ResetTime_GET_User_byName = self._startTime
-        self.ResetTime_GET_Users_byNames = self._startTime
-        self.ResetTime_Post_Add_Rules = self._startTime
-        self.ResetTime_Get_Delete_Rules = self._startTime
-        self.ResetTime_Get_Rules = self._startTime
-
-    def __del__(self):
-        # write to tweetCap logging file
-        self.today = datetime.datetime.today()  # doesn't need to be the same day as the program started
-        newLog = {"logDate": self.today.strftime('%Y-%m-%d'), "tweetCount": self.tweetCount,
-                  "ResetDate": self.tweetCapResetDate}
-        self.tweetCapData['data'].append(newLog)
-
-        f = open('tweetCapLog.json', 'w')
-        json.dump(obj=self.tweetCapData, fp=f)
-        f.close()
+                self.tweetCapResetDate = self._parseDate(tweetCapResetDate)
+
+        if sharedState is not None:
+            self.tweetCount, self.tweetCapResetDate = sharedState.tweetCount("tweetCap", self.tweetCount,
+                                                                             self.tweetCapResetDate)
+        else:
+            self.resetTime()
+            if self.tweetCapLog is not None and record != (self.tweetCount, self.tweetCapResetDate):
+                self.tweetCapLog.append(self.tweetCount, self.tweetCapResetDate)
+
+        self.progress = None
+        if showProgress or (showProgress is None and sys.stderr.isatty()):
+            from tqdm import tqdm  # only needed for interactive use
+            self.progress = tqdm(total=self.tweetCap, initial=self.tweetCount)
+
+    @staticmethod
+    def _parseDate(date):
+        if isinstance(date, datetime.datetime):
+            return date
+        try:
+            return datetime.datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError("Please specify tweetCapResetDate according to the format '%Y-%m-%d', "
+                             "so for example: '2021-01-30'")
+
+    def _updateProgress(self):
+        # caller holds self._lock
+        if self.progress is not None:
+            self.progress.update(self.tweetCount - self.progress.n)
+
+    @property
+    def remainingTweets(self):
+        """
+        tweets left in the Tweet cap of the current month, without the ones reserved by running paginations
+        (of all processes with a sharedState)
+        """
+        if self.sharedState is not None:
+            self.tweetCount, self.tweetCapResetDate, reserved = self.sharedState.tweetCapUsage("tweetCap")
+            return max(0, self.tweetCap - self.tweetCount - reserved)
+        return max(0, self.tweetCap - self.tweetCount - self.reservedTweets)
+
+    def __getattr__(self, name):
+        # only called for attributes that are not set, i.e. RequestsLeft_* and ResetTime_*
+        if name.startswith('RequestsLeft_'):
+            return self.limiter.requestsLeft(name[len('RequestsLeft_'):])
+        if name.startswith('ResetTime_'):
+            return self.limiter.resetTime(name[len('ResetTime_'):])
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('RequestsLeft_'):
+            self.limiter.setRequestsLeft(name[len('RequestsLeft_'):], value)
+        elif name.startswith('ResetTime_'):
+            self.limiter.setResetTime(name[len('ResetTime_'):], value)
+        else:
+            object.__setattr__(self, name, value)
+
+    def getRequestsLeft(self, rateLimitName):
+        """
+        :param rateLimitName: suffix of the RequestsLeft_* attribute, e.g. "GET_Users_Followers"
+        """
+        return self.limiter.requestsLeft(rateLimitName)
+
+    def getResetTime(self, rateLimitName):
+        """
+        :param rateLimitName: suffix of the ResetTime_* attribute, e.g. "GET_Users_Followers"
+        """
+        return self.limiter.resetTime(rateLimitName)
+
+    def acquire(self, rateLimitName, maxWait=None):
+        """
+        takes one request of the endpoint, waits until the rate limit window is reset if none is left
+        :param rateLimitName: suffix of the RequestsLeft_* attribute, e.g. "GET_Users_Followers"
+        :param maxWait: seconds to wait at most, LimitExceedError is raised if the reset is further away
+        :return: seconds waited
+        """
+        return self.limiter.acquire(rateLimitName, maxWait=maxWait)
+
+    def updateFromHeaders(self, rateLimitName, headers, acquired=False):
+        """
+        stores the x-rate-limit headers of a response in the bucket of the endpoint
+        :param rateLimitName: suffix of the RequestsLeft_* and ResetTime_* attributes, e.g. "GET_Users_Followers"
+        :param headers: headers of the response, responses served from the ResponseCache don't have rate limit headers
+        :param acquired: True if the request was sent after acquire(rateLimitName)
+        """
+        self.limiter.update(rateLimitName, headers, acquired=acquired)
 
     def resetTime(self):
         self.today = datetime.datetime.today()
         if self.today < self.tweetCapResetDate:
             return
-        self.progress = tqdm(total=self.tweetCap)
         self.tweetCount = 0
-        self.tweetCapResetDate = self.tweetCapResetDate + relativedelta(months=1)
-
-    def countTowardsTweetCap(self, numberOfTweetsRequested):
-        self.resetTime()
-        self.tweetCount += numberOfTweetsRequested
-        self.progress.update(numberOfTweetsRequested)
+        while self.tweetCapResetDate <= self.today:
+            self.tweetCapResetDate = self.tweetCapResetDate + relativedelta(months=1)
+        if getattr(self, 'progress', None) is not None:
+            self.progress.reset(total=self.tweetCap)
+
+    def reserve(self, numberOfTweets):
+        """
+        reserves tweets of the Tweet cap before they are requested, such that concurrent calls can't spend them too
+        :param numberOfTweets: estimated number of tweets of the call
+        :return: number of tweets reserved, less than numberOfTweets if the Tweet cap has less left
+        """
+        with self._lock:
+            if self.sharedState is not None:
+                # the count and the reservations of the other processes are read in the same transaction
+                reserved, self.tweetCount, self.tweetCapResetDate = self.sharedState.reserveTweets(
+                    "tweetCap", self._owner, numberOfTweets, self.tweetCap)
+            else:
+                self.resetTime()
+                reserved = min(numberOfTweets, self.remainingTweets)
+            if reserved <= 0:
+                raise TweetCapExceedingError("Tweet Cap exceeded. Wait until Reset Date")
+            self.reservedTweets += reserved
+            return reserved
+
+    def release(self, numberOfTweets):
+        """
+        returns the unused part of a reservation
+        """
+        with self._lock:
+            numberOfTweets = min(numberOfTweets, self.reservedTweets)
+            self.reservedTweets -= numberOfTweets
+            if self.sharedState is not None and numberOfTweets > 0:
+                self.tweetCount, self.tweetCapResetDate = self.sharedState.releaseTweets("tweetCap", self._owner,
+                                                                                         numberOfTweets)
+
+    def countTowardsTweetCap(self, numberOfTweetsRequested, reserved=0):
+        """
+        :param numberOfTweetsRequested: tweets received
+        :param reserved: how many of them were reserved before, they are taken from the reservation
+        """
+        if self.sharedState is not None:
+            with self._lock:
+                reserved = min(reserved, self.reservedTweets)
+                self.reservedTweets -= reserved
+                resetDate = self.tweetCapResetDate
+                self.tweetCount, self.tweetCapResetDate = self.sharedState.addTweets(
+                    "tweetCap", numberOfTweetsRequested, owner=self._owner, reserved=reserved)
+                if self.tweetCapResetDate != resetDate and self.progress is not None:
+                    self.progress.reset(total=self.tweetCap)
+                self._updateProgress()  # includes the tweets of other processes
+            return
+        with self._lock:
+            self.reservedTweets = max(0, self.reservedTweets - reserved)
+            self.resetTime()
+            self.tweetCount += numberOfTweetsRequested
+            if self.tweetCapLog is not None:
+                self.tweetCapLog.append(self.tweetCount, self.tweetCapResetDate)
+            self._updateProgress()
 
 
 
@@ -0,0 +1,290 @@
+import asyncio
+import concurrent.futures
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+
+from twitter.TwitterAPI import TwitterAPI
+
+
+class AsyncTwitterAPI(object):
+    """
+    asyncio counterpart of TwitterAPI, every endpoint method is a coroutine with the same parameters, the iter*
+    methods return async generators.
+    The requests are carried out by a TwitterAPI instance on a pool of worker threads, such that the entity creation
+    (Tweet.createFromDict, TwitterUser.createFromDict) and the rate limit bookkeeping in APIRateLimit are shared
+    with the blocking client and many lookups can be in flight at the same time.
+    Coroutines of a single request await the rate limit of their endpoint on the event loop (TokenPool.acquireAsync),
+    a worker thread is only occupied once the request can be sent.
+
+    desired usage:
+    async with AsyncTwitterAPI(bearer_token) as api:
+        users = await asyncio.gather(*[api.getUserById(userId) for userId in userIds])
+    """
+    def __init__(self, bearer_token=None, tweetCapResetDate=None, tweetCount=None, tweetCap=500_000,
+                 maxConcurrency=100, api=None, **kwargs):
+        """
+        :param maxConcurrency: number of requests that are in flight at the same time
+        :param api: an existing TwitterAPI instance to share, otherwise one is created with the remaining arguments
+        :param kwargs: passed on to TwitterAPI
+        """
+        if api is None:
+            kwargs.setdefault('poolSize', maxConcurrency)
+            api = TwitterAPI(bearer_token, tweetCapResetDate=tweetCapResetDate, tweetCount=tweetCount,
+                             tweetCap=tweetCap, **kwargs)
+        self.api = api
+        self._executor = ThreadPoolExecutor(max_workers=maxConcurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def apiRateLimit(self):
+        return self.api.apiRateLimit
+
+    @property
+    def NotReturnedData(self):
+        return self.api.NotReturnedData
+
+    async def _run(self, method, *args, rateLimitName=None, **kwargs):
+        """
+        carries out a blocking method of the TwitterAPI instance on the worker pool
+        :param method: bound method of self.api
+        :param rateLimitName: endpoint of the single request of the method, the request is acquired on the event loop
+                              such that waiting for the reset does not occupy a worker thread
+                              (paginations, streams and batches acquire each of their requests on their thread)
+        :return: whatever the method returns, exceptions are propagated to the awaiting coroutine
+        """
+        call = functools.partial(method, *args, **kwargs)
+        # a cached entity or response needs no request, then the method acquires on its thread if it sends one
+        if rateLimitName is None or self.api.responseCache is not None or self.api.entityCache is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, call)
+        credential, secondsWaited = await self.api.tokenPool.acquireAsync(rateLimitName,
+                                                                          maxWait=self.api.maxRateLimitWait)
+        running = self._executor.submit(self.api._withAcquired, rateLimitName, credential, secondsWaited, call)
+        try:
+            return await asyncio.wrap_future(running)
+        except asyncio.CancelledError:
+            if running.cancelled():  # the method never started
+                credential.limiter.release(rateLimitName)
+            raise
+
+    async def _iterate(self, method, *args, **kwargs):
+        """
+        creates and advances a generator of the TwitterAPI instance on the worker pool, the generator is closed when
+        the iteration ends, is left early or is cancelled (e.g. the Paginator releases its Tweet cap reservation)
+        :param method: one of the iter* methods of self.api
+        :return: async generator yielding the same pages
+        """
+        loop = asyncio.get_running_loop()
+        pages = await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+        exhausted = object()
+        advancing = None
+        try:
+            while True:
+                advancing = self._executor.submit(next, pages, exhausted)
+                page = await asyncio.wrap_future(advancing)
+                if page is exhausted:
+                    return
+                yield page
+        finally:
+            await loop.run_in_executor(self._executor, self._close, pages, advancing)
+
+    @staticmethod
+    def _close(pages, advancing):
+        if advancing is not None:
+            concurrent.futures.wait([advancing])  # a cancelled await does not stop the worker thread
+        pages.close()
+
+    async def close(self):
+        """
+        waits for the requests in flight and releases the worker pool and the pooled connections
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+        self.api.close()
+
+    async def getFollowers(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True,
+                           asColumns=False, resume=None, cache=None):
+        return await self._run(self.api.getFollowers, user=user, numPages=numPages, percentagePages=percentagePages,
+                               entriesPerPage=entriesPerPage, withExpansion=withExpansion, asColumns=asColumns,
+                               resume=resume, cache=self.api._cacheMode(cache))
+
+    def iterFollowers(self, user, numPages=None, percentagePages=None, entriesPerPage=1000,
+                      withExpansion=True, asColumns=False, resume=None, cache=None):
+        return self._iterate(self.api.iterFollowers, user=user, numPages=numPages, percentagePages=percentagePages,
+                             entriesPerPage=entriesPerPage, withExpansion=withExpansion, asColumns=asColumns,
+                             resume=resume, cache=self.api._cacheMode(cache))
+
+    def iterFriends(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True,
+                    asColumns=False, resume=None, cache=None):
+        return self._iterate(self.api.iterFriends, user=user, numPages=numPages, percentagePages=percentagePages,
+                             entriesPerPage=entriesPerPage, withExpansion=withExpansion, asColumns=asColumns,
+                             resume=resume, cache=self.api._cacheMode(cache))
+
+    async def getFriends(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True,
+                         asColumns=False, resume=None, cache=None):
+        return await self._run(self.api.getFriends, user=user, numPages=numPages, percentagePages=percentagePages,
+                               entriesPerPage=entriesPerPage, withExpansion=withExpansion, asColumns=asColumns,
+                               resume=resume, cache=self.api._cacheMode(cache))
+
+    async def getUserById(self, userId=None, withExpansion=True, cache=None):
+        cache = self.api._cacheMode(cache)  # of this task, the request is carried out on another thread
+        if self.api.batchLookups and userId:
+            cached = self.api._cachedEntity("userId", userId, cache=cache)
+            if cached is not None:
+                return cached
+            # awaits the batch without occupying a worker thread, such that a batch can collect more than
+            # maxConcurrency look-ups
+            return await asyncio.wrap_future(self.api._submitLookup("userId", userId, withExpansion=withExpansion,
+                                                                    cache=cache))
+        return await self._run(self.api.getUserById, userId=userId, withExpansion=withExpansion, cache=cache,
+                               rateLimitName="GET_User_byId")
+
+    async def getUserByUsername(self, userName=None, withExpansion=True, cache=None):
+        cache = self.api._cacheMode(cache)  # of this task, the request is carried out on another thread
+        if self.api.batchLookups and userName:
+            cached = self.api._cachedEntity("userName", userName, cache=cache)
+            if cached is not None:
+                return cached
+            return await asyncio.wrap_future(self.api._submitLookup("userName", userName,
+                                                                    withExpansion=withExpansion, cache=cache))
+        return await self._run(self.api.getUserByUsername, userName=userName, withExpansion=withExpansion,
+                               cache=cache, rateLimitName="GET_User_byName")
+
+    async def getUsersByIds(self, userIds=None, withExpansion=True, maxConcurrency=4, returnErrors=False, cache=None):
+        return await self._run(self.api.getUsersByIds, userIds=userIds, withExpansion=withExpansion,
+                               maxConcurrency=maxConcurrency, returnErrors=returnErrors,
+                               cache=self.api._cacheMode(cache))
+
+    async def getUsersByNames(self, userNames=None, withExpansion=True, maxConcurrency=4, returnErrors=False,
+                              cache=None):
+        return await self._run(self.api.getUsersByNames, userNames=userNames, withExpansion=withExpansion,
+                               maxConcurrency=maxConcurrency, returnErrors=returnErrors,
+                               cache=self.api._cacheMode(cache))
+
+    async def getLikingUsersOfTweet(self, tweetId, withExpansion=True):
+        return await self._run(self.api.getLikingUsersOfTweet, tweetId=tweetId, withExpansion=withExpansion,
+                               rateLimitName="GET_Users_LikingUsers")
+
+    async def getLikesOfUser(self, userId, withExpansion=True, entriesPerPage=100, asColumns=False, maxTweets=None,
+                             resume=None, cache=None):
+        return await self._run(self.api.getLikesOfUser, userId=userId, withExpansion=withExpansion,
+                               entriesPerPage=entriesPerPage, asColumns=asColumns, maxTweets=maxTweets, resume=resume,
+                               cache=self.api._cacheMode(cache))
+
+    def iterLikesOfUser(self, userId, withExpansion=True, entriesPerPage=100, asColumns=False, maxTweets=None,
+                        resume=None, cache=None):
+        return self._iterate(self.api.iterLikesOfUser, userId=userId, withExpansion=withExpansion,
+                             entriesPerPage=entriesPerPage, asColumns=asColumns, maxTweets=maxTweets, resume=resume,
+                             cache=self.api._cacheMode(cache))
+
+    async def getTweet(self, tweetId=None, withExpansion=True, cache=None):
+        cache = self.api._cacheMode(cache)  # of this task, the request is carried out on another thread
+        if self.api.batchLookups and tweetId:
+            cached = self.api._cachedEntity("tweetId", tweetId, cache=cache)
+            if cached is not None:
+                return cached
+            return await asyncio.wrap_future(self.api._submitLookup("tweetId", tweetId, withExpansion=withExpansion,
+                                                                    cache=cache))
+        return await self._run(self.api.getTweet, tweetId=tweetId, withExpansion=withExpansion, cache=cache,
+                               rateLimitName="GET_Tweet_byId")
+
+    async def getTweets(self, tweetIds=None, withExpansion=True, maxConcurrency=4, returnErrors=False, cache=None):
+        return await self._run(self.api.getTweets, tweetIds=tweetIds, withExpansion=withExpansion,
+                               maxConcurrency=maxConcurrency, returnErrors=returnErrors,
+                               cache=self.api._cacheMode(cache))
+
+    async def getRecentTweetsFromSearch(self, searchQuery, withExpansion, entriesPerPage=100, since_id=None,
+                                        until_id=None, start_time=None, end_time=None, asColumns=False,
+                                        maxTweets=None, countFirst=False, resume=None, cache=None):
+        return await self._run(self.api.getRecentTweetsFromSearch, searchQuery=searchQuery,
+                               withExpansion=withExpansion, entriesPerPage=entriesPerPage, since_id=since_id,
+                               until_id=until_id, start_time=start_time, end_time=end_time, asColumns=asColumns,
+                               maxTweets=maxTweets, countFirst=countFirst, resume=resume,
+                               cache=self.api._cacheMode(cache))
+
+    def iterRecentTweetsFromSearch(self, searchQuery, withExpansion, entriesPerPage=100, since_id=None,
+                                   until_id=None, start_time=None, end_time=None, asColumns=False,
+                                   maxTweets=None, countFirst=False, resume=None, cache=None):
+        # with countFirst the counts are requested before the Paginator is returned
+        return self._iterate(self.api.iterRecentTweetsFromSearch, searchQuery=searchQuery,
+                             withExpansion=withExpansion, entriesPerPage=entriesPerPage, since_id=since_id,
+                             until_id=until_id, start_time=start_time, end_time=end_time, asColumns=asColumns,
+                             maxTweets=maxTweets, countFirst=countFirst, resume=resume,
+                             cache=self.api._cacheMode(cache))
+
+    async def getRecentTweetCountsFromSearch(self, searchQuery, granularity='hour', since_id=None, until_id=None,
+                                             start_time=None, end_time=None, cache=None):
+        return await self._run(self.api.getRecentTweetCountsFromSearch, searchQuery=searchQuery,
+                               granularity=granularity, since_id=since_id, until_id=until_id, start_time=start_time,
+                               end_time=end_time, cache=self.api._cacheMode(cache),
+                               rateLimitName="GET_TweetCounts_recent")
+
+    async def getReTweeter(self, tweetId=None, withExpansion=True):
+        return await self._run(self.api.getReTweeter, tweetId=tweetId, withExpansion=withExpansion,
+                               rateLimitName="GET_Users_RetweetedBy")
+
+    async def getUserTweetTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
+                                   excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None,
+                                   end_time=None, start_time=None, asColumns=False, maxTweets=None, resume=None,
+                                   cache=None):
+        return await self._run(self.api.getUserTweetTimeline, userId=userId, userName=userName,
+                               withExpansion=withExpansion, entriesPerPage=entriesPerPage,
+                               excludeRetweet=excludeRetweet, excludeReplies=excludeReplies, since_id=since_id,
+                               until_id=until_id, end_time=end_time, start_time=start_time, asColumns=asColumns,
+                               maxTweets=maxTweets, resume=resume, cache=self.api._cacheMode(cache))
+
+    def iterUserTweetTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
+                              excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None,
+                              end_time=None, start_time=None, asColumns=False, maxTweets=None, resume=None,
+                              cache=None):
+        return self._iterate(self.api.iterUserTweetTimeline, userId=userId, userName=userName,
+                             withExpansion=withExpansion, entriesPerPage=entriesPerPage, excludeRetweet=excludeRetweet,
+                             excludeReplies=excludeReplies, since_id=since_id, until_id=until_id, end_time=end_time,
+                             start_time=start_time, asColumns=asColumns, maxTweets=maxTweets, resume=resume,
+                             cache=self.api._cacheMode(cache))
+
+    async def getUserMentionTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
+                                     excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None,
+                                     end_time=None, start_time=None, asColumns=False, maxTweets=None, resume=None,
+                                     cache=None):
+        return await self._run(self.api.getUserMentionTimeline, userId=userId, userName=userName,
+                               withExpansion=withExpansion, entriesPerPage=entriesPerPage,
+                               excludeRetweet=excludeRetweet, excludeReplies=excludeReplies, since_id=since_id,
+                               until_id=until_id, end_time=end_time, start_time=start_time, asColumns=asColumns,
+                               maxTweets=maxTweets, resume=resume, cache=self.api._cacheMode(cache))
+
+    def iterUserMentionTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
+                                excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None,
+                                end_time=None, start_time=None, asColumns=False, maxTweets=None, resume=None,
+                                cache=None):
+        return self._iterate(self.api.iterUserMentionTimeline, userId=userId, userName=userName,
+                             withExpansion=withExpansion, entriesPerPage=entriesPerPage, excludeRetweet=excludeRetweet,
+                             excludeReplies=excludeReplies, since_id=since_id, until_id=until_id, end_time=end_time,
+                             start_time=start_time, asColumns=asColumns, maxTweets=maxTweets, resume=resume,
+                             cache=self.api._cacheMode(cache))
+
+    async def getTweetsFromFilteredStream(self, withExpansion=True, secondsActive=600, timeout=10, resume=None):
+        return await self._run(self.api.getTweetsFromFilteredStream, withExpansion=withExpansion,
+                               secondsActive=secondsActive, timeout=timeout, resume=resume)
+
+    async def getTweetsFromSampleStream(self, withExpansion=True, secondsActive=600, timeout=10, resume=None):
+        return await self._run(self.api.getTweetsFromSampleStream, withExpansion=withExpansion,
+                               secondsActive=secondsActive, timeout=timeout, resume=resume)
+
+    async def addRulesForFilteredStream(self, rule, ruleName):
+        return await self._run(self.api.addRulesForFilteredStream, rule=rule, ruleName=ruleName)
+
+    async def deleteRulesForFilteredStream(self, ids):
+        return await self._run(self.api.deleteRulesForFilteredStream, ids=ids)
+
+    async def getRulesForFilteredStream(self):
+        return await self._run(self.api.getRulesForFilteredStream)
+
+    async def deleteAllRulesForFilteredStream(self):
+        return await self._run(self.api.deleteAllRulesForFilteredStream)
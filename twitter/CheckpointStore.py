@@ -0,0 +1,123 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+
+
+class CheckpointStore(object):
+    """
+    This class keeps the progress of paginations and streams in a SQLite database, such that a call that was aborted
+    (rate limit reset too far away, Tweet cap, crash) continues where it stopped instead of requesting the first page
+    again. A checkpoint is stored under the name given as resume= after every page the caller handled, the checkpoint
+    of a pagination is deleted once its last page is received.
+
+    desired usage:
+    api = TwitterAPI(bearer_token, checkpointStore=CheckpointStore('/var/tmp/twitterCheckpoints.sqlite'))
+    try:
+        followers = api.getFollowers(user, numPages=15, resume="followers-2244994945")
+    except UnsavedDataLimitExceedError:
+        followers = api.NotReturnedData.rescue()  # later: the same call continues with the next page
+    """
+    def __init__(self, path='twitterCheckpoints.sqlite', timeout=30):
+        """
+        :param path: file of the SQLite database
+        :param timeout: seconds a write waits for the database to be unlocked by another process
+        """
+        self.path = path
+        self._lock = threading.Lock()  # one connection is shared by the worker threads of AsyncTwitterAPI
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS checkpoints (name TEXT PRIMARY KEY, checkpoint TEXT, "
+                                 "updated REAL)")
+
+    def load(self, name):
+        """
+        :return: dictionary stored under the name, None if there is no checkpoint
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT checkpoint, updated FROM checkpoints WHERE name = ?",
+                                           (name,)).fetchone()
+        if row is None:
+            return None
+        checkpoint = json.loads(row[0])
+        checkpoint['updated'] = row[1]
+        return checkpoint
+
+    def save(self, name, checkpoint):
+        """
+        :param checkpoint: json serializable dictionary, e.g. endpoint, params, nextToken, pagesDone
+        """
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                                     (name, json.dumps(checkpoint, sort_keys=True), time.time()))
+
+    def delete(self, name):
+        with self._lock:
+            self._connection.execute("DELETE FROM checkpoints WHERE name = ?", (name,))
+
+    def names(self):
+        """
+        :return: names of the stored checkpoints, i.e. of the calls that were not finished
+        """
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT name FROM checkpoints ORDER BY updated")]
+
+
+class StreamCheckpoint(object):
+    """
+    This class keeps the ids of the Tweets a stream returned to the caller. Streams have no next_token, a resumed
+    stream asks for the Tweets of the minutes it was disconnected (backfill_minutes, at most 5) and drops the ones that
+    were returned before. The checkpoint is written when the stream returns its Tweets, a stream that is aborted
+    before returns nothing and its Tweets are delivered again by the resumed stream.
+    """
+    maxBackfillMinutes = 5
+    _twitterEpoch = 1288834974657  # milliseconds, the creation time of a Tweet id is (id >> 22) + _twitterEpoch
+
+    def __init__(self, store, name, endpoint):
+        """
+        :param store: CheckpointStore
+        :param name: name given as resume=
+        :param endpoint: url of the stream, a checkpoint of another stream is not resumed
+        """
+        self.store = store
+        self.name = name
+        self.endpoint = endpoint
+        self.tweetIds = set()
+        self._backfillMinutes = 0
+        checkpoint = store.load(name)
+        if checkpoint is not None and checkpoint.get('endpoint') == endpoint:
+            self.tweetIds = set(checkpoint['tweetIds'])
+            minutes = math.ceil((time.time() - checkpoint['updated']) / 60)
+            self._backfillMinutes = max(0, min(self.maxBackfillMinutes, minutes))
+
+    def params(self, params):
+        """
+        :return: params of the stream with backfill_minutes if the stream is resumed
+        """
+        if self._backfillMinutes > 0:
+            params = dict(params, backfill_minutes=self._backfillMinutes)
+        return params
+
+    def isNew(self, page):
+        """
+        :return: False if the Tweet of a stream line was returned before the stream was resumed
+        """
+        data = page.data
+        if not isinstance(data, dict) or 'id' not in data:
+            return True
+        return int(data['id']) not in self.tweetIds
+
+    def delivered(self, tweetIds):
+        """
+        writes the ids of the Tweets a stream returns to the caller, only the ids of the last maxBackfillMinutes are
+        kept, older Tweets are not part of a backfill
+        :param tweetIds: ids of the returned Tweets
+        """
+        self.tweetIds.update(int(tweetId) for tweetId in tweetIds)
+        if self.tweetIds:
+            newest = (max(self.tweetIds) >> 22) + self._twitterEpoch
+            oldest = newest - self.maxBackfillMinutes * 60 * 1000
+            self.tweetIds = {tweetId for tweetId in self.tweetIds if (tweetId >> 22) + self._twitterEpoch >= oldest}
+        self.store.save(self.name, {'endpoint': self.endpoint, 'tweetIds': sorted(self.tweetIds)})
@@ -0,0 +1,283 @@
+import numpy as np
+
+import twitter.utils as utils
+
+
+MISSING = -1  # value of id and count columns if the field is not part of the response
+
+
+class Categorical(object):
+    """
+    column of strings with few distinct values (lang, source, ...), stored as codes into the array of categories
+    """
+    def __init__(self, codes, categories):
+        """
+        :param codes: int32 array, -1 if the value is missing
+        :param categories: array of the distinct values
+        """
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def fromValues(cls, values):
+        lookup = {}
+        codes = np.fromiter((MISSING if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+                            dtype=np.int32, count=len(values))
+        return cls(codes=codes, categories=np.array(list(lookup), dtype=object))
+
+    @classmethod
+    def concatenate(cls, columns):
+        lookup = {}
+        codes = []
+        for column in columns:
+            mapping = np.array([lookup.setdefault(category, len(lookup)) for category in column.categories] + [MISSING],
+                               dtype=np.int32)
+            codes.append(mapping[column.codes])  # code -1 is mapped to the last entry, i.e. stays -1
+        codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int32)
+        return cls(codes=codes, categories=np.array(list(lookup), dtype=object))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+        return None if code == MISSING else self.categories[code]
+
+    def counts(self):
+        """
+        :return: dictionary (category: number of occurrences)
+        """
+        counts = np.bincount(self.codes[self.codes != MISSING], minlength=len(self.categories))
+        return dict(zip(self.categories, counts.tolist()))
+
+
+class TextColumn(object):
+    """
+    column of texts, stored as one utf-8 buffer and the offsets of each text within the buffer
+    """
+    def __init__(self, buffer, offsets):
+        """
+        :param buffer: uint8 array with the utf-8 encoded texts one after another
+        :param offsets: int64 array of length n + 1, text i is buffer[offsets[i]:offsets[i + 1]]
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def fromValues(cls, values):
+        encoded = [(value or '').encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(text) for text in encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        return cls(buffer=np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets=offsets)
+
+    @classmethod
+    def concatenate(cls, columns):
+        if not columns:
+            return cls.fromValues([])
+        offsets = [columns[0].offsets]
+        end = columns[0].offsets[-1]
+        for column in columns[1:]:
+            offsets.append(column.offsets[1:] + end)
+            end += column.offsets[-1]
+        return cls(buffer=np.concatenate([column.buffer for column in columns]), offsets=np.concatenate(offsets))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def lengths(self):
+        """
+        :return: int64 array with the number of bytes of each text
+        """
+        return np.diff(self.offsets)
+
+
+class RaggedColumn(object):
+    """
+    column with a variable number of strings per row (hashtags, mentions), stored as one Categorical of all values
+    and the offsets of each row
+    """
+    def __init__(self, values, offsets):
+        """
+        :param values: Categorical with the values of all rows one after another
+        :param offsets: int64 array of length n + 1, row i is values[offsets[i]:offsets[i + 1]]
+        """
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def fromValues(cls, rows):
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows)), out=offsets[1:])
+        return cls(values=Categorical.fromValues([value for row in rows for value in row]), offsets=offsets)
+
+    @classmethod
+    def concatenate(cls, columns):
+        if not columns:
+            return cls.fromValues([])
+        offsets = [columns[0].offsets]
+        end = columns[0].offsets[-1]
+        for column in columns[1:]:
+            offsets.append(column.offsets[1:] + end)
+            end += column.offsets[-1]
+        return cls(values=Categorical.concatenate([column.values for column in columns]),
+                   offsets=np.concatenate(offsets))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return [self.values[i] for i in range(self.offsets[index], self.offsets[index + 1])]
+
+    def lengths(self):
+        """
+        :return: int64 array with the number of values in each row
+        """
+        return np.diff(self.offsets)
+
+
+def _idColumn(values):
+    return np.fromiter((MISSING if value is None else int(value) for value in values), dtype=np.int64,
+                       count=len(values))
+
+
+def _countColumn(values):
+    return np.fromiter((MISSING if value is None else value for value in values), dtype=np.int64, count=len(values))
+
+
+def _datetimeColumn(values):
+    # "2021-08-16T08:05:52.000Z", numpy parses the timestamp without the timezone designator (always UTC)
+    return np.array(['NaT' if value is None else value.rstrip('Z') for value in values], dtype='datetime64[ms]')
+
+
+def _boolColumn(values):
+    return np.fromiter((bool(value) for value in values), dtype=bool, count=len(values))
+
+
+def _twitterTextColumn(values):
+    return TextColumn.fromValues(utils.encodeDecodeTwitterTexts(values))
+
+
+_columnBuilders = {'id': _idColumn, 'count': _countColumn, 'datetime': _datetimeColumn, 'bool': _boolColumn,
+                   'category': Categorical.fromValues, 'text': TextColumn.fromValues,
+                   'twitterText': _twitterTextColumn, 'ragged': RaggedColumn.fromValues}
+
+
+class Columns(object):
+    """
+    columnar counterpart of a dictionary of Tweet/TwitterUser instances, every field of the entities is one column.
+    The columns are built directly from the json derived dicts of a page, without creating entity instances.
+    """
+    # (column name, kind of column, function that extracts the value from the json derived dict)
+    _schema = ()
+
+    def __init__(self, **columns):
+        self._columns = columns
+        for name, column in columns.items():
+            setattr(self, name, column)
+
+    @classmethod
+    def fromDicts(cls, data):
+        """
+        :param data: list of json derived dicts, e.g. page.data
+        :return: instance of cls with one row per dict
+        """
+        data = data or []
+        columns = {}
+        for name, kind, extract in cls._schema:
+            columns[name] = _columnBuilders[kind]([extract(entity) for entity in data])
+        return cls(**columns)
+
+    @classmethod
+    def concatenate(cls, columnsList):
+        """
+        :param columnsList: list of instances of cls, e.g. one per page
+        :return: instance of cls with the rows of all instances
+        """
+        if not columnsList:
+            return cls.fromDicts([])
+        columns = {}
+        for name, kind, extract in cls._schema:
+            parts = [c[name] for c in columnsList]
+            if isinstance(parts[0], np.ndarray):
+                columns[name] = np.concatenate(parts)
+            else:
+                columns[name] = type(parts[0]).concatenate(parts)
+        return cls(**columns)
+
+    def __len__(self):
+        return len(self._columns[self._schema[0][0]]) if self._schema else 0
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def keys(self):
+        return self._columns.keys()
+
+
+def _metric(name):
+    return lambda entity: entity.get('public_metrics', {}).get(name)
+
+
+def _entities(name, key):
+    return lambda entity: [item[key] for item in entity.get('entities', {}).get(name, [])]
+
+
+def _tweetType(tweet):
+    referencedTweets = tweet.get('referenced_tweets')
+    return referencedTweets[0]['type'] if referencedTweets else 'tweet'
+
+
+class TweetColumns(Columns):
+    """
+    desired usage:
+    tweets = api.getUserTweetTimeline(userId, asColumns=True)
+    likes = tweets.like_count.sum()
+    """
+    _schema = (
+        ('id', 'id', lambda tweet: tweet.get('id')),
+        ('author_id', 'id', lambda tweet: tweet.get('author_id')),
+        ('conversation_id', 'id', lambda tweet: tweet.get('conversation_id')),
+        ('in_reply_to_user_id', 'id', lambda tweet: tweet.get('in_reply_to_user_id')),
+        ('created_at', 'datetime', lambda tweet: tweet.get('created_at')),
+        ('type', 'category', _tweetType),  # tweet, replied_to, retweeted, quoted
+        ('lang', 'category', lambda tweet: tweet.get('lang')),
+        ('source', 'category', lambda tweet: tweet.get('source')),
+        ('reply_settings', 'category', lambda tweet: tweet.get('reply_settings')),
+        ('possibly_sensitive', 'bool', lambda tweet: tweet.get('possibly_sensitive')),
+        ('retweet_count', 'count', _metric('retweet_count')),
+        ('reply_count', 'count', _metric('reply_count')),
+        ('like_count', 'count', _metric('like_count')),
+        ('quote_count', 'count', _metric('quote_count')),
+        ('text', 'twitterText', lambda tweet: tweet.get('text')),
+        ('hashtags', 'ragged', _entities('hashtags', 'tag')),
+        ('mentions', 'ragged', _entities('mentions', 'username')),
+    )
+
+
+class UserColumns(Columns):
+    """
+    desired usage:
+    followers = api.getFollowers(user, asColumns=True)
+    verified = followers.verified.sum()
+    """
+    _schema = (
+        ('id', 'id', lambda user: user.get('id')),
+        ('pinned_tweet_id', 'id', lambda user: user.get('pinned_tweet_id')),
+        ('created_at', 'datetime', lambda user: user.get('created_at')),
+        ('protected', 'bool', lambda user: user.get('protected')),
+        ('verified', 'bool', lambda user: user.get('verified')),
+        ('followers_count', 'count', _metric('followers_count')),
+        ('following_count', 'count', _metric('following_count')),
+        ('tweet_count', 'count', _metric('tweet_count')),
+        ('listed_count', 'count', _metric('listed_count')),
+        ('location', 'category', lambda user: user.get('location')),
+        ('username', 'text', lambda user: user.get('username')),
+        ('name', 'text', lambda user: user.get('name')),
+        ('description', 'twitterText', lambda user: user.get('description')),
+    )
@@ -0,0 +1,94 @@
+import collections
+import threading
+import time
+
+from twitter.IdentityMap import _entityType
+from twitter.TwitterEntities import TwitterUser
+
+
+class EntityCache(object):
+    """
+    This class keeps TwitterUser and Tweet instances returned by the look-up methods (getUserById, getUsersByIds,
+    getTweet, ...) for ttl seconds, such that repeated look-ups of the same users/tweets are answered without a request.
+    At most maxSize entities are kept, the least recently used ones are dropped first.
+    Users can be found by their id or by their username.
+
+    desired usage:
+    api = TwitterAPI(bearer_token, entityCache=EntityCache(maxSize=50_000, ttl=600))
+    author = api.getUserById(tweet.author_id)  # only requested if the author was not looked up in the last 10 minutes
+    """
+    def __init__(self, maxSize=10_000, ttl=900):
+        """
+        :param maxSize: number of entities kept
+        :param ttl: seconds an entity is returned from the cache after it was stored
+        """
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()  # (entity type, id): (expiry time, instance)
+        self._usernames = {}  # lower case username: id
+        self._lock = threading.Lock()  # look-ups are carried out by several threads (AsyncTwitterAPI, LookupBatcher)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, entityClass, entityId):
+        """
+        :param entityClass: TwitterUser or Tweet
+        :param entityId: id of the user/tweet
+        :return: the cached instance, None if it is unknown or expired
+        """
+        key = (_entityType(entityClass), str(entityId))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def getByUsername(self, userName):
+        """
+        :param userName: username of the user (case-insensitive)
+        :return: the cached TwitterUser, None if it is unknown or expired
+        """
+        with self._lock:
+            userId = self._usernames.get(userName.lower())
+            if userId is None:
+                self.misses += 1
+                return None
+        return self.get(TwitterUser, userId)
+
+    def put(self, instance):
+        """
+        stores (or renews) a TwitterUser/Tweet
+        :param instance: entity with an id
+        """
+        entityId = instance.linkWithTweet()
+        if entityId is None:
+            return
+        key = (_entityType(type(instance)), str(entityId))
+        userName = getattr(instance, 'username', None)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, instance)
+            self._entries.move_to_end(key)
+            if userName:
+                self._usernames[userName.lower()] = key[1]
+            while len(self._entries) > self.maxSize:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        # caller holds self._lock
+        _, instance = self._entries.pop(key)
+        userName = getattr(instance, 'username', None)
+        if userName and self._usernames.get(userName.lower()) == key[1]:
+            del self._usernames[userName.lower()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._usernames.clear()
+
+    def __len__(self):
+        return len(self._entries)
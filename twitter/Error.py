@@ -23,6 +23,11 @@ class TweetCapExceedingError(Exception):
     pass
 
 
+class DeadlineExceededError(Exception):
+    """a scheduled job could not be started before its deadline"""
+    pass
+
+
 class BadRequest(HTTPException):
     """400 HTTP status code"""
     pass
@@ -0,0 +1,119 @@
+from twitter.TwitterEntities import expansionTypes
+
+
+class ExpansionIndex(object):
+    """
+    This class indexes the includes of a single page by their type, i.e. users and tweets by id, media by media_key,
+    polls and places by id, such that ids of different types can not collide.
+    The instances are created once per page and shared by all tweets of the page that refer to them.
+
+    desired usage:
+    expansions = ExpansionIndex.fromPage(page)
+    for tweetDict in page.data:
+        expansions.link(Tweet.createFromDict(tweetDict))
+    """
+    def __init__(self, users=None, tweets=None, media=None, polls=None, places=None, other=None):
+        """
+        :param users: dictionary (id: TwitterUser)
+        :param tweets: dictionary (id: Tweet)
+        :param media: dictionary (media_key: Media)
+        :param polls: dictionary (id: Poll)
+        :param places: dictionary (id: Place)
+        :param other: dictionary (includes key: dictionary) for keys the API adds later, they are indexed but not
+                      linked, the json derived dicts of keys without a registered type are kept as they are (by id)
+        """
+        self.users = users if users is not None else {}
+        self.tweets = tweets if tweets is not None else {}
+        self.media = media if media is not None else {}
+        self.polls = polls if polls is not None else {}
+        self.places = places if places is not None else {}
+        self.other = other if other is not None else {}
+        self._usersByUsername = None
+
+    @property
+    def usersByUsername(self):
+        # only needed for mentions without id, hence created on first use
+        if self._usersByUsername is None:
+            self._usersByUsername = {user.username: user for user in self.users.values()}
+        return self._usersByUsername
+
+    @classmethod
+    def fromPage(cls, page, lazy=False, identityMap=None):
+        """
+        creates the instances of all includes of a page, the referenced tweets in the includes are linked as well
+        (e.g. with their author and media)
+        :param page: Page
+        :param lazy: passed on to createFromDict, see TwitterAPI(lazyEntities=True)
+        :param identityMap: IdentityMap, if given the instances of entities seen before are reused
+        :return: ExpansionIndex
+        """
+        indexed = {'users': {}, 'tweets': {}, 'media': {}, 'polls': {}, 'places': {}}
+        other = {}
+        for key, twitterEntities in page.includes.items():
+            entityClass = expansionTypes.get(key)  # see registerExpansionType
+            if entityClass is None:
+                other[key] = {entity.get('id', i): entity for i, entity in enumerate(twitterEntities)}
+                continue
+            index = indexed[key] if key in indexed else other.setdefault(key, {})
+            for twitterEntity in twitterEntities:
+                instance = entityClass.createFromDict(twitterEntity, lazy=lazy)
+                if identityMap is not None:
+                    instance = identityMap.resolve(instance)
+                index[instance.linkWithTweet()] = instance
+        expansions = cls(other=other, **indexed)
+        for tweet in expansions.tweets.values():
+            expansions.link(tweet)
+        return expansions
+
+    @staticmethod
+    def _append(tweet, key, instance):
+        # the lists are named after the includes key, e.g. tweet.media, tweet.polls
+        instances = getattr(tweet, key, None)
+        if instances is None:
+            instances = []
+            setattr(tweet, key, instances)
+        if instance not in instances:
+            instances.append(instance)
+
+    def link(self, tweet):
+        """
+        appends all includes a tweet refers to (author, mentioned users, replied to user, all referenced tweets,
+        all media, all polls, place) to the lists tweet.users, tweet.tweets, tweet.media, tweet.polls and tweet.places,
+        references that are not part of the includes are skipped
+        :param tweet: Tweet
+        :return: tweet
+        """
+        users = self.users
+        user = users.get(tweet.author_id)  # the author is the first user of a tweet
+        if user is not None:
+            self._append(tweet, 'users', user)
+        # the private slots are read, such that no empty containers are allocated for tweets without mentions/geo
+        for mention in tweet._mentions or []:
+            user = users.get(mention.id)
+            if user is None and mention.username is not None:
+                user = self.usersByUsername.get(mention.username)
+            if user is not None:
+                self._append(tweet, 'users', user)
+        user = users.get(tweet.in_reply_to_user_id)
+        if user is not None:
+            self._append(tweet, 'users', user)
+
+        for referencedTweet in tweet.referenced_tweets or []:
+            referenced = self.tweets.get(referencedTweet['id'])
+            if referenced is not None and referenced is not tweet:
+                self._append(tweet, 'tweets', referenced)
+
+        attachments = tweet.attachments or {}
+        for mediaKey in attachments.get('media_keys', []):
+            media = self.media.get(mediaKey)
+            if media is not None:
+                self._append(tweet, 'media', media)
+        for pollId in attachments.get('poll_ids', []):
+            poll = self.polls.get(pollId)
+            if poll is not None:
+                self._append(tweet, 'polls', poll)
+
+        place = self.places.get((tweet._geo or {}).get('place_id'))
+        if place is not None:
+            self._append(tweet, 'places', place)
+        return tweet
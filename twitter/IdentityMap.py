@@ -0,0 +1,77 @@
+import collections
+import threading
+import weakref
+
+from twitter.TwitterEntities import TwitterEntity
+
+
+def _entityType(entityClass):
+    # the class directly derived from TwitterEntity, i.e. Tweet for Retweet, such that subclasses share ids
+    mro = entityClass.__mro__
+    return mro[mro.index(TwitterEntity) - 1]
+
+
+class IdentityMap(object):
+    """
+    This class keeps one instance per entity (e.g. one TwitterUser per user id) for a TwitterAPI instance.
+    If an entity is seen again in a later response, the fields of the new instance are merged into the existing one
+    and the existing instance is used instead.
+    Entities are referenced weakly, such that the map does not keep them alive, only the maxSize entities that were
+    seen most recently are referenced strongly, such that they are reused even if the caller dropped them.
+
+    desired usage:
+    api = TwitterAPI(bearer_token, identityMap=True)
+    """
+    def __init__(self, maxSize=10_000):
+        """
+        :param maxSize: number of recently seen entities that are kept alive by the map
+        """
+        self.maxSize = maxSize
+        self._instances = weakref.WeakValueDictionary()
+        self._recent = collections.OrderedDict()
+        self._lock = threading.Lock()  # AsyncTwitterAPI creates entities on several worker threads
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(instance):
+        return _entityType(type(instance)), instance.linkWithTweet()
+
+    def resolve(self, instance):
+        """
+        :param instance: newly created entity
+        :return: the existing instance of the same entity with the fields of instance merged, otherwise instance
+        """
+        key = self._key(instance)
+        if key[1] is None:
+            return instance
+        with self._lock:
+            existing = self._instances.get(key)
+            if existing is None:
+                self.misses += 1
+                self._instances[key] = instance
+                existing = instance
+            else:
+                self.hits += 1
+                existing.merge(instance)
+            self._recent[key] = existing
+            self._recent.move_to_end(key)
+            if len(self._recent) > self.maxSize:
+                self._recent.popitem(last=False)
+        return existing
+
+    def get(self, entityClass, entityId):
+        """
+        :param entityClass: e.g. TwitterUser or Tweet
+        :param entityId: id (media_key for Media)
+        :return: the instance if it is known, otherwise None
+        """
+        return self._instances.get((_entityType(entityClass), entityId))
+
+    def clear(self):
+        with self._lock:
+            self._instances.clear()
+            self._recent.clear()
+
+    def __len__(self):
+        return len(self._instances)
@@ -0,0 +1,96 @@
+import threading
+
+from concurrent.futures import Future
+
+from twitter.Error import APIError
+
+
+class LookupBatcher(object):
+    """
+    This class coalesces single look-ups (getUserById, getUserByUsername, getTweet) that are issued at about the same
+    time by several threads or coroutines into one request of the batch endpoint (users?ids=, tweets?ids=).
+    A batch is sent as soon as maxBatchSize ids are pending or window seconds after its first id was submitted,
+    every caller gets its own entity back. Look-ups of the same id that are pending at the same time share one future.
+
+    desired usage:
+    api = TwitterAPI(bearer_token, batchLookups=True)
+    users = list(ThreadPoolExecutor(50).map(api.getUserById, userIds))  # 1 request per 100 ids instead of 1 per id
+    """
+    def __init__(self, lookupBatch, window=0.02, maxBatchSize=100):
+        """
+        :param lookupBatch: function(batch) -> (dictionary key: instance, dictionary key: error dict), see
+                            TwitterAPI._lookupUsersBatch
+        :param window: seconds a batch waits for further ids before it is sent
+        :param maxBatchSize: number of ids that triggers sending a batch immediately
+        """
+        self._lookupBatch = lookupBatch
+        self.window = window
+        self.maxBatchSize = maxBatchSize
+        self._pending = {}  # key: Future
+        self._timer = None
+        self._lock = threading.Lock()
+        self.requests = 0  # number of batches sent
+        self.lookups = 0  # number of submitted look-ups
+
+    def submit(self, key):
+        """
+        :param key: id (or lower case username) to look up
+        :return: concurrent.futures.Future that resolves to the instance or raises the error of the look-up
+        """
+        batch = None
+        with self._lock:
+            self.lookups += 1
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._pending[key] = future
+            if len(self._pending) >= self.maxBatchSize:
+                batch = self._takePending()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._send(batch)
+        return future
+
+    def lookup(self, key):
+        """
+        blocking variant of submit
+        :return: instance of the entity
+        """
+        return self.submit(key).result()
+
+    def flush(self):
+        """
+        sends the pending look-ups without waiting for the window to pass
+        """
+        with self._lock:
+            batch = self._takePending()
+        if batch:
+            self._send(batch)
+
+    def _takePending(self):
+        # caller holds self._lock
+        batch = self._pending
+        self._pending = {}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _send(self, batch):
+        self.requests += 1
+        try:
+            found, errors = self._lookupBatch(list(batch))
+        except Exception as e:  # the error of the request is raised by every caller of the batch
+            for future in batch.values():
+                future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if key in found:
+                future.set_result(found[key])
+            else:
+                error = errors.get(key, {})
+                future.set_exception(APIError(error.get('detail') or error.get('message') or f"{key} was not returned"))
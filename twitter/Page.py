@@ -0,0 +1,65 @@
+import twitter.utils as utils
+
+
+class Page(object):
+    """
+    This class holds the decoded response of a single request.
+    The body is parsed exactly once when the page is created, every function that works with the response
+    (entity creation, pagination, rate limit bookkeeping) reads from the same decoded body.
+    """
+    def __init__(self, body, headers=None, status_code=200, fromCache=False):
+        """
+        :param body: decoded json body of the response
+        :param headers: headers of the response (x-rate-limit-* etc.)
+        :param status_code: HTTP status code of the response
+        :param fromCache: True if the page was served by the ResponseCache instead of a request
+        """
+        self.body = body if body is not None else {}
+        self.headers = headers if headers is not None else {}
+        self.status_code = status_code
+        self.fromCache = fromCache
+        self.secondsWaited = 0.0  # seconds the request waited for the rate limit of its endpoint
+        self.credential = None  # Credential of the TokenPool that carried out the request, None for cached pages
+
+    @classmethod
+    def fromResponse(cls, response):
+        """
+        :param response: requests.Response
+        :return: Page with the decoded body of the response
+        """
+        content = response.content
+        body = utils.loadJson(content) if content else {}
+        return cls(body=body, headers=response.headers, status_code=response.status_code)
+
+    @property
+    def data(self):
+        return self.body.get('data')
+
+    @property
+    def includes(self):
+        return self.body.get('includes', {})
+
+    @property
+    def meta(self):
+        return self.body.get('meta', {})
+
+    @property
+    def errors(self):
+        return self.body.get('errors', [])
+
+    def truncate(self, numberOfEntities):
+        """
+        drops the entities of data beyond the first numberOfEntities, the includes are kept
+        """
+        data = self.data
+        if isinstance(data, list) and len(data) > numberOfEntities:
+            self.body['data'] = data[:numberOfEntities]
+            if 'result_count' in self.meta:
+                self.body['meta']['result_count'] = numberOfEntities
+
+    def json(self):
+        """
+        same as requests.Response.json, but without decoding the body again
+        :return: decoded body
+        """
+        return self.body
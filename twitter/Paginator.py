@@ -0,0 +1,303 @@
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from twitter.Error import (APIError, EmptyPageError, LimitExceedError, UnsavedDataLimitExceedError,
+                           TweetCapExceedingError)
+
+
+class Paginator(object):
+    """
+    This class runs the next_token loop of a paginated endpoint for the functions in TwitterAPI.
+    It is an iterator that yields the output of the pageHandler for each page, such that each endpoint only has to
+    specify how a page is turned into entities.
+
+    desired usage:
+    paginator = Paginator(api, "users/2244994945/followers", params, "GET_Users_Followers", handler, maxPages=15)
+    for page in paginator:
+        ...
+
+    If the pages count towards the Tweet cap, the estimated number of tweets (estimatedTweets, by default
+    maxPages x max_results) is reserved in APIRateLimit before the first page is requested and the unused part is
+    released when the pagination ends. If the reservation is used up, further tweets are reserved page by page,
+    TweetCapExceedingError is raised once the Tweet cap has nothing left, also in the middle of a pagination.
+
+    With prefetch, the next page is requested on a worker thread as soon as the next_token of the current page is
+    known, while the current page is turned into entities and handed to the caller. A page is only prefetched if its
+    endpoint has a request left, otherwise it is requested (and waits for the reset) after the current page.
+
+    With checkpointName, the next_token and the counters of a page are stored in the CheckpointStore when the caller
+    asks for the next page, i.e. once it handled the page, a page is handed to the caller again if it was not handled.
+    If a checkpoint of the same endpoint and params exists, the pagination continues with its next_token.
+    The checkpoint is deleted once the pagination is done, it is kept if the pagination is aborted or closed.
+    """
+    def __init__(self, api, str_input, params, rateLimitName, pageHandler, maxPages, countsTowardsTweetCap=False,
+                 hooks=None, maxWait=None, maxTweets=None, estimatedTweets=None, prefetch=None, checkpointStore=None,
+                 checkpointName=None, cache=None):
+        """
+        :param api: TwitterAPI instance that carries out the requests and holds the APIRateLimit
+        :param str_input: endpoint, e.g. "users/2244994945/followers"
+        :param params: params of the first page, the pagination_token is added for the following pages
+        :param rateLimitName: suffix of the RequestsLeft_* and ResetTime_* attributes in APIRateLimit
+        :param pageHandler: function that turns a Page into a dictionary, may raise EmptyPageError
+        :param maxPages: maximal number of pages requested
+        :param countsTowardsTweetCap: if True, the entities of each page are counted towards the Tweet cap
+        :param hooks: list of functions called with (paginator, response, page) after each page, e.g. for metrics
+        :param maxWait: seconds the paginator sleeps at most for a rate limit reset, otherwise it aborts, by default
+                        maxRateLimitWait of the api
+        :param maxTweets: the pagination stops once this many tweets were received (only if countsTowardsTweetCap),
+                          max_results of the last page is reduced accordingly
+        :param estimatedTweets: expected number of tweets, e.g. from the counts endpoint, by default the maximum
+        :param prefetch: if True, the next page is requested while the current one is handled, by default the
+                         prefetchPages setting of the TwitterAPI instance
+        :param checkpointStore: CheckpointStore in which the progress is kept (only used with checkpointName)
+        :param checkpointName: name of the checkpoint, see resume= of the functions in TwitterAPI
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page (also the
+                      prefetched ones)
+        """
+        self.api = api
+        self.str_input = str_input
+        self.params = params
+        self.rateLimitName = rateLimitName
+        self.pageHandler = pageHandler
+        self.maxPages = math.ceil(maxPages)
+        self.countsTowardsTweetCap = countsTowardsTweetCap
+        self.hooks = hooks if hooks is not None else []
+        self.maxWait = maxWait if maxWait is not None else api.maxRateLimitWait
+        self.maxTweets = maxTweets
+        self._entriesPerPage = int(params.get('max_results', 100)) if params else 100
+        if estimatedTweets is None:
+            estimatedTweets = self.maxPages * self._entriesPerPage
+        self.estimatedTweets = estimatedTweets if countsTowardsTweetCap else 0
+        self.reservedTweets = 0  # reserved in APIRateLimit and not received yet
+        self.prefetch = prefetch if prefetch is not None else api.prefetchPages
+        self.cache = cache
+        self._executor = None
+
+        self.nextToken = None
+        self.credential = None  # the token of the first page (or of the Tweet cap reservation) requests all pages
+        self.pagesDone = 0
+        self.entitiesReceived = 0
+        self.secondsWaited = 0.0
+        self.secondsRequesting = 0.0
+        self.checkpointStore = checkpointStore if checkpointName is not None else None
+        self.checkpointName = checkpointName
+        self.resumed = self.checkpointStore is not None and self._loadCheckpoint()
+        self._pages = self._run()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._pages)
+
+    def close(self):
+        """
+        stops the pagination before the last page, the unused part of the Tweet cap reservation is released
+        """
+        self._pages.close()
+
+    def addHook(self, hook):
+        """
+        :param hook: function called with (paginator, response, page) after each page
+        """
+        self.hooks.append(hook)
+
+    def _queryParams(self):
+        # params that identify the query of a checkpoint, max_results is reduced by the Tweet cap and maxTweets
+        return json.loads(json.dumps({key: value for key, value in self.params.items()
+                                      if key not in ('pagination_token', 'max_results')}, sort_keys=True))
+
+    def _loadCheckpoint(self):
+        """
+        continues the pagination of the checkpoint
+        :return: True if a checkpoint was found
+        """
+        checkpoint = self.checkpointStore.load(self.checkpointName)
+        if checkpoint is None:
+            return False
+        if checkpoint['endpoint'] != self.str_input or checkpoint['params'] != self._queryParams():
+            raise APIError(f"The checkpoint '{self.checkpointName}' belongs to another request "
+                           f"({checkpoint['endpoint']}), please use another name or delete it from the CheckpointStore")
+        self.nextToken = checkpoint['nextToken']
+        self.pagesDone = checkpoint['pagesDone']
+        self.entitiesReceived = checkpoint['entitiesReceived']
+        return True
+
+    def _saveCheckpoint(self):
+        self.checkpointStore.save(self.checkpointName, {
+            'endpoint': self.str_input, 'params': self._queryParams(), 'nextToken': self.nextToken,
+            'pagesDone': self.pagesDone, 'entitiesReceived': self.entitiesReceived})
+
+    def _fetch(self, token, firstPage=False, entries=None):
+        """
+        requests a page, if the rate limit of the endpoint is used up the request waits until the window is reset,
+        if this takes longer than maxWait the pagination is aborted
+        :param token: next_token of the previous page, None for the first page
+        :param firstPage: True for the first request of this run, nothing is lost if it is aborted
+        :param entries: tweets of the page within maxTweets and the reservation, see _tweetsForNextPage, max_results
+                        is at least 10 and the tweets beyond are dropped, i.e. neither handed to the caller nor counted
+        :return: Page of the response
+        """
+        if token is not None:
+            self.params['pagination_token'] = token
+        start = time.time()
+        try:
+            response = self.api._makeRequest(url_param=self.str_input, params=self.params,
+                                             rateLimitName=self.rateLimitName, maxWait=self.maxWait,
+                                             credential=self.credential, cache=self.cache)
+        except LimitExceedError:
+            if firstPage:
+                raise
+            raise UnsavedDataLimitExceedError()
+        if entries is not None:
+            response.truncate(entries)
+        if self.credential is None:
+            self.credential = response.credential
+        self.secondsWaited += response.secondsWaited
+        self.secondsRequesting += time.time() - start - response.secondsWaited
+        return response
+
+    def _reserve(self, numberOfTweets):
+        # from the Tweet cap of the token the pagination is carried out with and from the one of the project
+        if numberOfTweets <= 0:
+            return
+        if self.credential is None:
+            self.credential = self.api.tokenPool.choose(self.rateLimitName)
+        reserved = self.credential.reserve(numberOfTweets)
+        try:
+            projectReserved = self.api.apiRateLimit.reserve(reserved)
+        except TweetCapExceedingError:
+            self.credential.release(reserved)
+            raise
+        self.credential.release(reserved - projectReserved)
+        self.reservedTweets += projectReserved
+
+    def _tweetsForNextPage(self, pending=0):
+        """
+        reserves the tweets of the next page if the reservation is used up
+        :param pending: tweets of the current page that are not counted yet (when the next page is prefetched)
+        :return: maximal number of tweets of the next page, 0 if maxTweets is reached
+        """
+        entries = self._entriesPerPage
+        if self.maxTweets is not None:
+            entries = min(entries, self.maxTweets - self.entitiesReceived - pending)
+            if entries <= 0:
+                return 0
+        reserved = self.reservedTweets - min(pending, self.reservedTweets)
+        if reserved < entries:
+            try:
+                self._reserve(entries - reserved)
+            except TweetCapExceedingError:
+                if reserved == 0:
+                    raise
+            reserved = self.reservedTweets - min(pending, self.reservedTweets)
+        entries = min(entries, reserved)
+        if 'max_results' in self.params:
+            self.params['max_results'] = f"{max(entries, 10)}"  # 10 is the minimum of the endpoints
+        return entries
+
+    def _run(self):
+        if self.countsTowardsTweetCap:
+            budget = self.estimatedTweets if self.maxTweets is None else min(self.estimatedTweets, self.maxTweets)
+            self._reserve(budget - self.entitiesReceived)  # a resumed pagination received some of them before
+        try:
+            yield from self._pagesWithinBudget()
+            if self.checkpointStore is not None:
+                self.checkpointStore.delete(self.checkpointName)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self.reservedTweets > 0:
+                self.api.apiRateLimit.release(self.reservedTweets)
+                self.credential.release(self.reservedTweets)
+                self.reservedTweets = 0
+
+    def _hasRequestLeft(self):
+        if self.credential is not None:
+            return self.credential.limiter.requestsLeft(self.rateLimitName) >= 1
+        return self.api.tokenPool.requestsLeft(self.rateLimitName) >= 1
+
+    def _prefetch(self, token, pending):
+        """
+        requests the next page on the worker thread if this takes no waiting for the rate limit
+        :param token: next_token of the current page
+        :param pending: tweets of the current page that are not counted yet
+        :return: Future of the next page, None if it is requested after the current page
+        """
+        if not self._hasRequestLeft():
+            return None
+        entries = None
+        if self.countsTowardsTweetCap:
+            try:
+                entries = self._tweetsForNextPage(pending)
+            except TweetCapExceedingError:
+                return None  # raised after the current page was handed to the caller
+            if entries == 0:
+                return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(self._fetch, token, False, entries)
+
+    def _discard(self, prefetched):
+        # the pagination ended before the prefetched page was handed to the caller, its tweets were spent anyway
+        if prefetched.cancel():
+            return
+        try:
+            response = prefetched.result()
+        except Exception:
+            return
+        if self.countsTowardsTweetCap and not response.fromCache:
+            received = len(response.data or [])
+            reserved = min(received, self.reservedTweets)
+            self.reservedTweets -= reserved
+            self.api._countTowardsTweetCap(response, received, reserved=reserved)
+
+    def _pagesWithinBudget(self):
+        token = self.nextToken
+        startPage = self.pagesDone
+        prefetched = None
+        try:
+            for i in range(startPage, self.maxPages):
+                if prefetched is not None:
+                    response, prefetched = prefetched.result(), None
+                else:
+                    entries = self._tweetsForNextPage() if self.countsTowardsTweetCap else None
+                    if entries == 0:
+                        return
+                    response = self._fetch(token, firstPage=(i == startPage), entries=entries)
+
+                token = response.meta.get('next_token')
+                if self.prefetch and token is not None and i + 1 < self.maxPages:
+                    prefetched = self._prefetch(token, len(response.data or []))
+
+                try:
+                    page = self.pageHandler(response)
+                except EmptyPageError:
+                    # No need to communicate this error, as the Twitter API provided empty page which the client
+                    # will not realise
+                    return
+
+                self.pagesDone += 1
+                self.entitiesReceived += len(page)
+                if self.countsTowardsTweetCap and not response.fromCache:
+                    reserved = min(len(page), self.reservedTweets)
+                    self.reservedTweets -= reserved
+                    self.api._countTowardsTweetCap(response, len(page), reserved=reserved)
+
+                self.nextToken = token
+                for hook in self.hooks:
+                    hook(self, response, page)
+
+                yield page
+
+                # the caller asks for the next page, i.e. it handled this one
+                if self.checkpointStore is not None and token is not None:
+                    self._saveCheckpoint()
+                if token is None:
+                    return
+        finally:
+            if prefetched is not None:
+                self._discard(prefetched)
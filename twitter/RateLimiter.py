@@ -0,0 +1,213 @@
+import asyncio
+import contextlib
+import threading
+import time
+
+from twitter.Error import LimitExceedError
+
+
+class Bucket(object):
+    """
+    requests left in the current rate limit window of one endpoint
+    """
+    __slots__ = ('limit', 'remaining', 'reset', 'inFlight')
+
+    def __init__(self, limit, reset):
+        """
+        :param limit: requests per window (x-rate-limit-limit)
+        :param reset: end of the current window in UTC epoch seconds (x-rate-limit-reset)
+        """
+        self.limit = limit
+        self.remaining = float(limit)
+        self.reset = reset
+        self.inFlight = 0  # acquired requests whose response has not been seen yet
+
+
+class RateLimiter(object):
+    """
+    This class keeps one bucket per endpoint (named like the RequestsLeft_* attributes of APIRateLimit, e.g.
+    "GET_Users_Followers"). Every response updates the bucket of its endpoint from the x-rate-limit headers,
+    acquire() takes a request from the bucket and, if the window is used up, waits exactly until it is reset.
+    The limits before the first response of an endpoint are the documented ones of the authentication context,
+    app (bearer token) or user (OAuth 1.0a / OAuth 2.0 user context) limits differ for some endpoints.
+
+    desired usage:
+    limiter = RateLimiter()
+    limiter.acquire("GET_Users_Followers", maxWait=900)
+    response = ...
+    limiter.update("GET_Users_Followers", response.headers, acquired=True)
+    """
+    window = 15 * 60  # seconds of a rate limit window
+
+    # (app limit, user limit) per 15 minute window
+    defaultLimits = {
+        'GET_Tweets_SearchStream': (50, 50),  # number of connections to stream
+        'GET_Rules_RulesSearchStream': (450, 450),
+        'GET_Users_LikingUsers': (75, 75),  # 100 users per request (if so many exists)
+        'GET_Tweets_LikedTweets': (75, 75),
+        'GET_Users_RetweetedBy': (75, 75),
+        'GET_Tweets_SampleStream': (50, 50),  # number of connections to stream
+        'GET_Tweets_SearchRecent': (450, 180),
+        'GET_Users_mentions': (450, 180),
+        'GET_Tweets_byUser': (1500, 900),
+        'GET_TweetCounts_recent': (300, 300),
+        'GET_Tweet_byId': (300, 900),
+        'GET_Tweets_byIds': (300, 900),
+        'GET_Users_Followers': (15, 15),  # get max 15 pages of 1000
+        'GET_Users_Friends': (15, 15),  # get max 15 pages of 1000
+        'GET_User_byId': (300, 900),
+        'GET_Users_byIds': (300, 900),
+        'GET_User_byName': (300, 900),
+        'GET_Users_byNames': (300, 900),
+        'Post_Add_Rules': (450, 450),
+        'Post_Delete_Rules': (450, 450),
+        'Get_Rules': (450, 450),
+    }
+
+    def __init__(self, authContext="app", limits=None):
+        """
+        :param authContext: "app" or "user", selects the default limits
+        :param limits: dictionary (endpoint: requests per window) that overrides the default limits
+        """
+        if authContext not in ("app", "user"):
+            raise ValueError("authContext has to be 'app' or 'user'")
+        self.authContext = authContext
+        self.limits = {name: limit[0 if authContext == "app" else 1] for name, limit in self.defaultLimits.items()}
+        if limits:
+            self.limits.update(limits)
+        self._buckets = {}
+        # until the first response of an endpoint, its window is assumed to have started with this instance
+        self._firstReset = time.time() + self.window
+        self._lock = threading.Lock()  # buckets are shared by the worker threads of AsyncTwitterAPI
+
+    def bucket(self, name):
+        """
+        :param name: endpoint, e.g. "GET_Users_Followers"
+        :return: Bucket of the endpoint, created with the default limit on first use
+        """
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(name, Bucket(self.limits.get(name, 15), self._firstReset))
+        return bucket
+
+    @contextlib.contextmanager
+    def _locked(self, name):
+        """
+        context manager, the bucket of the endpoint can be changed without other threads interfering
+        """
+        bucket = self.bucket(name)
+        with self._lock:
+            yield bucket
+
+    def requestsLeft(self, name):
+        """
+        :param name: endpoint, e.g. "GET_Users_Followers"
+        :return: requests left in the current window, a window that is used up and reset is refilled
+        """
+        bucket = self.bucket(name)
+        if bucket.remaining < 1 and bucket.reset <= time.time():
+            with self._locked(name) as bucket:
+                now = time.time()
+                if bucket.remaining < 1 and bucket.reset <= now:
+                    self._startNewWindow(bucket, now)
+        return bucket.remaining
+
+    def resetTime(self, name):
+        return self.bucket(name).reset
+
+    def setRequestsLeft(self, name, requestsLeft):
+        with self._locked(name) as bucket:
+            bucket.remaining = float(requestsLeft)
+
+    def setResetTime(self, name, resetTime):
+        with self._locked(name) as bucket:
+            bucket.reset = float(resetTime)
+
+    def update(self, name, headers, acquired=False):
+        """
+        stores the x-rate-limit headers of a response in the bucket of the endpoint
+        :param headers: headers of the response, without rate limit headers only an acquired request is released
+        :param acquired: True if the request was sent after acquire(name)
+        """
+        with self._locked(name) as bucket:
+            if acquired:
+                bucket.inFlight = max(0, bucket.inFlight - 1)
+            if 'x-rate-limit-remaining' not in headers:
+                return
+            if 'x-rate-limit-limit' in headers:
+                bucket.limit = int(headers['x-rate-limit-limit'])
+            # requests that were acquired but not answered yet are not part of the remaining count of the response
+            bucket.remaining = max(0.0, float(headers['x-rate-limit-remaining']) - bucket.inFlight)
+            if 'x-rate-limit-reset' in headers:
+                bucket.reset = float(headers['x-rate-limit-reset'])
+
+    def release(self, name):
+        """
+        gives a request that was acquired but never sent back to the bucket of the endpoint
+        """
+        with self._locked(name) as bucket:
+            if bucket.inFlight >= 1:  # otherwise the request belongs to a window that has passed
+                bucket.inFlight -= 1
+                bucket.remaining = min(float(bucket.limit), bucket.remaining + 1)
+
+    def _tryAcquire(self, name, maxWait):
+        """
+        :return: 0 if a request was taken, otherwise the seconds until the window of the endpoint is reset
+        """
+        with self._locked(name) as bucket:
+            now = time.time()
+            if bucket.remaining < 1 and bucket.reset <= now:
+                self._startNewWindow(bucket, now)
+            if bucket.remaining >= 1:
+                bucket.remaining -= 1
+                bucket.inFlight += 1
+                return 0.0
+            waitingTime = bucket.reset - now
+        if maxWait is not None and waitingTime > maxWait:
+            raise LimitExceedError(f"Rate limit of {name} exceeded, it is reset in {waitingTime:.0f} seconds")
+        return waitingTime
+
+    def _startNewWindow(self, bucket, now):
+        # caller holds the bucket via _locked, requests of the old window that never returned are forgotten
+        bucket.remaining = float(bucket.limit)
+        bucket.inFlight = 0
+        bucket.reset = max(now, bucket.reset) + self.window
+
+    def _windowPassed(self, name, reset):
+        # the sleep until reset is over, unless a response moved the window meanwhile the bucket is refilled
+        with self._locked(name) as bucket:
+            if bucket.reset == reset and bucket.remaining < 1:
+                self._startNewWindow(bucket, reset)
+
+    def acquire(self, name, maxWait=None):
+        """
+        takes one request of the endpoint, blocks until the window is reset if none is left
+        :param name: endpoint, e.g. "GET_Users_Followers"
+        :param maxWait: seconds to wait at most, LimitExceedError is raised if the reset is further away
+        :return: seconds waited
+        """
+        waited = 0.0
+        while True:
+            waitingTime = self._tryAcquire(name, None if maxWait is None else maxWait - waited)
+            if waitingTime == 0.0:
+                return waited
+            reset = self.bucket(name).reset
+            time.sleep(waitingTime)
+            waited += waitingTime
+            self._windowPassed(name, reset)
+
+    async def acquireAsync(self, name, maxWait=None):
+        """
+        awaitable variant of acquire, the event loop keeps running while waiting for the reset
+        :return: seconds waited
+        """
+        waited = 0.0
+        while True:
+            waitingTime = self._tryAcquire(name, None if maxWait is None else maxWait - waited)
+            if waitingTime == 0.0:
+                return waited
+            reset = self.bucket(name).reset
+            await asyncio.sleep(waitingTime)
+            waited += waitingTime
+            self._windowPassed(name, reset)
@@ -1,4 +1,7 @@
 class RealWorldEntity(object):
+    __slots__ = ('domainId', 'domainName', 'domainDescription', 'entityId', 'entityName', 'entityDescription',
+                 'probability', 'url', 'tweet', 'start', 'end', '__dict__')
+
     def __init__(self, domainId=None, domainName=None, domainDescription=None, entityId=None, entityName=None, entityDescription=None, probability=None, tweet=None, start=None, end=None, url=None):
         self.domainId = domainId
         self.domainName = domainName
@@ -0,0 +1,197 @@
+import contextlib
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+
+import twitter.utils as utils
+from twitter.Page import Page
+
+
+def endpointOf(urlParam):
+    """
+    :param urlParam: e.g. "users/2244994945/followers" or "users/by/username/TwitterDev"
+    :return: the endpoint without ids and usernames, e.g. "users/:id/followers" or "users/by/username/:username"
+    """
+    parts = urlParam.strip('/').split('/')
+    for i, part in enumerate(parts):
+        if part.isdigit():
+            parts[i] = ':id'
+        elif i > 0 and parts[i - 1] == 'username':
+            parts[i] = ':username'
+    return '/'.join(parts)
+
+
+class ResponseCache(object):
+    """
+    This class stores the bodies of successful responses in a SQLite database, keyed by the endpoint and the
+    normalised parameters of the request. TwitterAPI consults it before every request of _makeRequest, such that
+    re-running a job does not spend rate limit and Tweet cap on pages that were already fetched.
+    Each endpoint has its own time to live, endpoints without a time to live are not cached (e.g. stream rules).
+    If the database grows above maxSize bytes, the least recently used responses are deleted.
+
+    The functions of TwitterAPI take cache='refresh' (ignore cached responses, store the new ones) or cache='bypass'
+    (neither read nor write the cache), the mode is handed to every request of the call, also to the ones carried out
+    on worker threads. Within refresh() and bypass() blocks it is the default of the calls started in the block.
+
+    desired usage:
+    api = TwitterAPI(bearer_token, responseCache=ResponseCache('twitterCache.sqlite'))
+    user = api.getUserById(userId, cache='refresh')  # requested again and stored
+    with api.responseCache.refresh():
+        users = api.getUsersByIds(userIds)
+    """
+    modes = (None, 'bypass', 'refresh')
+
+    # seconds, keys are the result of endpointOf
+    defaultTtls = {
+        'users': 24 * 3600,
+        'users/:id': 24 * 3600,
+        'users/by': 24 * 3600,
+        'users/by/username/:username': 24 * 3600,
+        'users/:id/followers': 3600,
+        'users/:id/following': 3600,
+        'users/:id/tweets': 900,
+        'users/:id/mentions': 900,
+        'users/:id/liked_tweets': 3600,
+        'tweets': 24 * 3600,
+        'tweets/:id': 24 * 3600,
+        'tweets/:id/liking_users': 3600,
+        'tweets/:id/retweeted_by': 3600,
+        'tweets/search/recent': 300,
+        'tweets/counts/recent': 900,
+    }
+
+    def __init__(self, path='twitterCache.sqlite', ttls=None, maxSize=512 * 1024 ** 2):
+        """
+        :param path: file of the SQLite database, ":memory:" keeps the cache in memory
+        :param ttls: dictionary (endpoint: seconds) that overrides defaultTtls, 0 disables caching of an endpoint
+        :param maxSize: bytes of response bodies kept before the least recently used ones are evicted
+        """
+        self.ttls = dict(self.defaultTtls)
+        if ttls:
+            self.ttls.update(ttls)
+        self.maxSize = maxSize
+        self._lock = threading.Lock()  # one connection is shared by the worker threads of AsyncTwitterAPI
+        self._mode = contextvars.ContextVar(f"responseCacheMode{id(self)}", default=None)  # per thread and per task
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, endpoint TEXT, "
+                                 "body BLOB, headers TEXT, expires REAL, used REAL, size INTEGER)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+        self._size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(urlParam, params):
+        if not params:
+            return urlParam
+        normalised = sorted((str(name), ','.join(map(str, value)) if isinstance(value, (list, tuple)) else str(value))
+                            for name, value in params.items())
+        return urlParam + '?' + '&'.join(f"{name}={value}" for name, value in normalised)
+
+    @contextlib.contextmanager
+    def _setMode(self, mode):
+        token = self._mode.set(mode)
+        try:
+            yield self
+        finally:
+            self._mode.reset(token)
+
+    def bypass(self):
+        """
+        context manager, the calls started in the block neither read nor write the cache
+        """
+        return self._setMode('bypass')
+
+    def refresh(self):
+        """
+        context manager, the calls started in the block ignore cached responses and store the new ones
+        """
+        return self._setMode('refresh')
+
+    def currentMode(self):
+        """
+        :return: mode of the enclosing refresh() or bypass() block, None outside of them
+        """
+        return self._mode.get()
+
+    def get(self, urlParam, params=None, mode=None):
+        """
+        :param mode: None, 'bypass' or 'refresh', the cache is only read with None
+        :return: Page with fromCache=True, None if the response is not cached, expired or the mode skips the cache
+        """
+        if mode is not None or not self.ttls.get(endpointOf(urlParam)):
+            return None
+        key = self._key(urlParam, params)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT body, headers FROM responses WHERE key = ? AND expires > ?",
+                                           (key, now)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        body, headers = row
+        return Page(body=utils.loadJson(body) if body else {}, headers=json.loads(headers), fromCache=True)
+
+    def put(self, urlParam, params, content, headers=None, mode=None):
+        """
+        :param content: raw body of the response
+        :param headers: headers of the response, rate limit headers are not stored as they are outdated once the
+                        response is served from the cache
+        :param mode: None, 'bypass' or 'refresh', the response is not stored with 'bypass'
+        """
+        if mode == 'bypass':
+            return
+        ttl = self.ttls.get(endpointOf(urlParam))
+        if not ttl:
+            return
+        key = self._key(urlParam, params)
+        headers = {name: value for name, value in (headers or {}).items()
+                   if not name.lower().startswith('x-rate-limit')}
+        now = time.time()
+        size = len(content)
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     (key, endpointOf(urlParam), content, json.dumps(headers), now + ttl, now, size))
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.maxSize:
+                self._evict()
+
+    def _evict(self):
+        # caller holds self._lock, deletes the least recently used responses until 90% of maxSize are left
+        now = time.time()
+        self._connection.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        rows = self._connection.execute("SELECT key, size FROM responses ORDER BY used").fetchall()
+        size = sum(row[1] for row in rows)
+        evicted = []
+        for key, rowSize in rows:
+            if size <= 0.9 * self.maxSize:
+                break
+            evicted.append((key,))
+            size -= rowSize
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._size = size
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @property
+    def size(self):
+        """
+        :return: bytes of the stored response bodies
+        """
+        return self._size
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
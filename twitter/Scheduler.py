@@ -0,0 +1,196 @@
+import collections
+import functools
+import itertools
+import math
+import threading
+import time
+
+from concurrent.futures import Future
+
+from twitter.Error import DeadlineExceededError
+from twitter.Paginator import Paginator
+
+
+class _Job(object):
+    __slots__ = ('priority', 'deadline', 'sequence', 'rateLimitName', 'future', 'call', 'pages', 'onPage', 'results')
+
+    def __init__(self, priority, deadline, rateLimitName, call=None, pages=None, onPage=None):
+        self.priority = priority
+        self.deadline = deadline  # time.monotonic() by which the job has to be started, None for no deadline
+        self.sequence = 0
+        self.rateLimitName = rateLimitName
+        self.future = Future()
+        self.call = call
+        self.pages = pages
+        self.onPage = onPage
+        self.results = []
+
+    def sortKey(self):
+        return self.priority, self.deadline if self.deadline is not None else math.inf, self.sequence
+
+
+class Scheduler(object):
+    """
+    This class carries out the requests of a TwitterAPI instance on a few worker threads in the order of their priority
+    (lower numbers first, then the earlier deadline). A job is only started when its endpoint has a request left
+    on one of the tokens, until then the workers carry out jobs of other endpoints, such that an exhausted rate limit
+    does not block the whole queue. Paginations are carried out one page per job, jobs of a higher priority are
+    started between two pages of a long crawl.
+
+    desired usage:
+    with Scheduler(api, maxConcurrency=2) as scheduler:
+        backfill = scheduler.submitPages(api.iterUserMentionTimeline(userId=userId, maxTweets=3200), onPage=store)
+        ...
+        tweet = scheduler.submit(api.getTweet, tweetId, rateLimitName="GET_Tweet_byId", deadline=5).result()
+    """
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+    def __init__(self, api, maxConcurrency=4):
+        """
+        :param api: TwitterAPI instance whose TokenPool provides the requests left per endpoint
+        :param maxConcurrency: number of jobs carried out at the same time
+        """
+        self.api = api
+        self._jobs = []
+        self._running = collections.Counter()  # rateLimitName: jobs of the endpoint being carried out
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(maxConcurrency)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _enqueue(self, job, requeue=False):
+        with self._condition:
+            if self._closed and not requeue:
+                raise RuntimeError("Scheduler is closed")
+            job.sequence = next(self._sequence)  # jobs of the same priority take turns
+            self._jobs.append(job)
+            self._condition.notify()
+        return job.future
+
+    @staticmethod
+    def _deadline(deadline):
+        return None if deadline is None else time.monotonic() + deadline
+
+    def submit(self, method, *args, priority=INTERACTIVE, deadline=None, rateLimitName=None, **kwargs):
+        """
+        :param method: method of the TwitterAPI instance, e.g. api.getTweet
+        :param priority: lower numbers are carried out first
+        :param deadline: seconds from now within which the job has to be started, otherwise DeadlineExceededError
+        :param rateLimitName: endpoint of the method, e.g. "GET_Tweet_byId", the job is only started when the endpoint
+                              has a request left
+        :return: concurrent.futures.Future that resolves to the return value of the method
+        """
+        return self._enqueue(_Job(priority, self._deadline(deadline), rateLimitName,
+                                  call=functools.partial(method, *args, **kwargs)))
+
+    def submitPages(self, pages, priority=BACKGROUND, deadline=None, onPage=None, rateLimitName=None):
+        """
+        :param pages: Paginator returned by one of the iter* methods, each page is requested as a separate job
+        :param priority: lower numbers are carried out first
+        :param deadline: seconds from now within which the first page has to be requested
+        :param onPage: function called with every page (in a worker thread), otherwise the pages are collected
+        :param rateLimitName: endpoint of the pages if they are not a Paginator, which knows its own endpoint
+        :return: concurrent.futures.Future that resolves to the list of pages (empty if onPage is given)
+        """
+        if isinstance(pages, Paginator):
+            rateLimitName = pages.rateLimitName
+        return self._enqueue(_Job(priority, self._deadline(deadline), rateLimitName, pages=pages, onPage=onPage))
+
+    def _waitingTime(self, rateLimitName):
+        # caller holds self._condition, None if the endpoint is waiting for running jobs of the same endpoint
+        if rateLimitName is None:
+            return 0.0
+        running = self._running[rateLimitName]
+        if self.api.tokenPool.requestsLeft(rateLimitName) - running >= 1:
+            return 0.0
+        waitingTime = self.api.tokenPool.waitingTime(rateLimitName)
+        if waitingTime > 0:
+            return waitingTime
+        return 0.0 if running == 0 else None
+
+    def _next(self):
+        """
+        caller holds self._condition, removes the job to carry out next from the queue
+        :return: job or None, seconds to wait at most before the queue is checked again
+        """
+        now = time.monotonic()
+        timeout = 1.0
+        for job in sorted(self._jobs, key=_Job.sortKey):
+            if job.future.cancelled():
+                self._jobs.remove(job)
+                continue
+            if job.deadline is not None and job.deadline < now:
+                self._jobs.remove(job)
+                job.future.set_exception(DeadlineExceededError(f"{job.rateLimitName} had no request left in time"))
+                continue
+            waitingTime = self._waitingTime(job.rateLimitName)
+            if waitingTime == 0.0:
+                self._jobs.remove(job)
+                return job, timeout
+            if waitingTime is not None:
+                timeout = min(timeout, waitingTime)
+            if job.deadline is not None:
+                timeout = min(timeout, job.deadline - now)
+        return None, timeout
+
+    def _work(self):
+        while True:
+            with self._condition:
+                job, timeout = self._next()
+                while job is None:
+                    if self._closed and not self._jobs:
+                        return
+                    self._condition.wait(timeout=max(timeout, 0.001))
+                    job, timeout = self._next()
+                if job.rateLimitName is not None:
+                    self._running[job.rateLimitName] += 1
+            try:
+                self._run(job)
+            finally:
+                with self._condition:
+                    if job.rateLimitName is not None:
+                        self._running[job.rateLimitName] -= 1
+                    self._condition.notify_all()  # the response may have changed the requests left
+
+    def _run(self, job):
+        if not job.future.running() and not job.future.set_running_or_notify_cancel():
+            return
+        try:
+            if job.pages is None:
+                job.future.set_result(job.call())
+                return
+            try:
+                page = next(job.pages)
+            except StopIteration:
+                job.future.set_result(job.results)
+                return
+            if job.onPage is not None:
+                job.onPage(page)
+            else:
+                job.results.append(page)
+        except Exception as e:
+            job.future.set_exception(e)
+            return
+        job.deadline = None  # only the first page has to be started in time
+        self._enqueue(job, requeue=True)
+
+    def close(self, wait=True):
+        """
+        stops the workers once the queued jobs are carried out
+        :param wait: if True, blocks until the workers are stopped
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
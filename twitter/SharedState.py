@@ -0,0 +1,210 @@
+import contextlib
+import datetime
+import hashlib
+import sqlite3
+import threading
+
+from dateutil.relativedelta import relativedelta
+
+from twitter.RateLimiter import Bucket, RateLimiter
+
+
+def scopeOf(bearerToken):
+    """
+    :return: key under which the buckets of a token are stored, the token itself is never written to the database
+    """
+    return hashlib.sha256(str(bearerToken).encode()).hexdigest()[:16]
+
+
+class SharedState(object):
+    """
+    This class keeps the rate limit buckets, the monthly Tweet count and the reservations of the Tweet cap in a SQLite
+    database (write-ahead log mode),
+    such that several processes on one host that use the same tokens cooperate on one budget instead of each assuming
+    the full one. Every change is a short IMMEDIATE transaction, i.e. an atomic read-modify-write across processes.
+
+    desired usage (in every worker process):
+    api = TwitterAPI(bearer_token, sharedState=SharedState('/var/tmp/twitterState.sqlite'))
+    """
+    def __init__(self, path='twitterState.sqlite', timeout=30):
+        """
+        :param path: file of the SQLite database, all processes have to use the same file
+        :param timeout: seconds a transaction waits for the database to be unlocked by another process
+        """
+        self.path = path
+        self._lock = threading.Lock()  # one connection is shared by the worker threads of AsyncTwitterAPI
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS buckets (scope TEXT, name TEXT, lim INTEGER, "
+                                 "remaining REAL, reset REAL, inFlight INTEGER, PRIMARY KEY (scope, name))")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS tweetCap (scope TEXT PRIMARY KEY, tweetCount INTEGER, "
+                                 "resetDate TEXT)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS tweetCapReservations (scope TEXT, owner TEXT, "
+                                 "reserved INTEGER, PRIMARY KEY (scope, owner))")
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        context manager, the database is locked for other processes until the block is left
+        :return: the connection
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def loadBucket(self, connection, scope, name, default):
+        """
+        :param default: Bucket returned if the endpoint was never used in this scope
+        :return: Bucket with the stored values
+        """
+        row = connection.execute("SELECT lim, remaining, reset, inFlight FROM buckets WHERE scope = ? AND name = ?",
+                                 (scope, name)).fetchone()
+        if row is None:
+            return default
+        bucket = Bucket(row[0], row[2])
+        bucket.remaining, bucket.inFlight = row[1], row[3]
+        return bucket
+
+    def bucket(self, scope, name, default):
+        """
+        :return: Bucket with the stored values, read outside of a transaction
+        """
+        with self._lock:
+            return self.loadBucket(self._connection, scope, name, default)
+
+    def storeBucket(self, connection, scope, name, bucket):
+        connection.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)",
+                           (scope, name, bucket.limit, bucket.remaining, bucket.reset, bucket.inFlight))
+
+    @staticmethod
+    def _rollOver(tweetCount, resetDate):
+        # a new month of the Tweet cap starts at the reset date
+        today = datetime.datetime.today()
+        while resetDate < today:
+            tweetCount = 0
+            resetDate = resetDate + relativedelta(months=1)
+        return tweetCount, resetDate
+
+    def tweetCount(self, scope, tweetCount, resetDate):
+        """
+        returns the shared Tweet count, the given values are stored if there is none yet
+        :param scope: key of the Tweet cap, e.g. "tweetCap"
+        :param tweetCount: initial count of this process
+        :param resetDate: datetime of the next reset of the Tweet cap
+        :return: Tweet count of all processes, datetime of the next reset
+        """
+        with self.transaction() as connection:
+            row = connection.execute("SELECT tweetCount, resetDate FROM tweetCap WHERE scope = ?", (scope,)).fetchone()
+            if row is not None:
+                tweetCount, resetDate = row[0], datetime.datetime.strptime(row[1], '%Y-%m-%d')
+            tweetCount, resetDate = self._rollOver(tweetCount, resetDate)
+            connection.execute("INSERT OR REPLACE INTO tweetCap VALUES (?, ?, ?)",
+                               (scope, tweetCount, resetDate.strftime('%Y-%m-%d')))
+        return tweetCount, resetDate
+
+    def _loadTweetCount(self, connection, scope):
+        row = connection.execute("SELECT tweetCount, resetDate FROM tweetCap WHERE scope = ?", (scope,)).fetchone()
+        if row is None:
+            row = (0, (datetime.datetime.today() + relativedelta(months=1)).strftime('%Y-%m-%d'))
+        return self._rollOver(row[0], datetime.datetime.strptime(row[1], '%Y-%m-%d'))
+
+    @staticmethod
+    def _reservedTweets(connection, scope):
+        return connection.execute("SELECT COALESCE(SUM(reserved), 0) FROM tweetCapReservations WHERE scope = ?",
+                                  (scope,)).fetchone()[0]
+
+    @staticmethod
+    def _release(connection, scope, owner, numberOfTweets):
+        connection.execute("UPDATE tweetCapReservations SET reserved = reserved - ? WHERE scope = ? AND owner = ?",
+                           (numberOfTweets, scope, owner))
+        connection.execute("DELETE FROM tweetCapReservations WHERE scope = ? AND owner = ? AND reserved <= 0",
+                           (scope, owner))
+
+    def tweetCapUsage(self, scope):
+        """
+        :return: Tweet count of all processes, datetime of the next reset, tweets reserved by all processes
+        """
+        with self._lock:
+            tweetCount, resetDate = self._loadTweetCount(self._connection, scope)
+            return tweetCount, resetDate, self._reservedTweets(self._connection, scope)
+
+    def reserveTweets(self, scope, owner, numberOfTweets, tweetCap):
+        """
+        atomically reserves tweets of the shared Tweet cap, the reservations of all processes are taken into account
+        :param owner: key of the reserving instance, its reservation is released with releaseTweets or addTweets
+        :return: number of tweets reserved (0 if the Tweet cap is used up), Tweet count of all processes, datetime of
+                 the next reset
+        """
+        with self.transaction() as connection:
+            tweetCount, resetDate = self._loadTweetCount(connection, scope)
+            reserved = max(0, min(numberOfTweets, tweetCap - tweetCount - self._reservedTweets(connection, scope)))
+            if reserved > 0:
+                connection.execute("INSERT INTO tweetCapReservations VALUES (?, ?, ?) ON CONFLICT (scope, owner) "
+                                   "DO UPDATE SET reserved = reserved + excluded.reserved", (scope, owner, reserved))
+        return reserved, tweetCount, resetDate
+
+    def releaseTweets(self, scope, owner, numberOfTweets):
+        """
+        returns the unused part of a reservation, see reserveTweets
+        :return: Tweet count of all processes, datetime of the next reset
+        """
+        with self.transaction() as connection:
+            self._release(connection, scope, owner, numberOfTweets)
+            return self._loadTweetCount(connection, scope)
+
+    def addTweets(self, scope, numberOfTweets, owner=None, reserved=0):
+        """
+        atomically adds tweets to the shared Tweet count, see tweetCount
+        :param owner: key of the instance that reserved the tweets, see reserveTweets
+        :param reserved: how many of the tweets were reserved by the owner, they are taken from its reservation
+        :return: Tweet count of all processes after the addition, datetime of the next reset
+        """
+        with self.transaction() as connection:
+            tweetCount, resetDate = self._loadTweetCount(connection, scope)
+            tweetCount += numberOfTweets
+            connection.execute("INSERT OR REPLACE INTO tweetCap VALUES (?, ?, ?)",
+                               (scope, tweetCount, resetDate.strftime('%Y-%m-%d')))
+            if owner is not None and reserved > 0:
+                self._release(connection, scope, owner, reserved)
+        return tweetCount, resetDate
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose buckets are stored in a SharedState, every process that uses the same database and token
+    takes its requests from the same buckets
+    """
+    def __init__(self, sharedState, scope="default", authContext="app", limits=None):
+        """
+        :param sharedState: SharedState holding the buckets
+        :param scope: key of the token, see scopeOf
+        """
+        super().__init__(authContext=authContext, limits=limits)
+        self.sharedState = sharedState
+        self.scope = scope
+
+    def _default(self, name):
+        return Bucket(self.limits.get(name, 15), self._firstReset)
+
+    def bucket(self, name):
+        """
+        :return: snapshot of the stored Bucket of the endpoint, changes are not written back
+        """
+        return self.sharedState.bucket(self.scope, name, self._default(name))
+
+    @contextlib.contextmanager
+    def _locked(self, name):
+        with self.sharedState.transaction() as connection:
+            bucket = self.sharedState.loadBucket(connection, self.scope, name, self._default(name))
+            yield bucket
+            self.sharedState.storeBucket(connection, self.scope, name, bucket)
@@ -0,0 +1,275 @@
+import asyncio
+import datetime
+import threading
+import time
+import uuid
+
+from dateutil.relativedelta import relativedelta
+
+from twitter.Error import LimitExceedError, TweetCapExceedingError
+from twitter.RateLimiter import RateLimiter
+from twitter.SharedState import SharedRateLimiter, scopeOf
+from twitter.TweetCapLog import TweetCapLog
+
+
+class Credential(object):
+    """
+    one bearer token of a TokenPool with its own rate limit buckets and Tweet cap
+    """
+    def __init__(self, bearerToken, limiter, tweetCap=500_000, tweetCount=0, tweetCapResetDate=None,
+                 sharedState=None, tweetCapLog=None):
+        """
+        :param bearerToken: bearer token of the project/app
+        :param limiter: RateLimiter that holds the buckets of this token
+        :param tweetCap: monthly Tweet cap of the project
+        :param tweetCount: tweets already retrieved with this token in the current month, only used if neither the
+                           sharedState nor the log has a count yet
+        :param tweetCapResetDate: datetime of the next reset of the Tweet cap, by default in a month
+        :param sharedState: SharedState that keeps the Tweet count of the token (under scopeOf(bearerToken))
+        :param tweetCapLog: TweetCapLog of this token, None keeps the count in memory only
+        """
+        self.bearerToken = bearerToken
+        self.limiter = limiter
+        self.tweetCap = tweetCap
+        self.sharedState = sharedState
+        self.tweetCapLog = tweetCapLog
+        self.reservedTweets = 0  # reserved by running paginations of this instance but not received yet
+        self._owner = uuid.uuid4().hex  # key of the reservations of this instance in the sharedState
+        self._lock = threading.Lock()
+
+        record = tweetCapLog.load() if tweetCapLog is not None else None
+        if record is not None:
+            tweetCount, tweetCapResetDate = record
+        if tweetCapResetDate is None:
+            tweetCapResetDate = datetime.datetime.today() + relativedelta(months=1)
+        self.tweetCount, self.tweetCapResetDate = tweetCount, tweetCapResetDate
+        if sharedState is not None:
+            self.tweetCount, self.tweetCapResetDate = sharedState.tweetCount(scopeOf(bearerToken), tweetCount,
+                                                                             tweetCapResetDate)
+        else:
+            self._resetTime()
+            if tweetCapLog is not None and record != (self.tweetCount, self.tweetCapResetDate):
+                tweetCapLog.append(self.tweetCount, self.tweetCapResetDate)
+
+    def _resetTime(self):
+        # a new month of the Tweet cap starts at the reset date
+        today = datetime.datetime.today()
+        while self.tweetCapResetDate <= today:
+            self.tweetCount = 0
+            self.tweetCapResetDate = self.tweetCapResetDate + relativedelta(months=1)
+
+    @property
+    def remainingTweets(self):
+        """
+        tweets left in the Tweet cap of the token, without the ones reserved by running paginations (of all processes
+        with a sharedState)
+        """
+        if self.sharedState is not None:
+            self.tweetCount, self.tweetCapResetDate, reserved = self.sharedState.tweetCapUsage(
+                scopeOf(self.bearerToken))
+            return max(0, self.tweetCap - self.tweetCount - reserved)
+        return max(0, self.tweetCap - self.tweetCount - self.reservedTweets)
+
+    def reserve(self, numberOfTweets):
+        """
+        reserves tweets of the Tweet cap of the token, see APIRateLimit.reserve
+        :return: number of tweets reserved, less than numberOfTweets if the token has less left
+        """
+        with self._lock:
+            if self.sharedState is not None:
+                reserved, self.tweetCount, self.tweetCapResetDate = self.sharedState.reserveTweets(
+                    scopeOf(self.bearerToken), self._owner, numberOfTweets, self.tweetCap)
+            else:
+                self._resetTime()
+                reserved = min(numberOfTweets, self.remainingTweets)
+            if reserved <= 0:
+                raise TweetCapExceedingError(f"Tweet Cap of {self!r} exceeded. Wait until Reset Date")
+            self.reservedTweets += reserved
+            return reserved
+
+    def release(self, numberOfTweets):
+        """
+        returns the unused part of a reservation
+        """
+        with self._lock:
+            numberOfTweets = min(numberOfTweets, self.reservedTweets)
+            self.reservedTweets -= numberOfTweets
+            if self.sharedState is not None and numberOfTweets > 0:
+                self.tweetCount, self.tweetCapResetDate = self.sharedState.releaseTweets(
+                    scopeOf(self.bearerToken), self._owner, numberOfTweets)
+
+    def countTowardsTweetCap(self, numberOfTweetsRequested, reserved=0):
+        """
+        :param numberOfTweetsRequested: tweets received with this token
+        :param reserved: how many of them were reserved before, they are taken from the reservation
+        """
+        with self._lock:
+            reserved = min(reserved, self.reservedTweets)
+            self.reservedTweets -= reserved
+            if self.sharedState is not None:
+                self.tweetCount, self.tweetCapResetDate = self.sharedState.addTweets(
+                    scopeOf(self.bearerToken), numberOfTweetsRequested, owner=self._owner, reserved=reserved)
+                return
+            self._resetTime()
+            self.tweetCount += numberOfTweetsRequested
+            if self.tweetCapLog is not None:
+                self.tweetCapLog.append(self.tweetCount, self.tweetCapResetDate)
+
+    def __repr__(self):
+        # never show the token itself
+        return f"Credential(...{str(self.bearerToken)[-4:]}, tweetCount={self.tweetCount})"
+
+
+class TokenPool(object):
+    """
+    This class holds the bearer tokens of several projects/apps. Every token has its own rate limit buckets and Tweet
+    cap, each request is carried out with the token that has the most requests left for the endpoint. If no token has
+    a request left, the request waits for the token whose window is reset first.
+    A paginated request stays on the token of its first page (see Paginator), all other requests are spread over the
+    tokens, e.g. crawling the followers of n users (15 pages per 15 minutes per token) is n times faster with n tokens.
+    Paginations that count towards the Tweet cap reserve their tweets from the cap of one token and skip the tokens
+    whose cap is used up. The Tweet count of each token is kept in the sharedState or in a log of its own.
+
+    desired usage:
+    api = TwitterAPI(TokenPool([bearerToken1, bearerToken2, bearerToken3]))
+    or
+    api = TwitterAPI([bearerToken1, bearerToken2, bearerToken3])
+    """
+    def __init__(self, bearerTokens, authContext="app", tweetCap=500_000, limiters=None, sharedState=None,
+                 tweetCapLog=None):
+        """
+        :param bearerTokens: list of bearer tokens, the first one is used for streams and filter rules
+        :param authContext: "app" or "user", see RateLimiter
+        :param tweetCap: monthly Tweet cap of each project
+        :param limiters: list of RateLimiter instances (one per token) instead of new ones
+        :param sharedState: SharedState in which the buckets and the Tweet count of the tokens are kept, such that all
+                            processes using the same database share the rate limits and the Tweet cap of a token
+        :param tweetCapLog: TweetCapLog (or the path of its file) next to which the Tweet count of each token is logged
+                            if there is no sharedState, with a single token only the log of APIRateLimit is kept
+        """
+        if not isinstance(bearerTokens, (list, tuple)):
+            bearerTokens = [bearerTokens]
+        if not bearerTokens:
+            raise ValueError("Please provide at least one bearer token")
+        if limiters is None and sharedState is not None:
+            limiters = [SharedRateLimiter(sharedState, scope=scopeOf(bearerToken), authContext=authContext)
+                        for bearerToken in bearerTokens]
+        elif limiters is None:
+            limiters = [RateLimiter(authContext=authContext) for _ in bearerTokens]
+        if isinstance(tweetCapLog, str):
+            tweetCapLog = TweetCapLog(tweetCapLog)
+        if len(bearerTokens) == 1:
+            # the count of the only token is the one of the project, see APIRateLimit
+            sharedState, tweetCapLog = None, None
+        self.credentials = [Credential(bearerToken, limiter, tweetCap=tweetCap, sharedState=sharedState,
+                                       tweetCapLog=tweetCapLog.scoped(scopeOf(bearerToken)) if tweetCapLog else None)
+                            for bearerToken, limiter in zip(bearerTokens, limiters)]
+
+    def __len__(self):
+        return len(self.credentials)
+
+    @property
+    def primary(self):
+        return self.credentials[0]
+
+    @property
+    def tweetCap(self):
+        """
+        Tweet cap of all tokens, i.e. the total of APIRateLimit, reservations are taken from the cap of one token
+        """
+        return sum(credential.tweetCap for credential in self.credentials)
+
+    def requestsLeft(self, name):
+        """
+        :param name: endpoint, e.g. "GET_Users_Followers"
+        :return: requests left for the endpoint summed over all tokens
+        """
+        return sum(credential.limiter.requestsLeft(name) for credential in self.credentials)
+
+    def waitingTime(self, name):
+        """
+        :param name: endpoint, e.g. "GET_Users_Followers"
+        :return: seconds until a request of the endpoint can be taken from one of the tokens, 0 if one is left
+        """
+        now = time.time()
+        waitingTimes = []
+        for credential in self.credentials:
+            bucket = credential.limiter.bucket(name)
+            if bucket.remaining >= 1 or bucket.reset <= now:
+                return 0.0
+            waitingTimes.append(bucket.reset - now)
+        return min(waitingTimes)
+
+    def _byHeadroom(self, name, countsTowardsTweetCap=False):
+        # most requests left first, among equals the token with more Tweet cap left
+        candidates = self.credentials
+        if countsTowardsTweetCap:
+            candidates = [credential for credential in candidates if credential.remainingTweets > 0]
+        return sorted(candidates, key=lambda credential: (credential.limiter.requestsLeft(name),
+                                                          credential.remainingTweets), reverse=True)
+
+    def choose(self, name):
+        """
+        selects the token of a request whose tweets count towards the Tweet cap, before they are reserved
+        :param name: endpoint, e.g. "GET_Tweets_byUser"
+        :return: Credential with the most requests left for the endpoint among the ones with Tweet cap left
+        """
+        candidates = self._byHeadroom(name, countsTowardsTweetCap=True)
+        if not candidates:
+            raise TweetCapExceedingError(f"Tweet Cap of all {len(self)} tokens exceeded. Wait until Reset Date")
+        return candidates[0]
+
+    def _tryAcquire(self, name, maxWait):
+        """
+        :return: Credential that took a request of the endpoint and 0, otherwise the Credential that is reset first
+                 and the seconds until its reset
+        """
+        waitingTimes = []
+        for candidate in self._byHeadroom(name):
+            waitingTime = candidate.limiter._tryAcquire(name, None)
+            if waitingTime == 0.0:
+                return candidate, 0.0
+            waitingTimes.append((waitingTime, candidate))
+        waitingTime, candidate = min(waitingTimes, key=lambda entry: entry[0])
+        if maxWait is not None and waitingTime > maxWait:
+            raise LimitExceedError(f"Rate limit of {name} exceeded for all {len(self)} tokens, "
+                                   f"the first is reset in {waitingTime:.0f} seconds")
+        return candidate, waitingTime
+
+    def acquire(self, name, maxWait=None, credential=None):
+        """
+        takes one request of the endpoint from the token with the most headroom, blocks until a window is reset if
+        no token has a request left
+        :param name: endpoint, e.g. "GET_Users_Followers"
+        :param maxWait: seconds to wait at most, LimitExceedError is raised if every reset is further away
+        :param credential: Credential the request has to be carried out with (e.g. next page of a pagination)
+        :return: Credential that carries out the request, seconds waited
+        """
+        if credential is not None:
+            return credential, credential.limiter.acquire(name, maxWait=maxWait)
+        waited = 0.0
+        while True:
+            candidate, waitingTime = self._tryAcquire(name, None if maxWait is None else maxWait - waited)
+            if waitingTime == 0.0:
+                return candidate, waited
+            reset = candidate.limiter.resetTime(name)
+            time.sleep(waitingTime)
+            waited += waitingTime
+            candidate.limiter._windowPassed(name, reset)
+
+    async def acquireAsync(self, name, maxWait=None, credential=None):
+        """
+        awaitable variant of acquire, the event loop keeps running while waiting for the reset
+        :return: Credential that carries out the request, seconds waited
+        """
+        if credential is not None:
+            return credential, await credential.limiter.acquireAsync(name, maxWait=maxWait)
+        waited = 0.0
+        while True:
+            candidate, waitingTime = self._tryAcquire(name, None if maxWait is None else maxWait - waited)
+            if waitingTime == 0.0:
+                return candidate, waited
+            reset = candidate.limiter.resetTime(name)
+            await asyncio.sleep(waitingTime)
+            waited += waitingTime
+            candidate.limiter._windowPassed(name, reset)
@@ -0,0 +1,50 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class Transport(object):
+    """
+    This class owns the HTTP connections used by a TwitterAPI instance.
+    A single keep-alive session is reused for every request, such that consecutive pages of the same endpoint
+    don't pay a new TCP + TLS handshake each.
+    Any object with the same get/post/close methods can be handed to TwitterAPI instead.
+    """
+    def __init__(self, poolConnections=4, poolSize=10, connectTimeout=5, readTimeout=30, gzip=True, maxRetries=0):
+        """
+        :param poolConnections: number of hosts for which a connection pool is kept
+        :param poolSize: number of connections kept alive per host
+        :param connectTimeout: seconds to wait for the connection to be established
+        :param readTimeout: seconds to wait between bytes of the response
+        :param gzip: if True, compressed responses are negotiated with the server
+        :param maxRetries: number of retries on connection errors (not on HTTP error codes)
+        """
+        self.timeout = (connectTimeout, readTimeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=poolConnections, pool_maxsize=poolSize, max_retries=maxRetries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if gzip:
+            self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        else:
+            self.session.headers["Accept-Encoding"] = "identity"
+
+    def get(self, url, headers=None, params=None, stream=False, timeout=None):
+        """
+        :param timeout: overrides the (connect, read) timeout of the transport for this request
+        :return: requests.Response
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return self.session.get(url, headers=headers, params=params, stream=stream, timeout=timeout)
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        """
+        :param timeout: overrides the (connect, read) timeout of the transport for this request
+        :return: requests.Response
+        """
+        if timeout is None:
+            timeout = self.timeout
+        return self.session.post(url, headers=headers, json=json, timeout=timeout)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,92 @@
+import datetime
+import json
+import os
+
+
+class TweetCapLog(object):
+    """
+    This class keeps the Tweet count of the current month in a JSON lines file, such that a new TwitterAPI continues
+    with the count at which the last one stopped. Every change appends one small record, only the last record is read
+    when the log is loaded. Once the file is larger than maxSize bytes it is compacted to its last record.
+    The tweetCapLog.json of earlier versions (a single document with a list of records) is read if there is no log yet.
+
+    desired usage:
+    api = TwitterAPI(bearer_token, tweetCapLog=TweetCapLog('/var/log/twitter/tweetCap.jsonl'))
+    """
+    def __init__(self, path='tweetCapLog.jsonl', maxSize=64 * 1024):
+        """
+        :param path: file of the log
+        :param maxSize: bytes the log may grow to before it is compacted
+        """
+        self.path = path
+        self.maxSize = maxSize
+        self.legacyPath = os.path.join(os.path.dirname(path), 'tweetCapLog.json')
+
+    def scoped(self, scope):
+        """
+        :param scope: key of a token, see scopeOf
+        :return: TweetCapLog of the token next to this log, e.g. tweetCapLog.<scope>.jsonl
+        """
+        root, extension = os.path.splitext(self.path)
+        log = TweetCapLog(f"{root}.{scope}{extension}", maxSize=self.maxSize)
+        log.legacyPath = None  # the legacy file holds the count of the project
+        return log
+
+    def load(self):
+        """
+        :return: tweet count, datetime of the next reset of the most recent record, None if there is no record
+        """
+        record = self._lastRecord()
+        if record is None:
+            record = self._legacyRecord()
+            if record is None:
+                return None
+            resetDate = datetime.datetime.strptime(record['ResetDate'], '%Y-%m-%d')
+            self.append(record['tweetCount'], resetDate)  # migrated, the legacy file is not read again
+            return record['tweetCount'], resetDate
+        return record['tweetCount'], datetime.datetime.strptime(record['ResetDate'], '%Y-%m-%d')
+
+    def _lastRecord(self):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))  # records are short, the last one is within the tail
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        for line in reversed(lines):
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue  # cut off by the tail or by a process that was killed while writing
+        return None
+
+    def _legacyRecord(self):
+        if self.legacyPath is None:
+            return None
+        try:
+            with open(self.legacyPath, 'r') as f:
+                record = json.load(fp=f)['data'][-1]
+            datetime.datetime.strptime(record['ResetDate'], '%Y-%m-%d')
+            return record
+        except (FileNotFoundError, ValueError, KeyError, IndexError, TypeError):
+            return None  # the old log was rewritten at exit and is often incomplete
+
+    def append(self, tweetCount, resetDate):
+        """
+        :param tweetCount: tweets retrieved in the current month
+        :param resetDate: datetime of the next reset of the Tweet cap
+        """
+        record = json.dumps({"logDate": datetime.datetime.today().strftime('%Y-%m-%d'), "tweetCount": tweetCount,
+                             "ResetDate": resetDate.strftime('%Y-%m-%d')}, separators=(',', ':')) + '\n'
+        with open(self.path, 'a') as f:
+            f.write(record)
+            size = f.tell()
+        if size > self.maxSize:
+            self._compact(record)
+
+    def _compact(self, record):
+        temporaryPath = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporaryPath, 'w') as f:
+            f.write(record)
+        os.replace(temporaryPath, self.path)
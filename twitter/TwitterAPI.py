@@ -1,19 +1,34 @@
 import requests
 import math
-import json
 import time
+import functools
+import threading
+import itertools
 
 
 from concurrent.futures import ThreadPoolExecutor
 import concurrent.futures
-
-from twitter.TwitterEntities import TwitterUser, Tweet, Poll, Place, Media
+from http.client import HTTPException
+
+from twitter.TwitterEntities import TwitterUser, Tweet
+from twitter.ExpansionIndex import ExpansionIndex
+from twitter.IdentityMap import IdentityMap
+from twitter.LookupBatcher import LookupBatcher
+from twitter.ResponseCache import ResponseCache
+from twitter.EntityCache import EntityCache
+from twitter.TokenPool import TokenPool
+from twitter.SharedState import SharedState
+from twitter.CheckpointStore import CheckpointStore, StreamCheckpoint
 import twitter.utils as utils
 
 from twitter.Error import (APIError, EmptyPageError, LimitExceedError, UnsavedDataLimitExceedError,
                            TweetCapExceedingError, BadRequest, Unauthorized, Forbidden, NotFound, TooManyRequests, TwitterServerError)
 from twitter.APIRateLimit import APIRateLimit
 from twitter.NotReturnedData import NotReturnedData
+from twitter.Transport import Transport
+from twitter.Paginator import Paginator
+from twitter.Page import Page
+from twitter.Columns import TweetColumns, UserColumns
 
 """
     x-rate-limit-limit: the rate limit ceiling for that given endpoint
@@ -24,13 +39,91 @@ from twitter.NotReturnedData import NotReturnedData
 
 class TwitterAPI(object):
 
-    def __init__(self, bearer_token, tweetCapResetDate=None, tweetCount=None, tweetCap=500_000):
+    _baseUrl = "https://api.twitter.com/2/"
+    _maxIdsPerLookup = 100  # ids per request of the user/tweet look-up endpoints
+    _maxLookupWorkers = 32  # threads of the pool shared by the bulk look-ups, started on demand
+
+    def __init__(self, bearer_token, tweetCapResetDate=None, tweetCount=None, tweetCap=500_000, transport=None,
+                 poolSize=10, connectTimeout=5, readTimeout=30, lazyEntities=False, identityMap=False,
+                 batchLookups=False, batchWindow=0.02, responseCache=None, entityCache=None, authContext="app",
+                 maxRateLimitWait=900, sharedState=None, tweetCapLog='tweetCapLog.jsonl', showProgress=None,
+                 prefetchPages=False, checkpointStore=None):
         """
         please specify tweetCapResetDate according to the format "%Y-%m-%d", so e.g. '2021.01.30'
-        """
-        self.apiRateLimit = APIRateLimit(tweetCap=tweetCap, tweetCount=tweetCount, tweetCapResetDate=tweetCapResetDate)
+        :param bearer_token: bearer token, a list of bearer tokens or a TokenPool, with several tokens each request is
+                             carried out with the token that has the most requests left for its endpoint
+                             (tweetCap is the cap of each token), streams and filter rules use the first token
+        :param authContext: "app" for a bearer token, "user" for a user context token, selects the default rate limits
+        :param maxRateLimitWait: seconds a request waits at most for the rate limit window of its endpoint to be
+                                 reset, LimitExceedError is raised if the reset is further away (0 never waits)
+        :param sharedState: SharedState (or True for one in 'twitterState.sqlite') in which the rate limits and the
+                            Tweet count are kept, such that several processes on one host share one budget
+        :param tweetCapLog: TweetCapLog (or the path of its file) in which the Tweet count is recorded, None keeps the
+                            count in memory only
+        :param showProgress: if True, the Tweet count is shown as a progress bar, by default only if stderr is a terminal
+        :param prefetchPages: if True, paginated functions request the next page while the current page is turned into
+                              entities, see Paginator
+        :param checkpointStore: CheckpointStore (or True for one in 'twitterCheckpoints.sqlite') that keeps the progress
+                                of the calls with resume=, by default one is created with the first such call
+        :param lazyEntities: if True, Tweet and TwitterUser instances keep their json derived dict and decode
+                             nested fields (entities, public_metrics, text) only on first access
+        :param identityMap: if True (or an IdentityMap instance), each user/tweet is represented by a single instance
+                            across all calls, fields of later responses are merged into the existing instance
+        :param batchLookups: if True, concurrent getUserById/getUserByUsername/getTweet calls (from several threads or
+                             AsyncTwitterAPI) are coalesced into requests of the batch endpoints, see LookupBatcher
+        :param batchWindow: seconds a coalesced look-up waits for further look-ups before the batch is sent
+        :param responseCache: ResponseCache (or True for one in 'twitterCache.sqlite') that serves repeated requests
+                              without spending rate limit and Tweet cap
+        :param entityCache: EntityCache (or True for one with the default size and ttl) that answers the look-ups of
+                            users and tweets that were looked up before without a request
+        :param transport: object providing get/post/close, by default a pooled keep-alive Transport is created
+        :param poolSize: connections kept alive per host (only used if no transport is provided)
+        :param connectTimeout: seconds (only used if no transport is provided)
+        :param readTimeout: seconds (only used if no transport is provided)
+        """
+        if sharedState is True:
+            sharedState = SharedState()
+        self.sharedState = sharedState
+        if not isinstance(bearer_token, TokenPool):
+            bearer_token = TokenPool(bearer_token, authContext=authContext, tweetCap=tweetCap, sharedState=sharedState,
+                                     tweetCapLog=tweetCapLog)
+        self.tokenPool = bearer_token
+        self.apiRateLimit = APIRateLimit(tweetCap=self.tokenPool.tweetCap, tweetCount=tweetCount,
+                                         tweetCapResetDate=tweetCapResetDate, authContext=authContext,
+                                         limiter=self.tokenPool.primary.limiter, sharedState=sharedState,
+                                         tweetCapLog=tweetCapLog, showProgress=showProgress)
+        if len(self.tokenPool) == 1:
+            # a single token continues with the count of the project
+            self.tokenPool.primary.tweetCount = self.apiRateLimit.tweetCount
+            self.tokenPool.primary.tweetCapResetDate = self.apiRateLimit.tweetCapResetDate
+        self.maxRateLimitWait = maxRateLimitWait
+        self.prefetchPages = prefetchPages
+        if checkpointStore is True:
+            checkpointStore = CheckpointStore()
+        self.checkpointStore = checkpointStore
         self.NotReturnedData = NotReturnedData()
-        self.__bearer_token = bearer_token
+        self.__bearer_token = self.tokenPool.primary.bearerToken
+        if transport is None:
+            transport = Transport(poolSize=poolSize, connectTimeout=connectTimeout, readTimeout=readTimeout)
+        self._transport = transport
+        self.lazyEntities = lazyEntities
+        if identityMap is True:
+            identityMap = IdentityMap()
+        elif identityMap is False:
+            identityMap = None
+        self.identityMap = identityMap
+        self.batchLookups = batchLookups
+        self.batchWindow = batchWindow
+        self._batchers = {}
+        self._batchersLock = threading.Lock()
+        self._lookupExecutor = None
+        self._acquired = threading.local()  # request acquired by AsyncTwitterAPI for the call on this thread
+        if responseCache is True:
+            responseCache = ResponseCache()
+        self.responseCache = responseCache
+        if entityCache is True:
+            entityCache = EntityCache()
+        self.entityCache = entityCache
         self._userFields = "created_at,description,entities,id,location,name,pinned_tweet_id,profile_image_url,protected,public_metrics,url,username,verified,withheld"
         # promoted_metrics,organic_metrics,private_metrics currently not part of tweetFields
         self._tweetFields = "attachments,author_id,context_annotations,conversation_id,created_at,entities,geo,id,in_reply_to_user_id,lang,public_metrics,possibly_sensitive,referenced_tweets,reply_settings,source,text,withheld"
@@ -48,18 +141,41 @@ class TwitterAPI(object):
         header = {"Authorization": f"Bearer {bearer_token}"}
         return header
 
-    def _makeRequest(self, url_param, params=None):
+    def close(self):
+        """
+        sends look-ups that are still waiting for their batch and releases the pooled connections of the transport
+        """
+        for batcher in list(self._batchers.values()):
+            batcher.flush()
+        with self._batchersLock:
+            executor, self._lookupExecutor = self._lookupExecutor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self._transport.close()
+
+    def _makeRequest(self, url_param, params=None, rateLimitName=None, maxWait=None, credential=None, cache=None):
         """
         see each function to know the number of allowed requests per 15 minutes
         carries out the actual request via API endpoint of twitter API v2 early release and the library requests
         :param url_param: specified by the function that carries out the request e.g. get_followers: id + "/" + "following"
         :param params: not mandatory, can be used to specify the response with more detailed information about certain aspects
-        :return: result of request as a dictionary
-        """
+        :param rateLimitName: suffix of the RequestsLeft_* attribute of the endpoint, if given a request is acquired
+                              from the rate limit of the endpoint and the x-rate-limit headers of the response are stored
+        :param maxWait: seconds to wait at most for the rate limit, by default maxRateLimitWait of the instance
+        :param credential: Credential of the TokenPool to use, by default the one with the most requests left
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, by default the mode of the enclosing
+                      ResponseCache.refresh()/bypass() context
+        :return: Page with the decoded body and the headers of the response
+        """
+        cache = self._cacheMode(cache)
+        if self.responseCache is not None:
+            page = self.responseCache.get(url_param, params, mode=cache)
+            if page is not None:
+                return page
         if not params:
             params = ""
-        response = requests.get(f"https://api.twitter.com/2/{url_param}",
-                                headers=self._bearerOauth(self.__bearer_token), params=params)
+        response, credential, secondsWaited = self._send("get", f"{self._baseUrl}{url_param}", rateLimitName,
+                                                         maxWait=maxWait, credential=credential, params=params)
 
         if response.status_code == 400:
             raise BadRequest(response)
@@ -74,24 +190,90 @@ class TwitterAPI(object):
         if response.status_code >= 500:
             raise TwitterServerError(response)
 
-        return response
+        if self.responseCache is not None:
+            self.responseCache.put(url_param, params, response.content, response.headers, mode=cache)
+        page = Page.fromResponse(response)
+        page.secondsWaited = secondsWaited
+        page.credential = credential
+        return page
+
+    def _send(self, method, url, rateLimitName=None, maxWait=None, credential=None, **kwargs):
+        """
+        sends a request with a request of the rate limit of its endpoint, the x-rate-limit headers of the response are
+        stored in the bucket of the token that carried out the request (requests, streams and filter rules)
+        :param method: "get" or "post" of the transport
+        :param rateLimitName: see _makeRequest, None sends the request without the rate limit
+        :param maxWait: seconds to wait at most for the rate limit, by default maxRateLimitWait of the instance
+        :param credential: Credential of the TokenPool to use, by default the one with the most requests left
+        :param kwargs: passed on to the transport, e.g. params, json, stream, timeout
+        :return: response, Credential that carried out the request, seconds waited for the rate limit
+        """
+        secondsWaited = 0.0
+        acquired = self._acquired.__dict__.get('request')
+        if rateLimitName is not None and acquired is not None and acquired[0] == rateLimitName and \
+                credential in (None, acquired[1]):
+            del self._acquired.request
+            _, credential, secondsWaited = acquired
+        elif rateLimitName is not None:
+            credential, secondsWaited = self.tokenPool.acquire(
+                rateLimitName, maxWait=self.maxRateLimitWait if maxWait is None else maxWait, credential=credential)
+        elif credential is None:
+            credential = self.tokenPool.primary
+        try:
+            response = getattr(self._transport, method)(url, headers=self._bearerOauth(credential.bearerToken),
+                                                        **kwargs)
+        except Exception:
+            if rateLimitName is not None:
+                credential.limiter.update(rateLimitName, {}, acquired=True)  # releases the request
+            raise
+        if rateLimitName is not None:
+            # before the status is checked, such that a 429 response empties the bucket until the reset
+            credential.limiter.update(rateLimitName, response.headers, acquired=True)
+        return response, credential, secondsWaited
+
+    def _withAcquired(self, rateLimitName, credential, secondsWaited, call):
+        """
+        carries out call with a request of the endpoint that was already acquired, e.g. by AsyncTwitterAPI which
+        awaits the rate limit on the event loop instead of blocking a worker thread
+        the next _send of the endpoint on this thread uses the request, it is given back if none is sent
+        :param credential: Credential the request was acquired from
+        :param secondsWaited: seconds waited for the request, reported by the Page of the response
+        :param call: function without arguments that carries out the request
+        :return: whatever call returns
+        """
+        self._acquired.request = (rateLimitName, credential, secondsWaited)
+        try:
+            return call()
+        finally:
+            if self._acquired.__dict__.pop('request', None) is not None:
+                credential.limiter.release(rateLimitName)
+
+    def _countTowardsTweetCap(self, page, numberOfTweetsRequested, reserved=0):
+        """
+        counts the tweets of a page towards the Tweet cap of the project and of the token that requested the page
+        :param reserved: how many of the tweets were reserved by the Paginator
+        """
+        self.apiRateLimit.countTowardsTweetCap(numberOfTweetsRequested=numberOfTweetsRequested, reserved=reserved)
+        if page.credential is not None:
+            page.credential.countTowardsTweetCap(numberOfTweetsRequested, reserved=reserved)
 
-    def _getResponse(self, str_input, params):
+    def _getResponse(self, str_input, params, rateLimitName=None):
         """
         will be deprecated
         is about to be deprecated, find usages should give 0 at the end
         :param str_input:
         :param params:
+        :param rateLimitName: see _makeRequest
         :return:
         """
-        response = self._makeRequest(str_input, params)
-        self._checkError(response=response)
-        return response
+        page = self._makeRequest(str_input, params, rateLimitName=rateLimitName)
+        self._checkError(page=page)
+        return page
 
     @staticmethod
-    def _checkError(response):
-        if 'errors' in response.keys() and 'data' not in response.keys():  # errors is always a key for pinned tweets that were not found
-            raise APIError(response['errors'][0]['message'])
+    def _checkError(page):
+        if page.errors and page.data is None:  # errors is always a key for pinned tweets that were not found
+            raise APIError(page.errors[0]['message'])
 
     def _createParamsFollows(self, firstPage=True, token=None, withExpansion=None,
                              entriesPerPage=1000):
@@ -106,45 +288,63 @@ class TwitterAPI(object):
 
         return params
 
-    def _getFollowersResponse(self, user, firstPage=True, token=None, withExpansion=None,
-                              entriesPerPage=1000):
-        str_input = "users/" + str(user.id) + "/" + "followers"
-        params = self._createParamsFollows(firstPage=firstPage, token=token, withExpansion=withExpansion,
-                                           entriesPerPage=entriesPerPage)
-        response = self._makeRequest(url_param=str_input, params=params)
-        return response
+    def _createUser(self, data):
+        user = TwitterUser.createFromDict(data, lazy=self.lazyEntities)
+        return user if self.identityMap is None else self.identityMap.resolve(user)
 
-    def _getFriendsResponse(self, user, firstPage=True, token=None, withExpansion=None,
-                            entriesPerPage=1000):
-        str_input = "users/" + str(user.id) + "/" + "following"
-        params = self._createParamsFollows(firstPage=firstPage, token=token, withExpansion=withExpansion,
-                                           entriesPerPage=entriesPerPage)
-        response = self._makeRequest(url_param=str_input, params=params)
-        return response
+    def _createTweet(self, data, pinned=False, textNormalised=False):
+        tweet = Tweet.createFromDict(data=data, pinned=pinned, lazy=self.lazyEntities, textNormalised=textNormalised)
+        return tweet if self.identityMap is None else self.identityMap.resolve(tweet)
 
-    @staticmethod
-    def _pinnedTweetsToDict(response):
+    def _cacheMode(self, cache):
+        """
+        :param cache: None, 'bypass' or 'refresh' given to a function
+        :return: the given mode, otherwise the one of the enclosing ResponseCache.refresh()/bypass() block, such that
+                 it can be handed to requests carried out on other threads
+        """
+        if cache not in ResponseCache.modes:
+            raise APIError(f"cache has to be one of {ResponseCache.modes}, not {cache!r}")
+        if cache is None and self.responseCache is not None:
+            return self.responseCache.currentMode()
+        return cache
+
+    def _cachedEntity(self, kind, key, cache=None):
+        """
+        :param kind: "userId", "userName" or "tweetId"
+        :param cache: mode of the call, the EntityCache is only read without a mode
+        :return: the TwitterUser/Tweet of the EntityCache, None if there is no cache or the entity is not cached
+        """
+        if self.entityCache is None or not key or cache is not None:
+            return None
+        if kind == "userName":
+            return self.entityCache.getByUsername(str(key))
+        return self.entityCache.get(Tweet if kind == "tweetId" else TwitterUser, key)
+
+    def _storeEntities(self, instances, cache=None):
+        if self.entityCache is not None and cache != 'bypass':
+            for instance in instances:
+                self.entityCache.put(instance)
+
+    def _pinnedTweetsToDict(self, page):
         tweets = {}
-        for pinnedTweet in response['includes']['tweets']:  # pinnedTweet is a dict
+        for pinnedTweet in page.includes.get('tweets', []):  # pinnedTweet is a dict
             author_id = pinnedTweet['author_id']
-            tweets[author_id] = Tweet.createFromDict(pinnedTweet, pinned=True)  # keys are author id's easy to match
+            tweets[author_id] = self._createTweet(pinnedTweet, pinned=True)  # keys are author id's easy to match
         return tweets
 
-    @staticmethod
-    def _followersToDict(user, response):
+    def _followersToDict(self, user, page):
         followers = {}
-        for follower in response['data']:
-            followerInstance = TwitterUser.createFromDict(follower)
+        for follower in page.data:
+            followerInstance = self._createUser(follower)
             followerInstance.saveSingleFriend(user)
             Id = follower['id']
             followers[Id] = followerInstance
         return followers
 
-    @staticmethod
-    def _friendsToDict(user, response):
+    def _friendsToDict(self, user, page):
         friends = {}
-        for friend in response['data']:
-            friendsInstance = TwitterUser.createFromDict(friend)
+        for friend in page.data:
+            friendsInstance = self._createUser(friend)
             friendsInstance.saveSingleFollower(user)
             Id = friend['id']
             friends[Id] = friendsInstance
@@ -197,66 +397,159 @@ class TwitterAPI(object):
                     "If providing percentage, please provide a value between 0 and 100%. Sorry for this inconvenience")
         return iterations
 
-    def getFollowers(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True):
+    def _checkpoints(self, resume):
+        """
+        :param resume: name of the checkpoint of a call, None if the call is not resumable
+        :return: CheckpointStore of the call, None if resume is None
+        """
+        if resume is None:
+            return None
+        if self.checkpointStore is None:
+            self.checkpointStore = CheckpointStore()
+        return self.checkpointStore
+
+    def _collectPages(self, pages, columnsType=None):
+        """
+        merges the pages yielded by one of the iter* generators into one dictionary,
+        if the generator is aborted due to the rate limit or the Tweet cap, the pages received so far are stored in
+        NotReturnedData
+        :param pages: generator of dictionaries
+        :param columnsType: TweetColumns or UserColumns if the generator yields columns instead of dictionaries
+        :return: dictionary with the content of all pages
+        """
+        if columnsType is not None:
+            return self._collectColumns(pages, columnsType)
+        output = {}
+        try:
+            for page in pages:
+                output.update(page)  # in place, such that the merge is linear in the number of entities
+        except (UnsavedDataLimitExceedError, TweetCapExceedingError):
+            self.NotReturnedData.saveData(data=output)
+            raise
+        return output
+
+    def _collectColumns(self, pages, columnsType):
+        columns = []
+        try:
+            for page in pages:
+                columns.append(page)
+        except (UnsavedDataLimitExceedError, TweetCapExceedingError):
+            self.NotReturnedData.saveData(data=columnsType.concatenate(columns))
+            raise
+        return columnsType.concatenate(columns)  # copies each page once
+
+    @staticmethod
+    def _pageToColumns(columnsType, page):
+        """
+        :return: TweetColumns or UserColumns of a single page, raises EmptyPageError for empty pages
+        """
+        if page.meta.get('result_count') == 0:
+            raise EmptyPageError
+        return columnsType.fromDicts(page.data)
+
+    def _followsPageToDict(self, user, page, withExpansion, follower=True):
+        if follower:
+            follows = self._followersToDict(user=user, page=page)
+        else:
+            follows = self._friendsToDict(user=user, page=page)
+
+        if withExpansion:
+            pinnedTweets = self._pinnedTweetsToDict(page=page)
+            self._matchFollowsWithPinnedTweets(follows=follows, pinnedTweets=pinnedTweets)
+        return follows
+
+    def iterFollowers(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True,
+                       asColumns=False, resume=None, cache=None):
         """
         Basic Account v2 API: Follow look-up: 15 requests per 15 minutes
-        This function requests followers from an account
+        Generator variant of getFollowers, every page is yielded as soon as it is parsed,
+        such that it can be processed before the next page is requested.
+
+        desired usage:
+        for followers in api.iterFollowers(userInstance, numPages=15):
+            store(followers)
+
         :param entriesPerPage:
         :param percentagePages:
         :param numPages:
         :param withExpansion: get pinned tweets of followers
         :param user: user instance from that followers should be obtained
-        :return: dictionary of followers from user that was specified by input
+        :param asColumns: if True, each page is yielded as UserColumns built directly from the response (expansions are not
+                          part of the columns)
+        :param resume: name of a checkpoint, the progress is stored in the CheckpointStore after each page and a
+                       call with the same name continues with the next page of the checkpoint
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: Paginator yielding dictionaries (follower id: follower) one per page
         """
-        if self.apiRateLimit.RequestsLeft_GET_Users_Followers == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
         iterations = self.limit_follows(user=user, numPages=numPages, percentagePages=percentagePages, follower=True)
 
-        response = self._getFollowersResponse(user=user, withExpansion=withExpansion,
-                                              entriesPerPage=entriesPerPage)
-
-        followers = self._followersToDict(user=user, response=response.json())
-
-        if withExpansion:
-            pinnedTweets = self._pinnedTweetsToDict(response=response.json())
-            self._matchFollowsWithPinnedTweets(follows=followers, pinnedTweets=pinnedTweets)
-
-        self.apiRateLimit.RequestsLeft_GET_Users_Followers = float(response.headers['x-rate-limit-remaining'])
-
-        for i in range(0, (iterations - 1)):
-            if 'next_token' in response.json()['meta'].keys():
-                if self.apiRateLimit.RequestsLeft_GET_Users_Followers == 0:
-                    self.apiRateLimit.ResetTime_GET_Users_Followers = float(response.headers['x-rate-limit-reset'])
-                    if utils.IfWaitTooLong(now=time.time(), then=self.apiRateLimit.ResetTime_GET_Users_Followers):
-                        self.NotReturnedData.saveData(data=followers)
-                        raise UnsavedDataLimitExceedError()
-                    else:
-                        time.sleep(30)
-
-                token = response.json()['meta']['next_token']
-
-                response = self._getFollowersResponse(user=user, firstPage=False, token=token,
-                                                      withExpansion=withExpansion)
-                followers_toMerge = self._followersToDict(user=user, response=response.json())
-
-                if withExpansion:
-                    pinnedTweets = self._pinnedTweetsToDict(response=response.json())
-                    self._matchFollowsWithPinnedTweets(follows=followers_toMerge, pinnedTweets=pinnedTweets)
+        str_input = "users/" + str(user.id) + "/" + "followers"
+        params = self._createParamsFollows(withExpansion=withExpansion, entriesPerPage=entriesPerPage)
+        if asColumns:
+            pageHandler = functools.partial(self._pageToColumns, UserColumns)
+        else:
+            pageHandler = functools.partial(self._followsPageToDict, user, withExpansion=withExpansion, follower=True)
 
-                followers = {**followers, **followers_toMerge}  # merge dict python > 3.5
+        return Paginator(api=self, str_input=str_input, params=params, rateLimitName="GET_Users_Followers",
+                         pageHandler=pageHandler, maxPages=iterations,
+                         checkpointStore=self._checkpoints(resume), checkpointName=resume,
+                         maxWait=self.maxRateLimitWait, cache=self._cacheMode(cache))
 
-                self.apiRateLimit.RequestsLeft_GET_Users_Followers = float(response.headers['x-rate-limit-remaining'])
+    def getFollowers(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True,
+                     asColumns=False, resume=None, cache=None):
+        """
+        Basic Account v2 API: Follow look-up: 15 requests per 15 minutes
+        This function requests followers from an account
+        :param entriesPerPage:
+        :param percentagePages:
+        :param numPages:
+        :param withExpansion: get pinned tweets of followers
+        :param user: user instance from that followers should be obtained
+        :param asColumns: if True, the followers are returned as UserColumns
+        :param resume: name of a checkpoint, if the call is aborted (see NotReturnedData) the same call continues
+                       with the next page instead of the first one
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: dictionary of followers from user that was specified by input
+        """
+        return self._collectPages(self.iterFollowers(user=user, numPages=numPages, percentagePages=percentagePages,
+                                                     entriesPerPage=entriesPerPage, withExpansion=withExpansion,
+                                                     asColumns=asColumns, resume=resume, cache=cache),
+                                  columnsType=UserColumns if asColumns else None)
 
-            else:
-                return followers
+    def iterFriends(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True,
+                    asColumns=False, resume=None, cache=None):
+        """
+        Basic Account v2 API: Follow look-up: 15 requests per 15 minutes
+        Generator variant of getFriends, every page is yielded as soon as it is parsed,
+        such that it can be processed before the next page is requested.
+        :param entriesPerPage:
+        :param numPages:
+        :param percentagePages:
+        :param withExpansion: get pinned tweets of friends
+        :param user: user instance from that friends should be obtained
+        :param asColumns: if True, each page is yielded as UserColumns built directly from the response (expansions are not
+                          part of the columns)
+        :param resume: name of a checkpoint, the progress is stored in the CheckpointStore after each page and a
+                       call with the same name continues with the next page of the checkpoint
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: Paginator yielding dictionaries (friend id: friend) one per page
+        """
+        iterations = self.limit_follows(user=user, numPages=numPages, percentagePages=percentagePages, follower=False)
 
-        if self.apiRateLimit.RequestsLeft_GET_Users_Followers == 0:
-            self.apiRateLimit.ResetTime_GET_Users_Followers = float(response.headers['x-rate-limit-reset'])
+        str_input = "users/" + str(user.id) + "/" + "following"
+        params = self._createParamsFollows(withExpansion=withExpansion, entriesPerPage=entriesPerPage)
+        if asColumns:
+            pageHandler = functools.partial(self._pageToColumns, UserColumns)
+        else:
+            pageHandler = functools.partial(self._followsPageToDict, user, withExpansion=withExpansion, follower=False)
 
-        return followers
+        return Paginator(api=self, str_input=str_input, params=params, rateLimitName="GET_Users_Friends",
+                         pageHandler=pageHandler, maxPages=iterations,
+                         checkpointStore=self._checkpoints(resume), checkpointName=resume,
+                         maxWait=self.maxRateLimitWait, cache=self._cacheMode(cache))
 
-    def getFriends(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True):
+    def getFriends(self, user, numPages=None, percentagePages=None, entriesPerPage=1000, withExpansion=True,
+                   asColumns=False, resume=None, cache=None):
         """
         Basic Account v2 API: Follow look-up: 15 requests per 15 minutes
         This function requests friends from an account
@@ -269,53 +562,16 @@ class TwitterAPI(object):
         :param percentagePages:
         :param withExpansion: get pinned tweets of friends
         :param user: user instance from that friends should be obtained
+        :param asColumns: if True, the friends are returned as UserColumns
+        :param resume: name of a checkpoint, if the call is aborted (see NotReturnedData) the same call continues
+                       with the next page instead of the first one
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
         :return: list of friends from user that was specified by input
         """
-        if self.apiRateLimit.RequestsLeft_GET_Users_Friends == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
-        iterations = self.limit_follows(user=user, numPages=numPages, percentagePages=percentagePages, follower=False)
-
-        response = self._getFriendsResponse(user=user, withExpansion=withExpansion,
-                                            entriesPerPage=entriesPerPage)
-        friends = self._friendsToDict(user, response.json())
-
-        if withExpansion:
-            pinnedTweets = self._pinnedTweetsToDict(response=response.json())
-            self._matchFollowsWithPinnedTweets(follows=friends, pinnedTweets=pinnedTweets)
-
-        self.apiRateLimit.RequestsLeft_GET_Users_Friends = float(response.headers['x-rate-limit-remaining'])
-
-        for i in range(0, (iterations - 1)):
-            if 'next_token' in response.json()['meta'].keys():
-                if self.apiRateLimit.RequestsLeft_GET_Users_Friends == 0:
-                    self.apiRateLimit.ResetTime_GET_Users_Friends = float(response.headers['x-rate-limit-reset'])
-                    if utils.IfWaitTooLong(now=time.time(), then=self.apiRateLimit.ResetTime_GET_Users_Friends):
-                        self.NotReturnedData.saveData(data=friends)
-                        raise UnsavedDataLimitExceedError()
-                    else:
-                        time.sleep(30)
-
-                token = response.json()['meta']['next_token']
-                response = self._getFriendsResponse(user=user, firstPage=False, token=token,
-                                                    withExpansion=withExpansion)
-                friends_toMerge = self._friendsToDict(user=user, response=response.json())
-
-                if withExpansion:
-                    pinnedTweets = self._pinnedTweetsToDict(response=response.json())
-                    self._matchFollowsWithPinnedTweets(follows=friends_toMerge, pinnedTweets=pinnedTweets)
-
-                friends = {**friends, **friends_toMerge}  # merge dict python > 3.5
-
-                self.apiRateLimit.RequestsLeft_GET_Users_Friends = float(response.headers['x-rate-limit-remaining'])
-
-            else:
-                return friends
-
-        if self.apiRateLimit.RequestsLeft_GET_Users_Friends == 0:
-            self.apiRateLimit.ResetTime_GET_Users_Friends = float(response.headers['x-rate-limit-reset'])
-
-        return friends
+        return self._collectPages(self.iterFriends(user=user, numPages=numPages, percentagePages=percentagePages,
+                                                   entriesPerPage=entriesPerPage, withExpansion=withExpansion,
+                                                   asColumns=asColumns, resume=resume, cache=cache),
+                                  columnsType=UserColumns if asColumns else None)
 
     def getTweetsByUsername(self, username):
         """
@@ -327,25 +583,23 @@ class TwitterAPI(object):
         """
         str_input = "tweets/search/recent"
         params = {'query': f'(from:{username})'}
-        response = self._makeRequest(str_input, params)
-        return response['data']
+        page = self._makeRequest(str_input, params)
+        return page.data
 
-    @staticmethod
-    def _extractUsersFromResponse(response):
+    def _extractUsersFromResponse(self, page):
         """
         This method is used by getReTweeters and getUsers to obtain user and if requested their pinned tweets.
         For getLikingUsersOfTweet another function is used as there are more expansions allowed to the pinned tweet
-        :param response:
+        :param page:
         :return:
         """
         users = []
         tweets = {}
-        if 'includes' in response.keys():
-            for tweetDict in response['includes']['tweets']:
-                tweet = Tweet.createFromDict(data=tweetDict, pinned=True)
-                tweets[tweet.id] = tweet
-        for userDict in response['data']:
-            userInstance = TwitterUser.createFromDict(userDict)
+        for tweetDict in page.includes.get('tweets', []):
+            tweet = self._createTweet(tweetDict, pinned=True)
+            tweets[tweet.id] = tweet
+        for userDict in page.data:
+            userInstance = self._createUser(userDict)
             try:
                 pinnedTweet = tweets[userInstance.pinned_tweet_id]
                 userInstance.tweets[pinnedTweet.id] = pinnedTweet
@@ -354,7 +608,7 @@ class TwitterAPI(object):
             users.append(userInstance)
         return users
 
-    def _getUserResponse(self, userId=None, userName=None, withExpansion=True):
+    def _getUserResponse(self, userId=None, userName=None, withExpansion=True, cache=None):
         """
         Helper function for getUserById and getUserByUsername
         :param userId:
@@ -369,17 +623,19 @@ class TwitterAPI(object):
 
         if userId:
             str_input = f"users/{userId}"
+            rateLimitName = "GET_User_byId"
 
         elif userName:
             str_input = f"users/by/username/{userName}"
+            rateLimitName = "GET_User_byName"
 
         if withExpansion:
             params["expansions"] = "pinned_tweet_id"
-        response = self._makeRequest(url_param=str_input, params=params)
+        response = self._makeRequest(url_param=str_input, params=params, rateLimitName=rateLimitName, cache=cache)
 
         return response
 
-    def _getUsersResponse(self, userIds=None, userNames=None, withExpansion=True):
+    def _getUsersResponse(self, userIds=None, userNames=None, withExpansion=True, cache=None):
         """
         Helper function for getUsersByIds and getUsersByNames
         :param userIds:
@@ -394,105 +650,250 @@ class TwitterAPI(object):
         if userIds:
             str_input = "users"
             params['ids'] = ','.join([str(id) for id in userIds])
+            rateLimitName = "GET_Users_byIds"
 
         else:
             str_input = "users/by"
             params['usernames'] = ','.join([name for name in userNames])
+            rateLimitName = "GET_Users_byNames"
 
         if withExpansion:
             params["expansions"] = "pinned_tweet_id"
 
-        response = self._makeRequest(url_param=str_input, params=params)
+        response = self._makeRequest(url_param=str_input, params=params, rateLimitName=rateLimitName, cache=cache)
 
         return response
 
     # todo: new function needs test
-    def getUserById(self, userId=None, withExpansion=True):
+    def getUserById(self, userId=None, withExpansion=True, cache=None):
         """
         Basic/Academic Account v2 API: user-lookup: 300(aps)/900(user) lookups requests per 15 minutes
         :param userId: user id of account to look-up
         :param withExpansion: request additional data objects that relate to the originally returned users (without using up additional requests)
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache
         :return: user instance defined in class TwitterUser
         """
-        if self.apiRateLimit.RequestsLeft_GET_User_byId == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
+        cache = self._cacheMode(cache)
+        cached = self._cachedEntity("userId", userId, cache=cache)
+        if cached is not None:
+            return cached
+        if self.batchLookups and userId:
+            return self._submitLookup("userId", userId, withExpansion=withExpansion, cache=cache).result()
 
-        response = self._getUserResponse(userId=userId, withExpansion=withExpansion)
-        self.apiRateLimit.RequestsLeft_GET_User_byId = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_User_byId == 0:
-            self.apiRateLimit.ResetTime_GET_User_byId = float(response.headers['x-rate-limit-reset'])
+        response = self._getUserResponse(userId=userId, withExpansion=withExpansion, cache=cache)
 
-        user = TwitterUser.createFromDict(
-            response.json()['data'])  # key needed to make method in TwitterUser working for other cases as well
-        if 'includes' in response.json().keys():
-            pinnedTweet = Tweet.createFromDict(data=response.json()['includes']['tweets'][0], pinned=True)
+        user = self._createUser(response.data)  # key needed to make method in TwitterUser working for other cases as well
+        if 'tweets' in response.includes:
+            pinnedTweet = self._createTweet(response.includes['tweets'][0], pinned=True)
             # user owns tweets, tweets own realLifeEntities
             user.tweets[pinnedTweet.id] = pinnedTweet
 
+        self._storeEntities([user], cache=cache)
         return user
 
     # todo: new function needs test
-    def getUserByUsername(self, userName=None, withExpansion=True):
+    def getUserByUsername(self, userName=None, withExpansion=True, cache=None):
         """
         Basic/Academic Account v2 API: user-lookup: 300(aps)/900(user) lookups requests per 15 minutes
         :param userName: username of account to look-up
         :param withExpansion: request additional data objects that relate to the originally returned users (without using up additional requests)
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache
         :return: user instance defined in class TwitterUser
         """
-        if self.apiRateLimit.RequestsLeft_GET_User_byName == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
+        cache = self._cacheMode(cache)
+        cached = self._cachedEntity("userName", userName, cache=cache)
+        if cached is not None:
+            return cached
+        if self.batchLookups and userName:
+            return self._submitLookup("userName", userName, withExpansion=withExpansion, cache=cache).result()
 
-        response = self._getUserResponse(userName=userName, withExpansion=withExpansion)
-        self.apiRateLimit.RequestsLeft_GET_User_byName = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_User_byName == 0:
-            self.apiRateLimit.ResetTime_GET_User_byName = float(response.headers['x-rate-limit-reset'])
+        response = self._getUserResponse(userName=userName, withExpansion=withExpansion, cache=cache)
 
-        user = TwitterUser.createFromDict(
-            response.json()['data'])  # key needed to make method in TwitterUser working for other cases as well
-        if 'includes' in response.json().keys():
-            pinnedTweet = Tweet.createFromDict(data=response.json()['includes']['tweets'][0], pinned=True)
+        user = self._createUser(response.data)  # key needed to make method in TwitterUser working for other cases as well
+        if 'tweets' in response.includes:
+            pinnedTweet = self._createTweet(response.includes['tweets'][0], pinned=True)
             # user owns tweets, tweets own realLifeEntities
             user.tweets[pinnedTweet.id] = pinnedTweet
 
+        self._storeEntities([user], cache=cache)
         return user
 
-    # todo: new function needs test
-    def getUsersByIds(self, userIds=None, withExpansion=True):
+    @staticmethod
+    def _batchIds(keys, batchSize):
+        """
+        splits the keys into batches
+        :param keys: list of unique keys
+        :param batchSize: maximal number of keys per request
+        :return: list of batches
+        """
+        return [keys[i:i + batchSize] for i in range(0, len(keys), batchSize)]
+
+    def _lookupPool(self):
+        """
+        :return: ThreadPoolExecutor shared by the bulk look-ups of this instance, created with the first look-up
+        """
+        with self._batchersLock:
+            if self._lookupExecutor is None:
+                self._lookupExecutor = ThreadPoolExecutor(max_workers=self._maxLookupWorkers)
+            return self._lookupExecutor
+
+    def _lookupInBatches(self, ids, rateLimitName, lookupBatch, normalise=str, maxConcurrency=4,
+                         returnErrors=False, cacheLookup=None):
+        """
+        Helper function for the bulk look-ups (getUsersByIds, getUsersByNames, getTweets).
+        The ids are deduplicated (keeping the order of the first occurrence) and split into batches of at most
+        _maxIdsPerLookup ids, which are requested concurrently on the pool shared by the look-ups, at most as many
+        batches as requests are left for the endpoint are sent. Without a request left, the look-up waits up to
+        maxRateLimitWait for the reset of the window.
+        :param ids: iterable of ids or usernames
+        :param rateLimitName: suffix of the RequestsLeft_* attribute of the endpoint, e.g. "GET_Users_byIds"
+        :param lookupBatch: function(batch) -> (dictionary key: instance, dictionary key: error) for a single request
+        :param normalise: function that maps an id to the key of the results
+        :param maxConcurrency: maximal number of requests in flight
+        :param returnErrors: if False, the first error of a failed request is raised
+        :param cacheLookup: function(key) -> instance or None, keys that are found are not requested
+        :return: list of unique keys in input order, dictionary (key: instance), dictionary (key: error)
+        """
+        unique = list(dict.fromkeys(normalise(id) for id in ids))
+        if not unique:
+            raise APIError("Please provide at least one id or username")
+        results = {}
+        if cacheLookup is not None:
+            for key in unique:
+                instance = cacheLookup(key)
+                if instance is not None:
+                    results[key] = instance
+        batches = self._batchIds([key for key in unique if key not in results], self._maxIdsPerLookup)
+        if not batches:
+            return unique, results, {}
+        requestsLeft = int(self.tokenPool.requestsLeft(rateLimitName))
+        if requestsLeft == 0:
+            # like a single request (see _makeRequest), the look-up waits up to maxRateLimitWait for the next window
+            waitingTime = self.tokenPool.waitingTime(rateLimitName)
+            if waitingTime <= self.maxRateLimitWait:
+                time.sleep(waitingTime)
+                requestsLeft = int(self.tokenPool.requestsLeft(rateLimitName))
+        if requestsLeft == 0 or (len(batches) > requestsLeft and not returnErrors):
+            raise LimitExceedError(f"{len(batches)} requests needed, {requestsLeft} left. "
+                                   "Wait up to 15 minutes before you call this method again")
+
+        errors = {}
+        for batch in batches[requestsLeft:]:
+            for key in batch:
+                errors[key] = LimitExceedError("Rate limit exceeded before this id was requested")
+        pending = iter(batches[:requestsLeft])
+        executor = self._lookupPool()
+        futures = {}
+        # at most maxConcurrency batches are in flight, and no more than requests are left for the endpoint
+        for batch in itertools.islice(pending, max(1, maxConcurrency)):
+            futures[executor.submit(lookupBatch, batch)] = batch
+        try:
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    batch = futures.pop(future)
+                    nextBatch = next(pending, None)
+                    if nextBatch is not None:
+                        futures[executor.submit(lookupBatch, nextBatch)] = nextBatch
+                    try:
+                        found, notFound = future.result()
+                    except (APIError, HTTPException) as e:
+                        if not returnErrors:
+                            raise
+                        for key in batch:
+                            errors[key] = e
+                        continue
+                    results.update(found)
+                    errors.update(notFound)
+        finally:
+            concurrent.futures.wait(futures)  # batches in flight when an error is raised
+        return unique, results, errors
+
+    @staticmethod
+    def _lookupErrors(page, normalise=str):
         """
-        Basic/Academic Account v2 API: user-lookup: 300(aps)/900(user) lookups requests per 15 minutes
-        :param userIds:
-        :param withExpansion:
-        :return: list of user instances
+        :return: dictionary (key: error dict) of the ids/usernames that Twitter could not return (e.g. deleted, suspended)
         """
-        if self.apiRateLimit.RequestsLeft_GET_Users_byIds == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
-        response = self._getUsersResponse(userIds=userIds, withExpansion=withExpansion)
-        self.apiRateLimit.RequestsLeft_GET_Users_byIds = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_Users_byIds == 0:
-            self.apiRateLimit.ResetTime_GET_Users_byIds = float(response.headers['x-rate-limit-reset'])
+        return {normalise(error['value']): error for error in page.errors if 'value' in error}
 
-        users = self._extractUsersFromResponse(response=response.json())
-        return users
+    def _lookupUsersBatch(self, batch, withExpansion, byName, cache=None):
+        if byName:
+            page = self._getUsersResponse(userNames=batch, withExpansion=withExpansion, cache=cache)
+        else:
+            page = self._getUsersResponse(userIds=batch, withExpansion=withExpansion, cache=cache)
+        normalise = str.lower if byName else str
+        users = self._extractUsersFromResponse(page=page) if page.data else []
+        found = {normalise(user.username if byName else user.id): user for user in users}
+        self._storeEntities(users, cache=cache)
+        return found, self._lookupErrors(page, normalise=normalise)
+
+    def _submitLookup(self, kind, key, withExpansion=True, cache=None):
+        """
+        hands a single look-up to the LookupBatcher of its batch endpoint, see TwitterAPI(batchLookups=True)
+        :param kind: "userId", "userName" or "tweetId"
+        :param key: id or username
+        :param cache: mode of the call, look-ups of different modes are not batched together
+        :return: concurrent.futures.Future that resolves to the TwitterUser/Tweet
+        """
+        with self._batchersLock:
+            batcher = self._batchers.get((kind, withExpansion, cache))
+            if batcher is None:
+                if kind == "tweetId":
+                    lookupBatch = functools.partial(self._lookupTweetsBatch, withExpansion=withExpansion, cache=cache)
+                else:
+                    lookupBatch = functools.partial(self._lookupUsersBatch, withExpansion=withExpansion,
+                                                    byName=kind == "userName", cache=cache)
+                batcher = LookupBatcher(lookupBatch, window=self.batchWindow, maxBatchSize=self._maxIdsPerLookup)
+                self._batchers[(kind, withExpansion, cache)] = batcher
+        return batcher.submit(str(key).lower() if kind == "userName" else str(key))
 
-    # todo: new function needs test
-    def getUsersByNames(self, userNames=None, withExpansion=True):
+    def getUsersByIds(self, userIds=None, withExpansion=True, maxConcurrency=4, returnErrors=False, cache=None):
         """
         Basic/Academic Account v2 API: user-lookup: 300(aps)/900(user) lookups requests per 15 minutes
-        :param userNames:
+        Any number of ids can be passed, they are deduplicated and requested in concurrent batches of 100 ids.
+        :param userIds: iterable of user ids
         :param withExpansion:
-        :return: list of user instances
+        :param maxConcurrency: maximal number of batches requested at the same time
+        :param returnErrors: if True, a dictionary (id: error) of the ids that could not be looked up is returned as well,
+                             otherwise the ids are skipped
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the requests of every batch
+        :return: list of user instances in the order of userIds (and the dictionary of errors if returnErrors)
+        """
+        if not userIds:
+            raise APIError("Please provide ids")
+        cache = self._cacheMode(cache)
+        ids, users, errors = self._lookupInBatches(
+            userIds, "GET_Users_byIds", functools.partial(self._lookupUsersBatch, withExpansion=withExpansion,
+                                                          byName=False, cache=cache),
+            maxConcurrency=maxConcurrency, returnErrors=returnErrors,
+            cacheLookup=functools.partial(self._cachedEntity, "userId", cache=cache))
+        users = [users[id] for id in ids if id in users]
+        return (users, errors) if returnErrors else users
+
+    def getUsersByNames(self, userNames=None, withExpansion=True, maxConcurrency=4, returnErrors=False,
+                        cache=None):
         """
-        if self.apiRateLimit.RequestsLeft_GET_Users_byNames == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
-        response = self._getUsersResponse(userNames=userNames, withExpansion=withExpansion)
-        self.apiRateLimit.RequestsLeft_GET_Users_byNames = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_Users_byNames == 0:
-            self.apiRateLimit.ResetTime_GET_Users_byNames = float(response.headers['x-rate-limit-reset'])
-
-        users = self._extractUsersFromResponse(response=response.json())
-        return users
+        Basic/Academic Account v2 API: user-lookup: 300(aps)/900(user) lookups requests per 15 minutes
+        Any number of usernames can be passed, they are deduplicated (case-insensitive) and requested in concurrent
+        batches of 100 usernames.
+        :param userNames: iterable of usernames
+        :param withExpansion:
+        :param maxConcurrency: maximal number of batches requested at the same time
+        :param returnErrors: if True, a dictionary (lower case username: error) of the usernames that could not be
+                             looked up is returned as well, otherwise the usernames are skipped
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the requests of every batch
+        :return: list of user instances in the order of userNames (and the dictionary of errors if returnErrors)
+        """
+        if not userNames:
+            raise APIError("Please provide Usernames")
+        cache = self._cacheMode(cache)
+        names, users, errors = self._lookupInBatches(
+            userNames, "GET_Users_byNames", functools.partial(self._lookupUsersBatch, withExpansion=withExpansion,
+                                                              byName=True, cache=cache),
+            normalise=str.lower, maxConcurrency=maxConcurrency, returnErrors=returnErrors,
+            cacheLookup=functools.partial(self._cachedEntity, "userName", cache=cache))
+        users = [users[name] for name in names if name in users]
+        return (users, errors) if returnErrors else users
 
     def getLikingUsersOfTweet(self, tweetId, withExpansion=True):
         """
@@ -505,8 +906,6 @@ class TwitterAPI(object):
         :param withExpansion: if True, pinned Tweets of users who liked the specified tweet
         :return: users
         """
-        if self.apiRateLimit.RequestsLeft_GET_Users_LikingUsers == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
 
         str_input = f"tweets/{tweetId}/liking_users"
 
@@ -515,33 +914,42 @@ class TwitterAPI(object):
         if withExpansion:
             params["expansions"] = "pinned_tweet_id"
 
-        response = self._makeRequest(url_param=str_input, params=params)
-        self.apiRateLimit.RequestsLeft_GET_Users_LikingUsers = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_Users_LikingUsers == 0:
-            self.apiRateLimit.ResetTime_GET_Users_LikingUsers = float(response.headers['x-rate-limit-reset'])
+        response = self._makeRequest(url_param=str_input, params=params, rateLimitName="GET_Users_LikingUsers")
 
-        users = self._extractUsersFromResponse(response=response.json())
+        users = self._extractUsersFromResponse(page=response)
 
         return users
 
-    def getLikesOfUser(self, userId, withExpansion=True, entriesPerPage=100):
+    def _tweetPageToDict(self, page, withExpansion):
         """
-        Allows you to get information about a user’s liked Tweets.
+        :return: dictionary (tweet id: tweet) of a single page, raises EmptyPageError for empty pages
+        """
+        tweets = {}
+        self._handleMultipleTweetResponse(page=page, tweets_Output=tweets, withExpansion=withExpansion)
+        return tweets
+
+    def iterLikesOfUser(self, userId, withExpansion=True, entriesPerPage=100, asColumns=False, maxTweets=None,
+                        resume=None, cache=None):
+        """
+        Generator variant of getLikesOfUser, every page is yielded as soon as it is parsed.
 
         App rate limit: 75 requests per 15-minute window
         User rate limit: 75 requests per 15-minute window
 
-        Counts towards the Tweetcap (500'000)
+        Counts towards the Tweetcap (500'000), each page is counted when it is received
 
         :param entriesPerPage:
         :param withExpansion:
         :param userId:
-        :return: tweets
+        :param asColumns: if True, each page is yielded as TweetColumns built directly from the response (expansions are not
+                          part of the columns)
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param resume: name of a checkpoint, the progress is stored in the CheckpointStore after each page and a
+                       call with the same name continues with the next page of the checkpoint
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: Paginator yielding dictionaries (tweet id: tweet) one per page
         """
 
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_LikedTweets == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
         if self.apiRateLimit.remainingTweets == 0:
             raise TweetCapExceedingError("Tweet Cap exceeded. Wait until Reset Date")
 
@@ -555,52 +963,42 @@ class TwitterAPI(object):
             params["expansions"] = [
                 "author_id,attachments.poll_ids,attachments.media_keys,entities.mentions.username,geo.place_id,in_reply_to_user_id,referenced_tweets.id,referenced_tweets.id.author_id"]
 
-        tweets_Output = {}
-
-        iterations = 75
-
-        response = self._makeRequest(url_param=str_input, params=params)
-
-        self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                          withExpansion=withExpansion)
-
-        self.apiRateLimit.RequestsLeft_GET_Tweets_LikedTweets = float(response.headers['x-rate-limit-remaining'])
-
-        for i in range(0, iterations - 1):
-            if 'next_token' in response.json()['meta'].keys():
-                if self.apiRateLimit.RequestsLeft_GET_Tweets_LikedTweets == 0:
-                    self.apiRateLimit.ResetTime_GET_Tweets_LikedTweets = float(response.headers['x-rate-limit-reset'])
-                    if utils.IfWaitTooLong(now=time.time(), then=self.apiRateLimit.ResetTime_GET_Tweets_LikedTweets):
-                        self.NotReturnedData.saveData(data=tweets_Output)
-                        raise UnsavedDataLimitExceedError()
-                    else:
-                        time.sleep(30)
-
-                token = response.json()['meta']['next_token']
-                params['pagination_token'] = token
-                response = self._makeRequest(url_param=str_input, params=params)
-
-                try:
-                    self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                                      withExpansion=withExpansion)
+        if asColumns:
+            pageHandler = functools.partial(self._pageToColumns, TweetColumns)
+        else:
+            pageHandler = functools.partial(self._tweetPageToDict, withExpansion=withExpansion)
 
-                    self.apiRateLimit.RequestsLeft_GET_Tweets_LikedTweets = float(response.headers['x-rate-limit-remaining'])
+        return Paginator(api=self, str_input=str_input, params=params, rateLimitName="GET_Tweets_LikedTweets",
+                         pageHandler=pageHandler, maxPages=75, countsTowardsTweetCap=True, maxTweets=maxTweets,
+                         checkpointStore=self._checkpoints(resume), checkpointName=resume,
+                         maxWait=self.maxRateLimitWait, cache=self._cacheMode(cache))
 
-                except EmptyPageError as error:
-                    # No need to communicate this error, as the Twitter API provided empty page which the client
-                    # will not realise
-                    break
-            else:
-                break
+    def getLikesOfUser(self, userId, withExpansion=True, entriesPerPage=100, asColumns=False, maxTweets=None,
+                       resume=None, cache=None):
+        """
+        Allows you to get information about a user’s liked Tweets.
 
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_LikedTweets == 0:
-            self.apiRateLimit.RequestsLeft_GET_Tweets_LikedTweets = float(response.headers['x-rate-limit-reset'])
+        App rate limit: 75 requests per 15-minute window
+        User rate limit: 75 requests per 15-minute window
 
-        self.apiRateLimit.countTowardsTweetCap(numberOfTweetsRequested=len(list(tweets_Output.values())))
+        Counts towards the Tweetcap (500'000)
 
-        return tweets_Output
+        :param entriesPerPage:
+        :param withExpansion:
+        :param userId:
+        :param asColumns: if True, the tweets are returned as TweetColumns
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param resume: name of a checkpoint, if the call is aborted (see NotReturnedData) the same call continues
+                       with the next page instead of the first one
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: tweets
+        """
+        return self._collectPages(self.iterLikesOfUser(userId=userId, withExpansion=withExpansion,
+                                                       entriesPerPage=entriesPerPage, asColumns=asColumns,
+                                                       maxTweets=maxTweets, resume=resume, cache=cache),
+                                  columnsType=TweetColumns if asColumns else None)
 
-    def _getTweetResponse(self, tweetId=None, tweetIds=None, withExpansion=True):
+    def _getTweetResponse(self, tweetId=None, tweetIds=None, withExpansion=True, cache=None):
         """
         This function creates responses for getTweet and getTweets
         :param tweetId:
@@ -612,120 +1010,85 @@ class TwitterAPI(object):
                   "place.fields": self._placeFields, "poll.fields": self._pollFields}
         if tweetId:
             str_input = f"tweets/{tweetId}"
+            rateLimitName = "GET_Tweet_byId"
         elif tweetIds:
             str_input = "tweets"
             params['ids'] = ','.join([str(id) for id in tweetIds])
+            rateLimitName = "GET_Tweets_byIds"
         else:
             raise ValueError("please provide either tweetId or tweetIds")
         if withExpansion:
             params["expansions"] = [
                 "author_id,attachments.poll_ids,attachments.media_keys,entities.mentions.username,geo.place_id,in_reply_to_user_id,referenced_tweets.id,referenced_tweets.id.author_id"]
-        response = self._makeRequest(url_param=str_input, params=params)
+        response = self._makeRequest(url_param=str_input, params=params, rateLimitName=rateLimitName, cache=cache)
         return response
 
-    @staticmethod
-    def _getLinkage(tweet):
-        """
-        helper function for getTweet and getTweets
-        in matchingExpansionObjectsWithTweet the author_id of linked tweets are needed
-        such that their user instances can be linked with the tweet
-        :param tweet:
-        :return:
-        """
-
-        # "attachments": {"media_keys": ["7_1427157481478832130"]}
-        # "referenced_tweets": [{"type": "replied_to", "id": "1426125234378264576"}]
-        # "attachments": {"poll_ids": ["1199786642468413448"]}
-
-        links = [tweet.author_id]  # for getTweets the expansion includes the author object, for UserTimeLine as well
-
-        for user in tweet.mentions:
-            links.append(user.id)
-
-        try:
-            refTweet_id = tweet.referenced_tweets[0]['id']
-            # refTweet_type = tweet.referenced_tweets[0]['type']
-            links.append(refTweet_id)
-        except (IndexError, AttributeError, TypeError) as error:
-            pass
-
-        try:
-            place_id = tweet.geo['place_id']
-            links.append(place_id)
-        except (AttributeError, IndexError, KeyError) as error:
-            pass
-
-        try:
-            for key, value in tweet.attachments.items():
-                if key == "media_keys":
-                    media_key = value[0]
-                    links.append(media_key)
-                if key == "poll_ids":
-                    poll_id = value[0]
-                    links.append(poll_id)
-        except (IndexError, AttributeError, TypeError) as error:
-            pass
-
-        return links
-
-    def getTweet(self, tweetId=None, withExpansion=True):
+    def getTweet(self, tweetId=None, withExpansion=True, cache=None):
         """
         :param tweetId:
         :param withExpansion:
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache
         :return: a Tweet object
         """
-        if self.apiRateLimit.RequestsLeft_GET_Tweet_byId == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
+        cache = self._cacheMode(cache)
+        cached = self._cachedEntity("tweetId", tweetId, cache=cache)
+        if cached is not None:
+            return cached
+        if self.batchLookups and tweetId:
+            return self._submitLookup("tweetId", tweetId, withExpansion=withExpansion, cache=cache).result()
 
         if not tweetId:
             raise APIError("Please provide TweetId")
 
-        response = self._getTweetResponse(tweetId=tweetId, withExpansion=withExpansion)
+        response = self._getTweetResponse(tweetId=tweetId, withExpansion=withExpansion, cache=cache)
         tweets_Output = {}
-        self._handleTweetResponse(response.json(), tweets_Output, withExpansion)
-
-        self.apiRateLimit.RequestsLeft_GET_Tweet_byId = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_Tweet_byId == 0:
-            self.apiRateLimit.ResetTime_GET_Tweet_byId = float(response.headers['x-rate-limit-reset'])
+        self._handleTweetResponse(response, tweets_Output, withExpansion)
 
+        self._storeEntities(tweets_Output.values(), cache=cache)
         return list(tweets_Output.values())[0]
 
-    def getTweets(self, tweetIds=None, withExpansion=True):
+    def _lookupTweetsBatch(self, batch, withExpansion, cache=None):
+        page = self._getTweetResponse(tweetIds=batch, withExpansion=withExpansion, cache=cache)
+        tweets_Output = {}
+        if page.data:
+            self._handleMultipleTweetResponse(page=page, tweets_Output=tweets_Output, withExpansion=withExpansion)
+        self._storeEntities(tweets_Output.values(), cache=cache)
+        return tweets_Output, self._lookupErrors(page)
+
+    def getTweets(self, tweetIds=None, withExpansion=True, maxConcurrency=4, returnErrors=False, cache=None):
         """
-        :param tweetIds:
+        Basic/Academic Account v2 API: tweet-lookup: 300(aps)/900(user) lookups requests per 15 minutes
+        Any number of ids can be passed, they are deduplicated and requested in concurrent batches of 100 ids.
+        :param tweetIds: iterable of tweet ids
         :param withExpansion: get additional information about media, poll, location
-        :return: a list of tweets
+        :param maxConcurrency: maximal number of batches requested at the same time
+        :param returnErrors: if True, a dictionary (id: error) of the ids that could not be looked up is returned as well,
+                             otherwise the ids are skipped
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the requests of every batch
+        :return: dictionary (id: Tweet) in the order of tweetIds (and the dictionary of errors if returnErrors)
         """
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_byIds == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
         if not tweetIds:
             raise APIError("Please provide TweetIds")
+        cache = self._cacheMode(cache)
+        ids, tweets, errors = self._lookupInBatches(
+            tweetIds, "GET_Tweets_byIds", functools.partial(self._lookupTweetsBatch, withExpansion=withExpansion,
+                                                            cache=cache),
+            maxConcurrency=maxConcurrency, returnErrors=returnErrors,
+            cacheLookup=functools.partial(self._cachedEntity, "tweetId", cache=cache))
+        tweets = {id: tweets[id] for id in ids if id in tweets}
+        return (tweets, errors) if returnErrors else tweets
 
-        response = self._getTweetResponse(tweetId=tweetIds, withExpansion=withExpansion)
-        tweets_Output = {}
-        self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output, withExpansion=withExpansion)
-
-        self.apiRateLimit.RequestsLeft_GET_Tweets_byIds = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_byIds == 0:
-            self.apiRateLimit.ResetTime_GET_Tweets_byIds = float(response.headers['x-rate-limit-reset'])
-
-        return tweets_Output
-
-    def getRecentTweetsFromSearch(self, searchQuery, withExpansion, entriesPerPage=100, since_id=None, until_id=None,
-                                  start_time=None, end_time=None):
+    def iterRecentTweetsFromSearch(self, searchQuery, withExpansion, entriesPerPage=100, since_id=None, until_id=None,
+                                   start_time=None, end_time=None, asColumns=False, maxTweets=None, countFirst=False,
+                                   resume=None, cache=None):
         """
+        Generator variant of getRecentTweetsFromSearch, every page is yielded as soon as it is parsed.
+
         App rate limit: 450 requests per 15-minute window
         User rate limit: 180 requests per 15-minute window
 
-        Counts towards Tweet Cap (Standard 500'000 per month)
+        Counts towards Tweet Cap (Standard 500'000 per month), each page is counted when it is received
 
-        The recent search endpoint returns Tweets from the last seven days (by default) that match a search query.
-        For example: params = {'query': '(from:twitterdev -is:retweet) OR #twitterdev'}
-        To find out how to build rules check out:
-        https://developer.twitter.com/en/docs/twitter-api/tweets/filtered-stream/integrate/build-a-rule
-
-        The Tweets returned by this endpoint count towards the Project-level Tweet cap.
         :param entriesPerPage: possible range from 10 to 100
         :param end_time:
         :param start_time:
@@ -733,14 +1096,26 @@ class TwitterAPI(object):
         :param since_id:
         :param searchQuery: a string that says which tweets should be included in the output
         :param withExpansion:
-        :return:
+        :param asColumns: if True, each page is yielded as TweetColumns built directly from the response (expansions are not
+                          part of the columns)
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param countFirst: if True, the number of matching tweets is requested from the counts endpoint first (which
+                           doesn't count towards the Tweet cap) and only that many tweets are reserved, see Paginator
+        :param resume: name of a checkpoint, the progress is stored in the CheckpointStore after each page and a
+                       call with the same name continues with the next page of the checkpoint
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: Paginator yielding dictionaries (tweet id: tweet) one per page
         """
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_SearchRecent == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
         if self.apiRateLimit.remainingTweets == 0:
             raise TweetCapExceedingError("Tweet Cap exceeded. Wait until Reset Date")
 
+        estimatedTweets = None
+        if countFirst:
+            counts = self.getRecentTweetCountsFromSearch(searchQuery=searchQuery, granularity='day', since_id=since_id,
+                                                         until_id=until_id, start_time=start_time, end_time=end_time,
+                                                         cache=cache)
+            estimatedTweets = counts.get('meta', {}).get('total_tweet_count')
+
         params = {"query": searchQuery, "tweet.fields": self._tweetFields, "user.fields": self._userFields,
                   "media.fields": self._mediaFields,
                   "place.fields": self._placeFields, "poll.fields": self._pollFields,
@@ -756,57 +1131,58 @@ class TwitterAPI(object):
         self._timeFrameParamsManager(params=params, since_id=since_id, until_id=until_id, start_time=start_time,
                                      end_time=end_time)
 
-        tweets_Output = {}
+        if asColumns:
+            pageHandler = functools.partial(self._pageToColumns, TweetColumns)
+        else:
+            pageHandler = functools.partial(self._tweetPageToDict, withExpansion=withExpansion)
 
         # app rate limit
-        iterations = 180
-
-        # todo: needs a try-except block around it, what happens if TweetCap?
-        response = self._makeRequest(url_param=str_input, params=params)
-
-        self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                          withExpansion=withExpansion)
+        return Paginator(api=self, str_input=str_input, params=params, rateLimitName="GET_Tweets_SearchRecent",
+                         pageHandler=pageHandler, maxPages=180, countsTowardsTweetCap=True, maxTweets=maxTweets,
+                         estimatedTweets=estimatedTweets,
+                         checkpointStore=self._checkpoints(resume), checkpointName=resume,
+                         maxWait=self.maxRateLimitWait, cache=self._cacheMode(cache))
 
-        self.apiRateLimit.RequestsLeft_GET_Tweets_SearchRecent = float(response.headers['x-rate-limit-remaining'])
-
-        for i in range(0, iterations - 1):
-            if 'next_token' in response.json()['meta'].keys():
-                if self.apiRateLimit.RequestsLeft_GET_Tweets_SearchRecent == 0:
-                    self.apiRateLimit.ResetTime_GET_Tweets_SearchRecent = float(response.headers['x-rate-limit-reset'])
-                    if utils.IfWaitTooLong(now=time.time(), then=self.apiRateLimit.ResetTime_GET_Tweets_SearchRecent):
-                        self.NotReturnedData.saveData(data=tweets_Output)
-                        raise UnsavedDataLimitExceedError()
-                    else:
-                        time.sleep(30)
-
-                token = response.json()['meta']['next_token']
-                params['pagination_token'] = token
-
-                # todo: needs a try-except block around it, what happens if TweetCap is exceeded during request?
-                response = self._makeRequest(url_param=str_input, params=params)
-
-                try:
-                    self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                                      withExpansion=withExpansion)
-
-                    self.apiRateLimit.RequestsLeft_GET_Tweets_SearchRecent = float(response.headers['x-rate-limit-remaining'])
-
-                except EmptyPageError as error:
-                    # No need to communicate this error, as the Twitter API provided empty page which the client
-                    # will not realise
-                    break
-            else:
-                break
+    def getRecentTweetsFromSearch(self, searchQuery, withExpansion, entriesPerPage=100, since_id=None, until_id=None,
+                                  start_time=None, end_time=None, asColumns=False, maxTweets=None, countFirst=False,
+                                  resume=None, cache=None):
+        """
+        App rate limit: 450 requests per 15-minute window
+        User rate limit: 180 requests per 15-minute window
 
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_SearchRecent == 0:
-            self.apiRateLimit.ResetTime_GET_Tweets_SearchRecent = float(response.headers['x-rate-limit-reset'])
+        Counts towards Tweet Cap (Standard 500'000 per month)
 
-        self.apiRateLimit.countTowardsTweetCap(numberOfTweetsRequested=len(list(tweets_Output.values())))
+        The recent search endpoint returns Tweets from the last seven days (by default) that match a search query.
+        For example: params = {'query': '(from:twitterdev -is:retweet) OR #twitterdev'}
+        To find out how to build rules check out:
+        https://developer.twitter.com/en/docs/twitter-api/tweets/filtered-stream/integrate/build-a-rule
 
-        return tweets_Output
+        The Tweets returned by this endpoint count towards the Project-level Tweet cap.
+        :param entriesPerPage: possible range from 10 to 100
+        :param end_time:
+        :param start_time:
+        :param until_id:
+        :param since_id:
+        :param searchQuery: a string that says which tweets should be included in the output
+        :param withExpansion:
+        :param asColumns: if True, the tweets are returned as TweetColumns
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param countFirst: if True, only as many tweets as the counts endpoint reports are reserved of the Tweet cap
+        :param resume: name of a checkpoint, if the call is aborted (see NotReturnedData) the same call continues
+                       with the next page instead of the first one
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return:
+        """
+        return self._collectPages(self.iterRecentTweetsFromSearch(searchQuery=searchQuery, withExpansion=withExpansion,
+                                                                  entriesPerPage=entriesPerPage, since_id=since_id,
+                                                                  until_id=until_id, start_time=start_time,
+                                                                  end_time=end_time, asColumns=asColumns,
+                                                                  maxTweets=maxTweets, countFirst=countFirst,
+                                                                  resume=resume, cache=cache),
+                                  columnsType=TweetColumns if asColumns else None)
 
     def getRecentTweetCountsFromSearch(self, searchQuery, granularity='hour', since_id=None, until_id=None,
-                                       start_time=None, end_time=None):
+                                       start_time=None, end_time=None, cache=None):
         """
         The recent Tweet counts endpoint returns count of Tweets from the last seven days that match a search query.
 
@@ -818,21 +1194,17 @@ class TwitterAPI(object):
         :param until_id:
         :param start_time:
         :param end_time:
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache
         :return: dictionary from response
         """
-        if self.apiRateLimit.RequestsLeft_GET_TweetCounts_recent == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
 
         params = {"query": searchQuery, "granularity": granularity}
         self._timeFrameParamsManager(params=params, since_id=since_id, until_id=until_id, start_time=start_time,
                                      end_time=end_time)
         str_input = "tweets/counts/recent"
 
-        response = self._makeRequest(url_param=str_input, params=params)
-
-        self.apiRateLimit.RequestsLeft_GET_TweetCounts_recent = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_TweetCounts_recent == 0:
-            self.apiRateLimit.ResetTime_GET_TweetCounts_recent = float(response.headers['x-rate-limit-reset'])
+        response = self._makeRequest(url_param=str_input, params=params, rateLimitName="GET_TweetCounts_recent",
+                                     cache=cache)
 
         return response.json()
 
@@ -854,8 +1226,6 @@ class TwitterAPI(object):
         :param tweetId:
         :return:
         """
-        if self.apiRateLimit.RequestsLeft_GET_Users_RetweetedBy == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
 
         if not tweetId:
             raise APIError("Please provide TweetId")
@@ -867,101 +1237,38 @@ class TwitterAPI(object):
         if withExpansion:
             params["expansions"] = "pinned_tweet_id"
 
-        response = self._getResponse(str_input=str_input, params=params)
-        users = self._extractUsersFromResponse(response=response.json())
-
-        self.apiRateLimit.RequestsLeft_GET_Users_RetweetedBy = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_GET_Users_RetweetedBy == 0:
-            self.apiRateLimit.ResetTime_GET_Users_RetweetedBy = float(response.headers['x-rate-limit-reset'])
+        response = self._getResponse(str_input=str_input, params=params, rateLimitName="GET_Users_RetweetedBy")
+        users = self._extractUsersFromResponse(page=response)
 
         return users
 
-    @staticmethod
-    def _createExpansionObjects(response):
-        ExpansionObjects = {}
-        conversionDict = {'users': 'TwitterUser', 'media': 'Media', 'places': 'Place', 'polls': 'Poll',
-                          'tweets': 'Tweet'}
-        for key in response['includes'].keys():
-            for twitterEntity in response['includes'][key]:  # users, media, geo, polls, tweets
-                entity = conversionDict[key]
-                twitterEntityInstance = eval(entity).createFromDict(twitterEntity)
-                linkingKey = twitterEntityInstance.linkWithTweet()
-                ExpansionObjects[linkingKey] = (twitterEntityInstance, key)
-        return ExpansionObjects
-
-    def _matchExpansionWithTweet(self, tweet, ExpansionObjects, tweets_Output):
-        links = self._getLinkage(tweet=tweet)
-        for link in links:
-            try:
-                expansionObject, key = ExpansionObjects[link]
-                if not hasattr(tweet, key) or getattr(tweet, key) is None:
-                    setattr(tweet, key,
-                            [])  # if a list of e.g media instances does not exist yet, create list with this instance
-                getattr(tweet, key).append(expansionObject)
-            except KeyError:
-                # only some tweets miss include information, idk the reason for that, maybe imprecision of Twitter API
-                pass
-        tweets_Output[tweet.id] = tweet
-
-    def _handleTweetResponse(self, response, tweets_Output, withExpansion):
+    def _handleTweetResponse(self, page, tweets_Output, withExpansion):
+        tweet = self._createTweet(page.data)
         if withExpansion:
-            ExpansionObjects = self._createExpansionObjects(response=response)
-            tweetDict = response['data']
-            tweet = Tweet.createFromDict(data=tweetDict)
-            self._matchExpansionWithTweet(tweet=tweet, ExpansionObjects=ExpansionObjects, tweets_Output=tweets_Output)
-        else:
-            tweetDict = response['data']
-            tweet = Tweet.createFromDict(data=tweetDict)
-            tweets_Output[tweet.id] = tweet
+            ExpansionIndex.fromPage(page, lazy=self.lazyEntities, identityMap=self.identityMap).link(tweet)
+        tweets_Output[tweet.id] = tweet
 
-    def _handleMultipleTweetResponse(self, response, tweets_Output, withExpansion):
-        if response['meta']['result_count'] == 0:
+    def _handleMultipleTweetResponse(self, page, tweets_Output, withExpansion):
+        if page.meta.get('result_count') == 0:
             # Sometimes a next page token is sent by Twitter (which leads to a further request)
             # even though this next page will be empty. Meaning a response with no 'data' and 'includes'.
             raise EmptyPageError
+        tweetDicts = page.data
+        if not self.lazyEntities:
+            # the texts of the page are normalised in one pass, lazy tweets normalise their text on first access
+            texts = utils.encodeDecodeTwitterTexts([tweetDict.get('text') for tweetDict in tweetDicts])
+            tweetDicts = [tweetDict if text is tweetDict.get('text') else dict(tweetDict, text=text)
+                          for tweetDict, text in zip(tweetDicts, texts)]
         if withExpansion:
-            ExpansionObjects = self._createExpansionObjects(response=response)
-            for tweetDict in response['data']:
-                tweet = Tweet.createFromDict(data=tweetDict)
-                self._matchExpansionWithTweet(tweet=tweet, ExpansionObjects=ExpansionObjects,
-                                              tweets_Output=tweets_Output)
+            expansions = ExpansionIndex.fromPage(page, lazy=self.lazyEntities, identityMap=self.identityMap)  # once per page
+            for tweetDict in tweetDicts:
+                tweet = expansions.link(self._createTweet(tweetDict, textNormalised=not self.lazyEntities))
+                tweets_Output[tweet.id] = tweet
         else:
-            for tweetDict in response['data']:
-                tweet = Tweet.createFromDict(data=tweetDict)
+            for tweetDict in tweetDicts:
+                tweet = self._createTweet(tweetDict, textNormalised=not self.lazyEntities)
                 tweets_Output[tweet.id] = tweet
 
-    # todo: why is this only used by 4 functions??
-    def _creatingTweetObjectsFromMultipleResponsePages(self, str_input, tweets_Output, withExpansion, iterations,
-                                                       params):
-        """
-        atm deprecated..
-        This function makes requests and receives from endpoints data that is possibly organised
-        in multiple pages, to handle the multiple pages, this function exists.
-        :param str_input:
-        :param tweets_Output:
-        :param withExpansion:
-        :param iterations:
-        :param params:
-        :return:
-        """
-        response = self._getResponse(str_input=str_input, params=params)
-        self._handleMultipleTweetResponse(response=response, tweets_Output=tweets_Output, withExpansion=withExpansion)
-
-        for i in range(0, iterations - 1):
-            if 'next_token' in response['meta'].keys():
-                token = response['meta']['next_token']
-                params['pagination_token'] = token
-                response = self._getResponse(str_input=str_input, params=params)
-                try:
-                    self._handleMultipleTweetResponse(response=response, tweets_Output=tweets_Output,
-                                                      withExpansion=withExpansion)
-                except EmptyPageError as error:
-                    # No need to communicate this error, as the Twitter API provided empty page which the client
-                    # will not realise
-                    break
-            else:
-                break
-
     @staticmethod
     def _timeFrameParamsManager(params, since_id, until_id, start_time, end_time):
         if since_id:
@@ -999,23 +1306,36 @@ class TwitterAPI(object):
 
         return params
 
-    def _getTweetsFromTimeline(self, str_input, withExpansion, entriesPerPage, excludeRetweet, excludeReplies, since_id,
-                               until_id, end_time, start_time):
+    def iterUserTweetTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
+                              excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None, end_time=None,
+                              start_time=None, asColumns=False, maxTweets=None, resume=None, cache=None):
         """
-        atm deprecated...
+        Generator variant of getUserTweetTimeline, every page is yielded as soon as it is parsed.
+        Only the 3200 most recent Tweets are available, ie. max 32 requests per user
 
-        Helper function for getUserMentionTimeline and getUserTweetTimeline to prevent code duplication
-        :param str_input:
-        :param withExpansion:
-        :param entriesPerPage:
-        :param excludeRetweet:
-        :param excludeReplies:
-        :param since_id:
-        :param until_id:
-        :param end_time:
-        :param start_time:
-        :return:
+        Counts towards the TweetCap (500'000), each page is counted when it is received
+
+        :param: start_time: Minimum allowable time is 2010-11-06T00:00:01Z (Provide in ISO8601)
+        :param: end_time: Minimum allowable time is 2010-11-06T00:00:01Z (Provide in ISO8601)
+        :param asColumns: if True, each page is yielded as TweetColumns built directly from the response (expansions are not
+                          part of the columns)
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param resume: name of a checkpoint, the progress is stored in the CheckpointStore after each page and a
+                       call with the same name continues with the next page of the checkpoint
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: Paginator yielding dictionaries (tweet id: tweet) one per page
         """
+        if self.apiRateLimit.remainingTweets == 0:
+            raise TweetCapExceedingError("Tweet Cap exceeded. Wait until Reset Date")
+
+        if not userId and not userName:
+            raise APIError("Please provide userId or userName")
+
+        if userId:
+            str_input = f"users/{userId}/tweets"
+        else:
+            str_input = f"users/by/username/{userName}/tweets"
+
         iterations = int(3200 / entriesPerPage)
 
         params = self._prepareParamsTimeline(withExpansion=withExpansion, entriesPerPage=entriesPerPage,
@@ -1023,18 +1343,19 @@ class TwitterAPI(object):
                                              since_id=since_id, until_id=until_id, start_time=start_time,
                                              end_time=end_time)
 
-        tweets_Output = {}
-
-        # self._creatingTweetObjectsFromMultipleResponsePages(str_input=str_input, tweets_Output=tweets_Output,
-        #                                                    withExpansion=withExpansion, iterations=iterations,
-        #                                                    params=params)
-
+        if asColumns:
+            pageHandler = functools.partial(self._pageToColumns, TweetColumns)
+        else:
+            pageHandler = functools.partial(self._tweetPageToDict, withExpansion=withExpansion)
 
-        return tweets_Output
+        return Paginator(api=self, str_input=str_input, params=params, rateLimitName="GET_Tweets_byUser",
+                         pageHandler=pageHandler, maxPages=iterations, countsTowardsTweetCap=True, maxTweets=maxTweets,
+                         checkpointStore=self._checkpoints(resume), checkpointName=resume,
+                         maxWait=self.maxRateLimitWait, cache=self._cacheMode(cache))
 
     def getUserTweetTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
                              excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None, end_time=None,
-                             start_time=None):
+                             start_time=None, asColumns=False, maxTweets=None, resume=None, cache=None):
         """
         Returns Tweets composed by a single user, specified by the requested user ID.
         Only the 3200 most recent Tweets are available, ie. max 32 requests per user
@@ -1045,11 +1366,41 @@ class TwitterAPI(object):
 
         :param: start_time: Minimum allowable time is 2010-11-06T00:00:01Z (Provide in ISO8601)
         :param: end_time: Minimum allowable time is 2010-11-06T00:00:01Z (Provide in ISO8601)
+        :param asColumns: if True, the tweets are returned as TweetColumns
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param resume: name of a checkpoint, if the call is aborted (see NotReturnedData) the same call continues
+                       with the next page instead of the first one
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
         :return: dictionary key = tweet_id
         """
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_byUser == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
+        return self._collectPages(self.iterUserTweetTimeline(userId=userId, userName=userName,
+                                                             withExpansion=withExpansion,
+                                                             entriesPerPage=entriesPerPage,
+                                                             excludeRetweet=excludeRetweet,
+                                                             excludeReplies=excludeReplies, since_id=since_id,
+                                                             until_id=until_id, end_time=end_time,
+                                                             start_time=start_time, asColumns=asColumns,
+                                                             maxTweets=maxTweets, resume=resume, cache=cache),
+                                  columnsType=TweetColumns if asColumns else None)
+
+    def iterUserMentionTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
+                                excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None, end_time=None,
+                                start_time=None, asColumns=False, maxTweets=None, resume=None, cache=None):
+        """
+        Generator variant of getUserMentionTimeline, every page is yielded as soon as it is parsed.
+        Rate Limit: - App rate limit: 450 requests per 15-minute window
+                    - User rate limit: 180 requests per 15-minute window
+
+        Counts towards the TweetCap (500'000), each page is counted when it is received
 
+        :param asColumns: if True, each page is yielded as TweetColumns built directly from the response (expansions are not
+                          part of the columns)
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param resume: name of a checkpoint, the progress is stored in the CheckpointStore after each page and a
+                       call with the same name continues with the next page of the checkpoint
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
+        :return: Paginator yielding dictionaries (tweet id: tweet) one per page
+        """
         if self.apiRateLimit.remainingTweets == 0:
             raise TweetCapExceedingError("Tweet Cap exceeded. Wait until Reset Date")
 
@@ -1057,67 +1408,30 @@ class TwitterAPI(object):
             raise APIError("Please provide userId or userName")
 
         if userId:
-            str_input = f"users/{userId}/tweets"
+            str_input = f"users/{userId}/mentions"
         else:
-            str_input = f"users/by/username/{userName}/tweets"
+            str_input = f"users/by/username/{userName}/mentions"
 
         iterations = int(3200 / entriesPerPage)
 
-        tweets_Output = {}
-
         params = self._prepareParamsTimeline(withExpansion=withExpansion, entriesPerPage=entriesPerPage,
                                              excludeRetweet=excludeRetweet, excludeReplies=excludeReplies,
                                              since_id=since_id, until_id=until_id, start_time=start_time,
                                              end_time=end_time)
 
-        # todo: try-except
-        response = self._makeRequest(url_param=str_input, params=params)
-
-        self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                          withExpansion=withExpansion)
-
-        self.apiRateLimit.RequestsLeft_GET_Tweets_byUser = float(response.headers['x-rate-limit-remaining'])
-
-        for i in range(0, iterations - 1):
-            if 'next_token' in response.json()['meta'].keys():
-                if self.apiRateLimit.RequestsLeft_GET_Tweets_byUser == 0:
-                    self.apiRateLimit.ResetTime_GET_Tweets_byUser = float(response.headers['x-rate-limit-reset'])
-                    if utils.IfWaitTooLong(now=time.time(), then=self.apiRateLimit.ResetTime_GET_Tweets_byUser):
-                        self.NotReturnedData.saveData(data=tweets_Output)
-                        raise UnsavedDataLimitExceedError()
-                    else:
-                        time.sleep(30)
-
-                token = response.json()['meta']['next_token']
-                params['pagination_token'] = token
-
-                # todo: try-except
-                response = self._makeRequest(url_param=str_input, params=params)
-
-                try:
-                    self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                                      withExpansion=withExpansion)
-
-                    self.apiRateLimit.RequestsLeft_GET_Tweets_byUser = float(response.headers['x-rate-limit-remaining'])
-
-                except EmptyPageError as error:
-                    # No need to communicate this error, as the Twitter API provided empty page which the client
-                    # will not realise
-                    break
-            else:
-                break
-
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_byUser == 0:
-            self.apiRateLimit.ResetTime_GET_Tweets_byUser = float(response.headers['x-rate-limit-reset'])
-
-        self.apiRateLimit.countTowardsTweetCap(
-            numberOfTweetsRequested=len(list(tweets_Output.values())))
+        if asColumns:
+            pageHandler = functools.partial(self._pageToColumns, TweetColumns)
+        else:
+            pageHandler = functools.partial(self._tweetPageToDict, withExpansion=withExpansion)
 
-        return tweets_Output
+        return Paginator(api=self, str_input=str_input, params=params, rateLimitName="GET_Users_mentions",
+                         pageHandler=pageHandler, maxPages=iterations, countsTowardsTweetCap=True, maxTweets=maxTweets,
+                         checkpointStore=self._checkpoints(resume), checkpointName=resume,
+                         maxWait=self.maxRateLimitWait, cache=self._cacheMode(cache))
 
     def getUserMentionTimeline(self, userId=None, userName=None, withExpansion=True, entriesPerPage=100,
                                excludeRetweet=False, excludeReplies=False, since_id=None, until_id=None, end_time=None,
-                               start_time=None):
+                               start_time=None, asColumns=False, maxTweets=None, resume=None, cache=None):
         """
         Returns Tweets mentioning a single user specified by the requested user ID.
         By default, the most recent ten Tweets are returned per request.
@@ -1140,72 +1454,22 @@ class TwitterAPI(object):
         :param userId:
         :param userName:
         :param withExpansion:
+        :param asColumns: if True, the tweets are returned as TweetColumns
+        :param maxTweets: at most this many tweets are requested (and counted towards the Tweet cap)
+        :param resume: name of a checkpoint, if the call is aborted (see NotReturnedData) the same call continues
+                       with the next page instead of the first one
+        :param cache: None, 'bypass' or 'refresh', see ResponseCache, handed to the request of every page
         :return:
         """
-        if self.apiRateLimit.RequestsLeft_GET_Users_mentions == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
-        if self.apiRateLimit.remainingTweets == 0:
-            raise TweetCapExceedingError("Tweet Cap exceeded. Wait until Reset Date")
-
-        if not userId and not userName:
-            raise APIError("Please provide userId or userName")
-
-        if userId:
-            str_input = f"users/{userId}/mentions"
-        else:
-            str_input = f"users/by/username/{userName}/mentions"
-
-        iterations = int(3200 / entriesPerPage)
-
-        tweets_Output = {}
-
-        params = self._prepareParamsTimeline(withExpansion=withExpansion, entriesPerPage=entriesPerPage,
-                                             excludeRetweet=excludeRetweet, excludeReplies=excludeReplies,
-                                             since_id=since_id, until_id=until_id, start_time=start_time,
-                                             end_time=end_time)
-
-        response = self._makeRequest(url_param=str_input, params=params)
-
-        self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                          withExpansion=withExpansion)
-
-        self.apiRateLimit.RequestsLeft_GET_Users_mentions = float(response.headers['x-rate-limit-remaining'])
-
-        for i in range(0, iterations - 1):
-            if 'next_token' in response.json()['meta'].keys():
-                if self.apiRateLimit.RequestsLeft_GET_Users_mentions == 0:
-                    self.apiRateLimit.ResetTime_GET_Users_mentions = float(response.headers['x-rate-limit-reset'])
-                    if utils.IfWaitTooLong(now=time.time(), then=self.apiRateLimit.ResetTime_GET_Users_mentions):
-                        self.NotReturnedData.saveData(data=tweets_Output)
-                        raise UnsavedDataLimitExceedError()
-                    else:
-                        time.sleep(30)
-
-                token = response.json()['meta']['next_token']
-                params['pagination_token'] = token
-                response = self._makeRequest(url_param=str_input, params=params)
-
-                try:
-                    self._handleMultipleTweetResponse(response=response.json(), tweets_Output=tweets_Output,
-                                                      withExpansion=withExpansion)
-
-                    self.apiRateLimit.RequestsLeft_GET_Users_mentions = float(response.headers['x-rate-limit-remaining'])
-
-                except EmptyPageError as error:
-                    # No need to communicate this error, as the Twitter API provided empty page which the client
-                    # will not realise
-                    break
-            else:
-                break
-
-        if self.apiRateLimit.RequestsLeft_GET_Users_mentions == 0:
-            self.apiRateLimit.ResetTime_GET_Users_mentions = float(response.headers['x-rate-limit-reset'])
-
-        self.apiRateLimit.countTowardsTweetCap(
-            numberOfTweetsRequested=len(list(tweets_Output.values())))
-
-        return tweets_Output
+        return self._collectPages(self.iterUserMentionTimeline(userId=userId, userName=userName,
+                                                               withExpansion=withExpansion,
+                                                               entriesPerPage=entriesPerPage,
+                                                               excludeRetweet=excludeRetweet,
+                                                               excludeReplies=excludeReplies, since_id=since_id,
+                                                               until_id=until_id, end_time=end_time,
+                                                               start_time=start_time, asColumns=asColumns,
+                                                               maxTweets=maxTweets, resume=resume, cache=cache),
+                                  columnsType=TweetColumns if asColumns else None)
 
     def _streamer(self, str_input, withExpansion, secondsActive, timeout):
         """
@@ -1229,17 +1493,17 @@ class TwitterAPI(object):
         start = time.time()
         while True:
             try:
-                resp = requests.get(str_input, headers=self._bearerOauth(self.__bearer_token), params=params,
-                                    stream=True, timeout=timeout)
+                resp = self._transport.get(str_input, headers=self._bearerOauth(self.__bearer_token), params=params,
+                                           stream=True, timeout=timeout)
                 if resp.status_code == 200:
                     for line in resp.iter_lines():
                         try:
-                            responseAsDict = json.loads(line)
-                            self._handleTweetResponse(responseAsDict, tweets_Output, withExpansion)
+                            page = Page(body=utils.loadJson(line))
+                            self._handleTweetResponse(page, tweets_Output, withExpansion)
                             duration = time.time() - start
                             if duration > secondsActive:
                                 return tweets_Output
-                        except json.decoder.JSONDecodeError as error:  # if an empty byte response occurs, no problem, continue
+                        except utils.JSONDecodeError as error:  # if an empty byte response occurs, no problem, continue
                             continue
                 elif resp.status_code == 429:
                     print("Too many reconnects.")
@@ -1261,21 +1525,84 @@ class TwitterAPI(object):
                 print("Request exception `{}`, exiting".format(e))
                 pass
 
-    def getTweetsFromFilteredStream(self, withExpansion=True, secondsActive=600, timeout=10):
+    def _endStream(self, tweets, checkpoint, countsTowardsTweetCap=False):
+        """
+        stores the Tweets returned by a stream in its checkpoint and counts the tweets towards the Tweet cap
+        :param tweets: dictionary (id: Tweet) received by the stream
+        :param checkpoint: StreamCheckpoint or None
+        :return: tweets
+        """
+        if checkpoint is not None:
+            checkpoint.delivered(tweets)
+        if countsTowardsTweetCap:
+            self.apiRateLimit.countTowardsTweetCap(numberOfTweetsRequested=len(tweets))
+            self.tokenPool.primary.countTowardsTweetCap(len(tweets))
+        return tweets
+
+    def _stream(self, str_input, params, rateLimitName, withExpansion, secondsActive, timeout, checkpoint,
+                countsTowardsTweetCap=False):
+        """
+        Provides streaming logic and processing for filtered and sample stream, every connection is taken from the
+        rate limit of the stream with the first token (see _send), the stream reconnects until secondsActive are over
+        :param rateLimitName: "GET_Tweets_SearchStream" or "GET_Tweets_SampleStream"
+        :param checkpoint: StreamCheckpoint or None
+        :return: dictionary (id: Tweet)
+        """
+        tweets_Output = {}
+
+        start = time.time()
+        connected = False
+        while True:
+            try:
+                # a connection that is only available after secondsActive ends the stream
+                resp, _, _ = self._send("get", str_input, rateLimitName, credential=self.tokenPool.primary,
+                                        maxWait=max(0.0, secondsActive - (time.time() - start)), params=params,
+                                        stream=True, timeout=timeout)
+            except LimitExceedError:
+                if not connected:
+                    raise
+                return self._endStream(tweets_Output, checkpoint, countsTowardsTweetCap)
+            except requests.exceptions.Timeout:
+                continue  # we'll ignore timeout errors and reconnect
+            except requests.exceptions.RequestException as e:
+                print("Request exception `{}`, reconnecting".format(e))
+                continue
+            connected = True
+            try:
+                if resp.status_code == 200:
+                    for line in resp.iter_lines():
+                        try:
+                            page = Page(body=utils.loadJson(line))
+                            if checkpoint is not None and not checkpoint.isNew(page):
+                                continue  # backfilled, but received before the stream was resumed
+                            self._handleTweetResponse(page, tweets_Output, withExpansion)
+                            duration = time.time() - start
+                            if duration > secondsActive:
+                                return self._endStream(tweets_Output, checkpoint, countsTowardsTweetCap)
+                        except utils.JSONDecodeError as error:  # if an empty byte response occurs, no problem, continue
+                            continue
+                elif resp.status_code != 429:  # the bucket is empty until the reset, the next connection waits
+                    print("Unhandled status `{}` retrieved, exiting.".format(resp.status_code))
+                    return self._endStream(tweets_Output, checkpoint, countsTowardsTweetCap)
+            except requests.exceptions.Timeout:
+                pass  # we'll ignore timeout errors and reconnect
+            except requests.exceptions.RequestException as e:
+                print("Request exception `{}`, reconnecting".format(e))
+
+    def getTweetsFromFilteredStream(self, withExpansion=True, secondsActive=600, timeout=10, resume=None):
         """
         Counts towards the TweetCap (500'000)
 
         Streams Tweets in real-time based on a specific set of filter rules.
         App rate limit: 50 requests per 15-minute window
+        :param resume: name of a checkpoint of the returned Tweets, a later call with the same name asks for the Tweets
+                       of the minutes in between (backfill_minutes, at most 5) and drops the ones returned before
         :return:
         """
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_SearchStream == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
         if self.apiRateLimit.remainingTweets == 0:
             raise TweetCapExceedingError("Tweet Cap exceeded. Wait until Reset Date")
 
-        str_input = "https://api.twitter.com/2/tweets/search/stream"
+        str_input = f"{self._baseUrl}tweets/search/stream"
 
         params = {"tweet.fields": self._tweetFields, "user.fields": self._userFields, "media.fields": self._mediaFields,
                   "place.fields": self._placeFields, "poll.fields": self._pollFields}
@@ -1284,60 +1611,13 @@ class TwitterAPI(object):
             params["expansions"] = [
                 "author_id,attachments.poll_ids,attachments.media_keys,entities.mentions.username,geo.place_id,in_reply_to_user_id,referenced_tweets.id,referenced_tweets.id.author_id"]
 
-        tweets_Output = {}
+        checkpoint = None
+        if resume is not None:
+            checkpoint = StreamCheckpoint(self._checkpoints(resume), resume, str_input)
+            params = checkpoint.params(params)
 
-        start = time.time()
-        while True:
-            if self.apiRateLimit.RequestsLeft_GET_Tweets_SearchStream > 0:
-                try:
-                    resp = requests.get(str_input, headers=self._bearerOauth(self.__bearer_token), params=params,
-                                        stream=True, timeout=timeout)
-                    if resp.status_code == 200:
-                        for line in resp.iter_lines():
-                            try:
-                                self.apiRateLimit.RequestsLeft_GET_Tweets_SearchStream = line.headers[
-                                    'x-rate-limit-remaining']
-                                if self.apiRateLimit.RequestsLeft_GET_Tweets_SearchStream == 0:
-                                    self.apiRateLimit.ResetTime_GET_Tweets_SearchStream = line.headers[
-                                        'x-rate-limit-reset']
-                                responseAsDict = json.loads(line)
-                                self._handleTweetResponse(responseAsDict, tweets_Output, withExpansion)
-                                duration = time.time() - start
-                                if duration > secondsActive:
-                                    self.apiRateLimit.countTowardsTweetCap(
-                                        numberOfTweetsRequested=len(list(tweets_Output.values())))
-                                    return tweets_Output
-                            except json.decoder.JSONDecodeError as error:  # if an empty byte response occurs, no problem, continue
-                                continue
-                    elif resp.status_code == 429:
-                        wait_s = self.apiRateLimit.ResetTime_GET_Tweets_SearchStream - time.time()
-                        duration = time.time() - start
-                        TimeLeft = secondsActive - duration
-                        if wait_s > TimeLeft:
-                            self.apiRateLimit.countTowardsTweetCap(
-                                numberOfTweetsRequested=len(list(tweets_Output.values())))
-                            return tweets_Output
-                        else:
-                            time.sleep(wait_s + 5)
-                    else:
-                        print("Unhandled status `{}` retrieved, exiting.".format(resp.status_code))
-                        self.apiRateLimit.countTowardsTweetCap(
-                            numberOfTweetsRequested=len(list(tweets_Output.values())))
-                        return tweets_Output
-                except requests.exceptions.Timeout:
-                    pass  # we'll ignore timeout errors and reconnect
-                except requests.exceptions.RequestException as e:
-                    print("Request exception `{}`, exiting".format(e))
-                    pass
-            else:
-                wait_s = self.apiRateLimit.ResetTime_GET_Tweets_SearchStream - time.time()
-                duration = time.time() - start
-                TimeLeft = secondsActive - duration
-                if wait_s > TimeLeft:
-                    self.apiRateLimit.countTowardsTweetCap(numberOfTweetsRequested=len(list(tweets_Output.values())))
-                    return tweets_Output
-                else:
-                    time.sleep(wait_s+5)
+        return self._stream(str_input, params, "GET_Tweets_SearchStream", withExpansion, secondsActive, timeout,
+                            checkpoint, countsTowardsTweetCap=True)
 
     def addRulesForFilteredStream(self, rule, ruleName):
         """
@@ -1346,9 +1626,6 @@ class TwitterAPI(object):
         :param ruleName: a string
         :return: confirmation data as a dictionary provided by the Twitter API
         """
-        if self.apiRateLimit.RequestsLeft_Post_Add_Rules == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
         if type(rule) is not str or type(ruleName) is not str:
             raise Exception("Rule and ruleName must be strings")
 
@@ -1356,14 +1633,8 @@ class TwitterAPI(object):
 
         payload = {"add": sample_rules}
 
-        response = requests.post(
-            "https://api.twitter.com/2/tweets/search/stream/rules",
-            headers=self._bearerOauth(self.__bearer_token),
-            json=payload)
-
-        self.apiRateLimit.RequestsLeft_Post_Add_Rules = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_Post_Add_Rules == 0:
-            self.apiRateLimit.ResetTime_Post_Add_Rules = float(response.headers['x-rate-limit-reset'])
+        response, _, _ = self._send("post", f"{self._baseUrl}tweets/search/stream/rules", "Post_Add_Rules",
+                                    credential=self.tokenPool.primary, json=payload)
 
         return response.json()
 
@@ -1373,18 +1644,9 @@ class TwitterAPI(object):
         :param ids: a list of ids in string format
         :return: dictionary with confirmation data provided by the Twitter API
         """
-        if self.apiRateLimit.RequestsLeft_Post_Delete_Rules == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
         payload = {"delete": {"ids": ids}}
-        response = requests.post(
-            "https://api.twitter.com/2/tweets/search/stream/rules",
-            headers=self._bearerOauth(self.__bearer_token),
-            json=payload)
-
-        self.apiRateLimit.RequestsLeft_Post_Delete_Rules = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_Post_Delete_Rules == 0:
-            self.apiRateLimit.ResetTime_Post_Add_Rules = float(response.headers['x-rate-limit-reset'])
+        response, _, _ = self._send("post", f"{self._baseUrl}tweets/search/stream/rules", "Post_Delete_Rules",
+                                    credential=self.tokenPool.primary, json=payload)
 
         return response.json()
 
@@ -1393,15 +1655,8 @@ class TwitterAPI(object):
         A function that provides you with the rules that are currently applied for the filtered stream
         :return: dictionary with all rules currently applied for the filtered stream
         """
-        if self.apiRateLimit.RequestsLeft_Get_Rules == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
-        response = requests.get("https://api.twitter.com/2/tweets/search/stream/rules",
-                                headers=self._bearerOauth(self.__bearer_token))
-
-        self.apiRateLimit.RequestsLeft_Get_Rules = float(response.headers['x-rate-limit-remaining'])
-        if self.apiRateLimit.RequestsLeft_Get_Rules == 0:
-            self.apiRateLimit.ResetTime_Get_Rules = float(response.headers['x-rate-limit-reset'])
+        response, _, _ = self._send("get", f"{self._baseUrl}tweets/search/stream/rules", "Get_Rules",
+                                    credential=self.tokenPool.primary)
 
         return response.json()
 
@@ -1410,28 +1665,15 @@ class TwitterAPI(object):
         A function that let's you delete all your rules
         :return: confirmation in dictionary format of the json response by the Twitter API
         """
-        try:
-            rules = self.getRulesForFilteredStream()
-        except LimitExceedError:
-            timeToWait_s = self.apiRateLimit.ResetTime_Get_Rules - time.time()
-            if timeToWait_s > 60:
-                raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-            time.sleep(timeToWait_s)
-            rules = self.getRulesForFilteredStream()
+        rules = self.getRulesForFilteredStream()  # waits up to maxRateLimitWait for the rate limit
 
         if rules is None or "data" not in rules:
             return None
 
         ids = list(map(lambda rule: rule["id"], rules["data"]))
-        payload = {"delete": {"ids": ids}}
-        response = requests.post(
-            "https://api.twitter.com/2/tweets/search/stream/rules",
-            headers=self._bearerOauth(self.__bearer_token),
-            json=payload)
+        return self.deleteRulesForFilteredStream(ids)
 
-        return response.json()
-
-    def getTweetsFromSampleStream(self, withExpansion=True, secondsActive=600, timeout=10):
+    def getTweetsFromSampleStream(self, withExpansion=True, secondsActive=600, timeout=10, resume=None):
         """
         Streams about 1% of all Tweets in real-time.
         App rate limit: 50 requests per 15-minute window
@@ -1439,12 +1681,11 @@ class TwitterAPI(object):
         :param withExpansion:
         :param secondsActive:
         :param timeout:
+        :param resume: name of a checkpoint of the returned Tweets, a later call with the same name asks for the Tweets
+                       of the minutes in between (backfill_minutes, at most 5) and drops the ones returned before
         :return:
         """
-        if self.apiRateLimit.RequestsLeft_GET_Tweets_SampleStream == 0:
-            raise LimitExceedError("Rate limit exceeded. Wait up to 15 minutes before you call this method again")
-
-        str_input = "https://api.twitter.com/2/tweets/sample/stream"
+        str_input = f"{self._baseUrl}tweets/sample/stream"
 
         params = {"tweet.fields": self._tweetFields, "user.fields": self._userFields, "media.fields": self._mediaFields,
                   "place.fields": self._placeFields, "poll.fields": self._pollFields}
@@ -1453,50 +1694,10 @@ class TwitterAPI(object):
             params["expansions"] = [
                 "author_id,attachments.poll_ids,attachments.media_keys,entities.mentions.username,geo.place_id,in_reply_to_user_id,referenced_tweets.id,referenced_tweets.id.author_id"]
 
-        tweets_Output = {}
+        checkpoint = None
+        if resume is not None:
+            checkpoint = StreamCheckpoint(self._checkpoints(resume), resume, str_input)
+            params = checkpoint.params(params)
 
-        start = time.time()
-        while True:
-            if self.apiRateLimit.RequestsLeft_GET_Tweets_SearchStream > 0:
-                try:
-                    resp = requests.get(str_input, headers=self._bearerOauth(self.__bearer_token), params=params,
-                                        stream=True, timeout=timeout)
-                    if resp.status_code == 200:
-                        for line in resp.iter_lines():
-                            try:
-                                self.apiRateLimit.RequestsLeft_GET_Tweets_SampleStream = line.headers[
-                                    'x-rate-limit-remaining']
-                                if self.apiRateLimit.RequestsLeft_GET_Tweets_SampleStream == 0:
-                                    self.apiRateLimit.ResetTime_GET_Tweets_SampleStream = line.headers[
-                                        'x-rate-limit-reset']
-                                responseAsDict = json.loads(line)
-                                self._handleTweetResponse(responseAsDict, tweets_Output, withExpansion)
-                                duration = time.time() - start
-                                if duration > secondsActive:
-                                    return tweets_Output
-                            except json.decoder.JSONDecodeError as error:  # if an empty byte response occurs, no problem, continue
-                                continue
-                    elif resp.status_code == 429:
-                        wait_s = self.apiRateLimit.ResetTime_GET_Tweets_SampleStream - time.time()
-                        duration = time.time() - start
-                        TimeLeft = secondsActive - duration
-                        if wait_s > TimeLeft:
-                            return tweets_Output
-                        else:
-                            time.sleep(wait_s + 5)
-                    else:
-                        print("Unhandled status `{}` retrieved, exiting.".format(resp.status_code))
-                        return tweets_Output
-                except requests.exceptions.Timeout:
-                    pass  # we'll ignore timeout errors and reconnect
-                except requests.exceptions.RequestException as e:
-                    print("Request exception `{}`, exiting".format(e))
-                    pass
-            else:
-                wait_s = self.apiRateLimit.ResetTime_GET_Tweets_SampleStream - time.time()
-                duration = time.time() - start
-                TimeLeft = secondsActive - duration
-                if wait_s > TimeLeft:
-                    return tweets_Output
-                else:
-                    time.sleep(wait_s + 5)
+        return self._stream(str_input, params, "GET_Tweets_SampleStream", withExpansion, secondsActive, timeout,
+                            checkpoint)
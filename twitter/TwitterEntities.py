@@ -1,11 +1,40 @@
 import inspect
-import numpy as np
 
 from twitter.RealWorldEntity import RealWorldEntity
 import twitter.utils as utils
 
 
+def _lazyContainer(slot, factory):
+    """
+    property for a container attribute that is only allocated on first access, most entities keep their containers
+    empty and would otherwise carry an empty list or dict each
+    :param slot: name of the slot that holds the container, None until it is accessed
+    :param factory: list or dict
+    :return: property
+    """
+    def getter(self):
+        container = getattr(self, slot)
+        if container is None:
+            container = factory()
+            setattr(self, slot, container)
+        return container
+
+    def setter(self, value):
+        setattr(self, slot, value)
+
+    return property(getter, setter)
+
+
 class TwitterEntity:
+    # fields the Twitter API returns are stored in slots, '__dict__' is only allocated for fields that are
+    # not declared by a class (e.g. new fields of the API)
+    # '_raw' holds the json derived dict of an entity created with lazy=True, until it is materialised
+    # '__weakref__' allows the IdentityMap to hold entities without keeping them alive
+    __slots__ = ('__dict__', '_raw', '__weakref__')
+    _fields = frozenset()
+    _sourceKeys = {}  # attribute -> key of the json derived dict the attribute is decoded from (if they differ)
+    _linkedContainers = frozenset()  # containers that collect linked entities, merge() adds to them
+
     """def __init__(self):
         self.param_defaults = {}
 
@@ -14,10 +43,115 @@ class TwitterEntity:
         print(output)"""
 
     @classmethod
-    def createFromDict(cls, data):
+    def createFromDict(cls, data, lazy=False):
+        if lazy:
+            return cls._createLazy(data)
         created_instance = cls(**data)
         return created_instance
 
+    @classmethod
+    def _createLazy(cls, data):
+        """
+        creates an instance that only holds the json derived dict, each attribute is decoded on first access
+        :param data: json derived dict
+        :return: instance of cls
+        """
+        instance = cls.__new__(cls)
+        instance._raw = data
+        return instance
+
+    @classmethod
+    def _decodeItem(cls, key, value, instantiationData):
+        """
+        decodes a single key of the json derived dict into instantiationData, used by createFromDict and lazy instances
+        """
+        instantiationData[key] = value
+
+    def _getRaw(self):
+        try:
+            return object.__getattribute__(self, '_raw')
+        except AttributeError:
+            return None
+
+    def _findSourceKey(self, raw, name):
+        return self._sourceKeys.get(name, name)
+
+    def _isSet(self, name):
+        # containers are stored in a slot with a leading underscore, reading them via the property would create them
+        storage = f"_{name}" if f"_{name}" in self._fields else name
+        try:
+            object.__getattribute__(self, storage)
+        except AttributeError:
+            return False
+        return True
+
+    def _applyDecoded(self, decoded):
+        for key, value in decoded.items():
+            if not self._isSet(key):  # attributes that were already decoded (and maybe changed) are kept
+                setattr(self, key, value)
+
+    def __getattr__(self, name):
+        # only called if an attribute is not set, i.e. for entities created with lazy=True that are not decoded yet
+        raw = self._getRaw()
+        if raw is None or name.startswith('__'):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        key = self._findSourceKey(raw, name)
+        if key not in raw and name not in self._fields:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        decoded = {}
+        if key in raw:
+            self._decodeItem(key, raw[key], decoded)
+        self._applyDecoded(decoded)
+        if name in self._fields and not self._isSet(name):
+            setattr(self, name, None)  # field that is not part of the response
+        return object.__getattribute__(self, name)
+
+    def materialise(self):
+        """
+        decodes all remaining attributes of an entity created with lazy=True and releases the json derived dict,
+        for entities that are created eagerly this does nothing
+        :return: self
+        """
+        raw = self._getRaw()
+        if raw is None:
+            return self
+        decoded = {}
+        for key, value in raw.items():
+            self._decodeItem(key, value, decoded)
+        self._applyDecoded(decoded)
+        for name in self._fields:
+            if not self._isSet(name):
+                setattr(self, name, None)
+        self._raw = None
+        return self
+
+    def merge(self, other):
+        """
+        takes over the fields of a newer instance of the same entity (re-sighting in a later response),
+        fields the newer instance does not have are kept, linked entities (followers, media, ...) are accumulated
+        :param other: instance of the same entity
+        :return: self
+        """
+        if other is self:
+            return self
+        other.materialise()
+        values = [(name, object.__getattribute__(other, name)) for name in other._fields if other._isSet(name)]
+        values.extend(other.__dict__.items())
+        for name, value in values:
+            if value is None:
+                continue
+            if name not in self._linkedContainers:
+                setattr(self, name, value)
+                continue
+            container = getattr(self, name, None)
+            if container is None:
+                setattr(self, name, value)
+            elif isinstance(container, dict):
+                container.update(value)
+            else:
+                container.extend(item for item in value if item not in container)
+        return self
+
     def createFollower(self, follower):
         pass
 
@@ -26,6 +160,17 @@ class TwitterEntity:
 
 
 class TwitterUser(TwitterEntity):
+    __slots__ = ('created_at', 'description', 'entities', 'id', 'location', 'name', 'pinned_tweet_id',
+                 'profile_image_url', 'protected', 'followers_count', 'following_count', '_tweets', 'tweet_count',
+                 'listed_count', 'url', 'username', 'verified', 'withheld', '_friends', '_followers', 'start', 'end')
+
+    _fields = frozenset(__slots__)
+    _linkedContainers = frozenset({'_tweets', '_friends', '_followers'})
+
+    tweets = _lazyContainer('_tweets', dict)
+    friends = _lazyContainer('_friends', dict)
+    followers = _lazyContainer('_followers', dict)
+
     def __init__(self, **kwargs):
         super().__init__()
         self.created_at = None
@@ -39,15 +184,15 @@ class TwitterUser(TwitterEntity):
         self.protected = None
         self.followers_count = None
         self.following_count = None
-        self.tweets = {}  # todo: create a function that makes a list out of this dictionary?
+        self._tweets = None  # todo: create a function that makes a list out of this dictionary?
         self.tweet_count = None
         self.listed_count = None
         self.url = None
         self.username = None
         self.verified = None
         self.withheld = None
-        self.friends = {}
-        self.followers = {}
+        self._friends = None
+        self._followers = None
         self.start = None
         self.end = None
         for (param, attribute) in kwargs.items():
@@ -99,7 +244,7 @@ class TwitterUser(TwitterEntity):
         stores multiple followers for an user instance
         :param followers
         """
-        self.followers = {**self.followers, **followers}
+        self.followers.update(followers)
 
     def saveSingleFollower(self, follower):
         """
@@ -113,7 +258,7 @@ class TwitterUser(TwitterEntity):
         stores multiple friends for an user instance
         :param friends
         """
-        self.friends = {**self.friends, **friends}
+        self.friends.update(friends)
 
     def saveSingleFriend(self, friend):
         """
@@ -123,36 +268,47 @@ class TwitterUser(TwitterEntity):
         self.friends[friend.id] = friend
 
     @classmethod
-    def createFromDict(cls, data):
+    def createFromDict(cls, data, lazy=False):
         """
         Json derived dict used to instantiate twitter user, if from friend or follower lookup loop through json,
         and for user lookup json dictionary indexed with ['data'], such that multiple functions work with the same function
         instantiation of tweet if pinned happens via Tweet.createFromDict called by function in TwitterAPI
         :param data: dictionary that contains information about a user
+        :param lazy: if True, the instance keeps data and decodes each attribute on first access
         :return: instance of twitter user class
         """
-        tmp = []
+        if lazy:
+            return cls._createLazy(data)
         instantiationData = {}
         for (key, value) in data.items():
-            try:
-                items = value.items()
-            except (AttributeError, TypeError):
-                if key == "description":
-                    transformed_text = utils.encodeDecodeTwitterText(value)
-                    instantiationData[key] = transformed_text
-                else:
-                    instantiationData[key] = value  # ie. value not a dictionary
-            else:  # no exception raised
-                for (secLvlKey, secLvlvalue) in items:
-                    # entities is not in higher resolution in the fields
-                    if key == 'entities':
-                        instantiationData[key] = value  # for entities
-                        continue
-                    tmp.append((secLvlKey, secLvlvalue))
-        for secLvlKey, value in tmp:
-            instantiationData[secLvlKey] = value
+            cls._decodeItem(key, value, instantiationData)
         return cls(**instantiationData)
 
+    @classmethod
+    def _decodeItem(cls, key, value, instantiationData):
+        try:
+            items = value.items()
+        except (AttributeError, TypeError):
+            if key == "description":
+                transformed_text = utils.encodeDecodeTwitterText(value)
+                instantiationData[key] = transformed_text
+            else:
+                instantiationData[key] = value  # ie. value not a dictionary
+        else:  # no exception raised
+            if key == 'entities':
+                instantiationData[key] = value  # entities is not in higher resolution in the fields
+                return
+            for (secLvlKey, secLvlvalue) in items:  # e.g. public_metrics
+                instantiationData[secLvlKey] = secLvlvalue
+
+    def _findSourceKey(self, raw, name):
+        if name in raw:
+            return name
+        for key, value in raw.items():  # second level keys, e.g. followers_count in public_metrics
+            if key != 'entities' and isinstance(value, dict) and name in value:
+                return key
+        return name
+
     @classmethod
     def createFromMention(cls, dictionary):
         return cls(**dictionary)
@@ -180,6 +336,29 @@ class TwitterUser(TwitterEntity):
 
 
 class Tweet(TwitterEntity):
+    __slots__ = ('id', 'conversation_id', 'text', 'author_id', 'lang', 'created_at', 'source', 'reply_settings',
+                 'possibly_sensitive', 'reply_count', 'retweet_count', 'like_count', 'quote_count', 'pinned',
+                 'in_reply_to_user_id', 'referenced_tweets', '_tweets', '_realWorldEntities', 'attachments', '_users',
+                 '_urls', '_media', '_geo', '_poll', '_hashtags', '_mentions', '_polls', '_places')
+
+    _fields = frozenset(__slots__)
+    _linkedContainers = frozenset({'_tweets', '_users', '_media', '_poll', '_polls', '_places'})
+    _sourceKeys = {'reply_count': 'public_metrics', 'retweet_count': 'public_metrics',
+                   'like_count': 'public_metrics', 'quote_count': 'public_metrics', '_mentions': 'entities',
+                   '_realWorldEntities': 'entities', '_urls': 'entities', '_hashtags': 'entities', '_geo': 'geo'}
+
+    tweets = _lazyContainer('_tweets', list)
+    realWorldEntities = _lazyContainer('_realWorldEntities', list)
+    users = _lazyContainer('_users', list)
+    urls = _lazyContainer('_urls', list)
+    media = _lazyContainer('_media', list)
+    geo = _lazyContainer('_geo', dict)
+    poll = _lazyContainer('_poll', list)
+    hashtags = _lazyContainer('_hashtags', list)
+    mentions = _lazyContainer('_mentions', list)
+    polls = _lazyContainer('_polls', list)  # linked by ExpansionIndex
+    places = _lazyContainer('_places', list)
+
     def __init__(self, **kwargs):
         super().__init__()
         # part of tweet as expansion fields
@@ -199,68 +378,95 @@ class Tweet(TwitterEntity):
         self.pinned = False
         self.in_reply_to_user_id = None
         self.referenced_tweets = None
-        self.tweets = []  # saving referenced tweet objects
-        self.realWorldEntities = []
+        self._tweets = None  # saving referenced tweet objects
+        self._realWorldEntities = None
         self.attachments = None
-        self.users = []  # todo: maybe discard, conflict between mentions and users, are both needed? mentions is with or without expansion filled,
+        self._users = None  # todo: maybe discard, conflict between mentions and users, are both needed? mentions is with or without expansion filled,
         #                   todo: users only if with expansion - is mentions a subset of users?
-        self.urls = []
-        self.media = []
-        self.geo = {}  # place_id is associated with a place
-        self.poll = []
-        self.hashtags = []
-        self.mentions = []  # mentioned in tweet, not author itself
+        self._urls = None
+        self._media = None
+        self._geo = None  # place_id is associated with a place
+        self._poll = None
+        self._hashtags = None
+        self._mentions = None  # mentioned in tweet, not author itself
+        self._polls = None
+        self._places = None
         for (param, attribute) in kwargs.items():
             setattr(self, param, attribute)
 
     @classmethod
-    def createFromDict(cls, data, pinned=False):
-        instantiationData = {}
-        realWorldEntities = []
-        tweetType = "Tweet"
-        tweetTypes = {"Tweet": "Tweet", "replied_to": "TweetReply", "retweeted": "Retweet", "quoted": "QuotedRetweet"}
+    def createFromDict(cls, data, pinned=False, lazy=False, textNormalised=False):
+        """
+        :param data: json derived dict of a tweet
+        :param pinned: if the tweet is the pinned tweet of a user
+        :param lazy: if True, the instance keeps data and decodes each attribute on first access
+        :param textNormalised: if True, the text was already passed through utils.encodeDecodeTwitterTexts
+        :return: instance of the class registered for the type of the tweet, see registerTweetType
+        """
+        referencedTweets = data.get('referenced_tweets')
+        tweetType = tweetTypes[referencedTweets[0]['type'] if referencedTweets else None]
+
+        if lazy:
+            instance = tweetType._createLazy(data)
+            instance.pinned = pinned
+            return instance
 
+        instantiationData = {}
         if pinned:
             instantiationData['pinned'] = pinned
-
         for (key, value) in data.items():
-            if key not in ['public_metrics', 'entities', 'context_annotations']:
-                if key == "text":
-                    transformed_text = utils.encodeDecodeTwitterText(value)
-                    instantiationData[key] = transformed_text
-                elif key == "referenced_tweets":
-                    tweetType = tweetTypes[value[0]['type']]
-                    instantiationData[key] = value
-                else:
-                    instantiationData[key] = value
-
-            elif key == 'public_metrics':
-                for subKey in value.keys():
-                    instantiationData[subKey] = value[subKey]
-
-            elif key == 'context_annotations':
-                for realWorldEntityDict in value:
-                    rwEntity = RealWorldEntity()
-                    realWorldEntities.append(rwEntity.createFromDictContextAnnotations(realWorldEntityDict))
-
-            elif key == 'entities':
-                instantiationData['mentions'] = []
-                instantiationData['realWorldEntities'] = []
-                for subKey, listDict in value.items():  # possible keys: mentions, hashtags, annotations, urls
-                    if subKey in ['urls', 'hashtags']:
-                        instantiationData[subKey] = listDict
-                        continue
-                    for dictionary in listDict:  # possible keys: start, end, and some specific to each category (annotations, mentions)
-                        if subKey == "mentions":
-                            user = TwitterUser.createFromMention(dictionary)
-                            instantiationData['mentions'].append(user)
-                        elif subKey == "annotations":
-                            rwEntity = RealWorldEntity()
-                            for rwKey, rwValues in dictionary.items():
-                                setattr(rwEntity, rwKey, rwValues)
-                            instantiationData['realWorldEntities'].append(rwEntity)
-
-        return eval(tweetType)(**instantiationData)
+            if key == "text" and textNormalised:
+                instantiationData[key] = value
+            else:
+                cls._decodeItem(key, value, instantiationData)
+        return tweetType(**instantiationData)
+
+    @classmethod
+    def _decodeItem(cls, key, value, instantiationData):
+        if key not in ['public_metrics', 'entities', 'context_annotations']:
+            if key == "text":
+                transformed_text = utils.encodeDecodeTwitterText(value)
+                instantiationData[key] = transformed_text
+            else:
+                instantiationData[key] = value
+
+        elif key == 'public_metrics':
+            for subKey in value.keys():
+                instantiationData[subKey] = value[subKey]
+
+        elif key == 'context_annotations':
+            realWorldEntities = []  # todo: not attached to the tweet yet
+            for realWorldEntityDict in value:
+                rwEntity = RealWorldEntity()
+                realWorldEntities.append(rwEntity.createFromDictContextAnnotations(realWorldEntityDict))
+
+        elif key == 'entities':
+            instantiationData['mentions'] = []
+            instantiationData['realWorldEntities'] = []
+            for subKey, listDict in value.items():  # possible keys: mentions, hashtags, annotations, urls
+                if subKey in ['urls', 'hashtags']:
+                    instantiationData[subKey] = listDict
+                    continue
+                for dictionary in listDict:  # possible keys: start, end, and some specific to each category (annotations, mentions)
+                    if subKey == "mentions":
+                        user = TwitterUser.createFromMention(dictionary)
+                        instantiationData['mentions'].append(user)
+                    elif subKey == "annotations":
+                        rwEntity = RealWorldEntity()
+                        for rwKey, rwValues in dictionary.items():
+                            setattr(rwEntity, rwKey, rwValues)
+                        instantiationData['realWorldEntities'].append(rwEntity)
+
+    def _findSourceKey(self, raw, name):
+        if name not in self._sourceKeys and name not in raw and name in raw.get('public_metrics', {}):
+            return 'public_metrics'
+        return self._sourceKeys.get(name, name)
+
+    def merge(self, other):
+        pinned = self.pinned or other.pinned  # a pinned tweet stays pinned if it is seen in a timeline
+        super().merge(other)
+        self.pinned = pinned
+        return self
 
     def linkWithTweet(self):
         """
@@ -279,21 +485,30 @@ class Tweet(TwitterEntity):
 
 
 class Retweet(Tweet):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 
 class TweetReply(Tweet):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 
 class QuotedRetweet(Tweet):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 
 class Media(TwitterEntity):
+    __slots__ = ('type', 'media_key', 'height', 'width', 'url')
+    _fields = frozenset(__slots__)
+
     def __init__(self, **kwargs):
         super().__init__()
         self.type = None
@@ -306,7 +521,9 @@ class Media(TwitterEntity):
             setattr(self, param, attribute)
 
     @classmethod
-    def createFromDict(cls, data):
+    def createFromDict(cls, data, lazy=False):
+        if lazy:
+            return cls._createLazy(data)
         return cls(**data)
 
     def linkWithTweet(self):
@@ -326,6 +543,9 @@ class Media(TwitterEntity):
 
 
 class Poll(TwitterEntity):
+    __slots__ = ('end_datetime', 'id', 'voting_status', 'duration_minutes', 'options')
+    _fields = frozenset(__slots__)
+
     def __init__(self, **kwargs):
         super().__init__()
         self.end_datetime = None
@@ -338,21 +558,27 @@ class Poll(TwitterEntity):
             setattr(self, param, attribute)
 
     @classmethod
-    def createFromDict(cls, data):
+    def createFromDict(cls, data, lazy=False):
+        if lazy:
+            return cls._createLazy(data)
         instantiationData = {}
         for key, value in data.items():
-            if key == "options":
-                tmp = []
-                for optionDict in value:
-                    tmpString = optionDict['label']
-                    newTmpString = utils.encodeDecodeTwitterText(tmpString)
-                    optionDict['label'] = newTmpString
-                    tmp.append(optionDict)
-                instantiationData[key] = tmp
-            else:
-                instantiationData[key] = value
+            cls._decodeItem(key, value, instantiationData)
         return cls(**instantiationData)
 
+    @classmethod
+    def _decodeItem(cls, key, value, instantiationData):
+        if key == "options":
+            tmp = []
+            for optionDict in value:
+                tmpString = optionDict['label']
+                newTmpString = utils.encodeDecodeTwitterText(tmpString)
+                optionDict['label'] = newTmpString
+                tmp.append(optionDict)
+            instantiationData[key] = tmp
+        else:
+            instantiationData[key] = value
+
     def linkWithTweet(self):
         """
         if Poll was part of multiple Tweet request
@@ -370,14 +596,27 @@ class Poll(TwitterEntity):
 
 
 class Place(TwitterEntity):
+    __slots__ = ('full_name', 'id', 'contained_within', 'country', 'country_code', 'geo', 'name', 'place_type')
+    _fields = frozenset(__slots__)
+
     def __init__(self, **kwargs):
         super().__init__()
+        self.full_name = None
+        self.id = None
+        self.contained_within = None
+        self.country = None
+        self.country_code = None
+        self.geo = None
+        self.name = None
+        self.place_type = None
 
         for (param, attribute) in kwargs.items():
             setattr(self, param, attribute)
 
     @classmethod
-    def createFromDict(cls, data):
+    def createFromDict(cls, data, lazy=False):
+        if lazy:
+            return cls._createLazy(data)
         return cls(**data)
 
     def linkWithTweet(self):
@@ -389,3 +628,32 @@ class Place(TwitterEntity):
             return self.id
         except AttributeError:
             return None
+
+
+# type of the first referenced tweet -> class that is instantiated by Tweet.createFromDict, None for original tweets
+tweetTypes = {None: Tweet, "replied_to": TweetReply, "retweeted": Retweet, "quoted": QuotedRetweet}
+
+# key in the includes of a response -> class that is instantiated for each of its objects
+expansionTypes = {'users': TwitterUser, 'media': Media, 'places': Place, 'polls': Poll, 'tweets': Tweet}
+
+
+def registerTweetType(referenceType, tweetClass):
+    """
+    replaces the class that is instantiated for a type of tweet, e.g. to use an own subclass of Retweet
+
+    desired usage:
+    registerTweetType("retweeted", MyRetweet)
+
+    :param referenceType: None (original tweet), "replied_to", "retweeted" or "quoted"
+    :param tweetClass: subclass of Tweet
+    """
+    tweetTypes[referenceType] = tweetClass
+
+
+def registerExpansionType(includesKey, entityClass):
+    """
+    replaces the class that is instantiated for the objects in the includes of a response
+    :param includesKey: 'users', 'media', 'places', 'polls', 'tweets' or a key the API adds later
+    :param entityClass: class with createFromDict(data, lazy=False) and linkWithTweet()
+    """
+    expansionTypes[includesKey] = entityClass
@@ -1,4 +1,20 @@
-from twitter.TwitterEntities import TwitterUser, Tweet, Media, Place, Poll
+from twitter.TwitterEntities import (TwitterUser, Tweet, Media, Place, Poll, registerTweetType,
+                                     registerExpansionType)
 from twitter.TwitterAPI import TwitterAPI
+from twitter.AsyncTwitterAPI import AsyncTwitterAPI
 from twitter.Error import APIError, EmptyPageError
 from twitter.NotReturnedData import NotReturnedData
+from twitter.Transport import Transport
+from twitter.Page import Page
+from twitter.Columns import TweetColumns, UserColumns
+from twitter.ExpansionIndex import ExpansionIndex
+from twitter.IdentityMap import IdentityMap
+from twitter.LookupBatcher import LookupBatcher
+from twitter.ResponseCache import ResponseCache
+from twitter.EntityCache import EntityCache
+from twitter.RateLimiter import RateLimiter
+from twitter.TokenPool import TokenPool
+from twitter.SharedState import SharedState
+from twitter.Scheduler import Scheduler
+from twitter.TweetCapLog import TweetCapLog
+from twitter.CheckpointStore import CheckpointStore
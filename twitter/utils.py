@@ -4,16 +4,54 @@ twitter.utils
 This module provides utility functions that are used within twitter.
 """
 
+import json
+import re
 from datetime import datetime
 
+# the fastest available json parser is selected once at import time
+try:
+    import orjson
+
+    loadJson = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    try:
+        import simdjson
+
+        loadJson = simdjson.loads
+        JSONDecodeError = ValueError
+    except ImportError:
+        loadJson = json.loads
+        JSONDecodeError = json.JSONDecodeError
+
+
+_surrogates = re.compile('[\ud800-\udfff]')
+
 
 def encodeDecodeTwitterText(twitterText):
     """
     used in create TweetFromDict, UserFromDict, PollFromDict
+    joins surrogate pairs (e.g. emojis decoded as two utf-16 code units) into a single character,
+    ascii and surrogate-free texts, i.e. almost all texts, are returned as they are
     :param twitterText:
     :return:
     """
-    return twitterText.encode('utf-16', 'surrogatepass').decode('utf-16').encode('utf-8').decode('utf-8')
+    if twitterText.isascii() or _surrogates.search(twitterText) is None:
+        return twitterText
+    # a lone surrogate raises UnicodeDecodeError as before
+    return twitterText.encode('utf-16', 'surrogatepass').decode('utf-16')
+
+
+def encodeDecodeTwitterTexts(twitterTexts):
+    """
+    batch variant of encodeDecodeTwitterText for all texts of a page (one pass, no call per text), None entries are
+    kept
+    :param twitterTexts: list of texts
+    :return: list of texts
+    """
+    search = _surrogates.search
+    return [text if text is None or text.isascii() or search(text) is None
+            else text.encode('utf-16', 'surrogatepass').decode('utf-16') for text in twitterTexts]
 
 
 def datetime_valid(dt_str):
@@ -28,9 +66,9 @@ def datetime_valid(dt_str):
     return True
 
 
-def IfWaitTooLong(now, then):
+def IfWaitTooLong(now, then, maxWait=30):
     diff = then - now
-    if diff > 30:
+    if diff > maxWait:
         return True
     else:
         return False